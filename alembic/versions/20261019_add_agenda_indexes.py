@@ -0,0 +1,30 @@
+"""add due-date range and recurring-series indexes for the agenda
+
+Revision ID: 20261019_add_agenda_indexes
+Revises: 20261019_subtasks_on_delete_cascade
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_agenda_indexes"
+down_revision = "20261019_subtasks_on_delete_cascade"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_tasks_due_date", "tasks", ["due_date"])
+    op.create_index(
+        "ix_tasks_recurring",
+        "tasks",
+        ["due_date"],
+        sqlite_where=sa.text("recurrence_pattern IS NOT NULL"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_tasks_recurring", table_name="tasks")
+    op.drop_index("ix_tasks_due_date", table_name="tasks")
@@ -0,0 +1,56 @@
+"""add changes log and change consumers
+
+Revision ID: 20261019_add_change_log
+Revises: dbb6eede6d13
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_change_log"
+down_revision = "dbb6eede6d13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "changes",
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=True),
+        sa.Column("op", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("seq"),
+        sqlite_autoincrement=True,
+    )
+    op.create_index(
+        "ix_changes_entity", "changes", ["entity", "entity_id"], unique=False
+    )
+    op.create_table(
+        "change_consumers",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("last_seq", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+    # Seed the log with the existing rows so that `since=0` is a full snapshot
+    op.execute(
+        "INSERT INTO changes (entity, entity_id, op, created_at) "
+        "SELECT 'task', id, 'upsert', CURRENT_TIMESTAMP FROM tasks ORDER BY id"
+    )
+    op.execute(
+        "INSERT INTO changes (entity, entity_id, task_id, op, created_at) "
+        "SELECT 'subtask', id, task_id, 'upsert', CURRENT_TIMESTAMP "
+        "FROM subtasks ORDER BY id"
+    )
+
+
+def downgrade():
+    op.drop_table("change_consumers")
+    op.drop_index("ix_changes_entity", table_name="changes")
+    op.drop_table("changes")
@@ -0,0 +1,55 @@
+"""add daily_stats rollup table
+
+Revision ID: 20261019_add_daily_stats
+Revises: 20261019_add_tasks_archive
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_daily_stats"
+down_revision = "20261019_add_tasks_archive"
+branch_labels = None
+depends_on = None
+
+QUADRANT_SQL = (
+    "coalesce(quadrant, CASE WHEN urgent AND important THEN 1 "
+    "WHEN important THEN 2 WHEN urgent THEN 3 ELSE 4 END)"
+)
+
+
+def _events_sql(table):
+    return (
+        f"SELECT date(created_at) AS day, {QUADRANT_SQL} AS quadrant, "
+        f"coalesce(tag, '') AS tag, 1 AS created, 0 AS completed "
+        f"FROM {table} WHERE created_at IS NOT NULL "
+        f"UNION ALL "
+        f"SELECT date(completed_at), {QUADRANT_SQL}, coalesce(tag, ''), 0, 1 "
+        f"FROM {table} WHERE status = 'done' AND completed_at IS NOT NULL"
+    )
+
+
+def upgrade():
+    op.create_table(
+        "daily_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("quadrant", sa.Integer(), nullable=False),
+        sa.Column("tag", sa.String(), nullable=False),
+        sa.Column("created", sa.Integer(), nullable=False),
+        sa.Column("completed", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "quadrant", "tag"),
+    )
+
+    # Backfill (same as scripts/backfill_daily_stats.py)
+    op.execute(
+        "INSERT INTO daily_stats (day, quadrant, tag, created, completed) "
+        "SELECT day, quadrant, tag, sum(created), sum(completed) FROM ("
+        f"{_events_sql('tasks')} UNION ALL {_events_sql('tasks_archive')}"
+        ") GROUP BY day, quadrant, tag"
+    )
+
+
+def downgrade():
+    op.drop_table("daily_stats")
@@ -0,0 +1,99 @@
+"""add normalized tags and task_tags tables
+
+Revision ID: 20261019_add_tags
+Revises: 20261019_add_daily_stats
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_tags"
+down_revision = "20261019_add_daily_stats"
+branch_labels = None
+depends_on = None
+
+
+def _parse(tag):
+    # Même règle que crud.parse_tags
+    names = []
+    for part in (tag or "").split(","):
+        name = part.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def upgrade():
+    op.create_table(
+        "tags",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False, unique=True),
+        sa.Column("task_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("open_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "task_tags",
+        sa.Column(
+            "task_id",
+            sa.Integer(),
+            sa.ForeignKey("tasks.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "tag_id",
+            sa.Integer(),
+            sa.ForeignKey("tags.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+    )
+    op.create_index("ix_task_tags_tag", "task_tags", ["tag_id", "task_id"])
+
+    # Backfill depuis la colonne libre tasks.tag (normalisée au passage)
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text("SELECT id, tag, status FROM tasks WHERE tag IS NOT NULL")
+    ).all()
+    tag_ids, counts, links, retag = {}, {}, [], []
+    for task_id, tag, status in rows:
+        names = _parse(tag)
+        normalized = ", ".join(names) or None
+        if normalized != tag:
+            retag.append({"id": task_id, "tag": normalized})
+        for name in names:
+            tag_id = tag_ids.setdefault(name, len(tag_ids) + 1)
+            total, opened = counts.get(name, (0, 0))
+            counts[name] = (total + 1, opened + int(status != "done"))
+            links.append({"task_id": task_id, "tag_id": tag_id})
+
+    if tag_ids:
+        bind.execute(
+            sa.text(
+                "INSERT INTO tags (id, name, task_count, open_count) "
+                "VALUES (:id, :name, :task_count, :open_count)"
+            ),
+            [
+                {
+                    "id": tag_id,
+                    "name": name,
+                    "task_count": counts[name][0],
+                    "open_count": counts[name][1],
+                }
+                for name, tag_id in tag_ids.items()
+            ],
+        )
+        bind.execute(
+            sa.text(
+                "INSERT INTO task_tags (task_id, tag_id) VALUES (:task_id, :tag_id)"
+            ),
+            links,
+        )
+    if retag:
+        bind.execute(sa.text("UPDATE tasks SET tag = :tag WHERE id = :id"), retag)
+
+
+def downgrade():
+    op.drop_index("ix_task_tags_tag", table_name="task_tags")
+    op.drop_table("task_tags")
+    op.drop_table("tags")
@@ -0,0 +1,44 @@
+"""add task_dependencies ("blocked by" edges between tasks)
+
+Revision ID: 20261019_add_task_dependencies
+Revises: 20261019_add_time_tracking
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_task_dependencies"
+down_revision = "20261019_add_time_tracking"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "task_dependencies",
+        sa.Column(
+            "task_id",
+            sa.Integer(),
+            sa.ForeignKey("tasks.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "depends_on_id",
+            sa.Integer(),
+            sa.ForeignKey("tasks.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_task_dependencies_depends_on",
+        "task_dependencies",
+        ["depends_on_id", "task_id"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_task_dependencies_depends_on", table_name="task_dependencies")
+    op.drop_table("task_dependencies")
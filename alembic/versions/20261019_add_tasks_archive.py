@@ -0,0 +1,68 @@
+"""add tasks_archive and subtasks_archive tables
+
+Revision ID: 20261019_add_tasks_archive
+Revises: 20261019_add_change_log
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_tasks_archive"
+down_revision = "20261019_add_change_log"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tasks_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("urgent", sa.Boolean(), nullable=True),
+        sa.Column("important", sa.Boolean(), nullable=True),
+        sa.Column("due_date", sa.Date(), nullable=True),
+        sa.Column("tag", sa.String(), nullable=True),
+        sa.Column("position", sa.Integer(), nullable=True),
+        sa.Column("quadrant", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("recurrence_pattern", sa.String(), nullable=True),
+        sa.Column("recurrence_end_date", sa.Date(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_tasks_archive_completed_at"),
+        "tasks_archive",
+        ["completed_at"],
+        unique=False,
+    )
+    op.create_table(
+        "subtasks_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("position", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["task_id"], ["tasks_archive.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_subtasks_archive_task_id"),
+        "subtasks_archive",
+        ["task_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_subtasks_archive_task_id"), table_name="subtasks_archive")
+    op.drop_table("subtasks_archive")
+    op.drop_index(op.f("ix_tasks_archive_completed_at"), table_name="tasks_archive")
+    op.drop_table("tasks_archive")
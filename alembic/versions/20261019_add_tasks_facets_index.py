@@ -0,0 +1,26 @@
+"""add covering index for list facet counts
+
+Revision ID: 20261019_add_tasks_facets_index
+Revises: 20261019_add_tags
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_tasks_facets_index"
+down_revision = "20261019_add_tags"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_tasks_facets",
+        "tasks",
+        ["quadrant", "status", "urgent", "important", "due_date"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_tasks_facets", table_name="tasks")
@@ -0,0 +1,61 @@
+"""add time tracking: time_entries, task/subtask totals, running timer
+
+Revision ID: 20261019_add_time_tracking
+Revises: 20261019_add_agenda_indexes
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_time_tracking"
+down_revision = "20261019_add_agenda_indexes"
+branch_labels = None
+depends_on = None
+
+TOTALS = ("tasks", "subtasks", "tasks_archive", "subtasks_archive")
+
+
+def upgrade():
+    op.create_table(
+        "time_entries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("subtask_id", sa.Integer(), nullable=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("seconds", sa.Integer(), nullable=False),
+        sa.Column("quadrant", sa.Integer(), nullable=False),
+        sa.Column("tag", sa.String(), nullable=False, server_default=""),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_time_entries_task_day", "time_entries", ["task_id", "day"])
+    op.create_index("ix_time_entries_day", "time_entries", ["day"])
+
+    for table in TOTALS:
+        op.add_column(
+            table,
+            sa.Column("time_spent", sa.Integer(), nullable=False, server_default="0"),
+        )
+    op.add_column("tasks", sa.Column("timer_started_at", sa.DateTime(), nullable=True))
+    op.add_column("tasks", sa.Column("timer_subtask_id", sa.Integer(), nullable=True))
+    op.add_column(
+        "daily_stats",
+        sa.Column("tracked_seconds", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("daily_stats") as batch:
+        batch.drop_column("tracked_seconds")
+    with op.batch_alter_table("tasks") as batch:
+        batch.drop_column("timer_subtask_id")
+        batch.drop_column("timer_started_at")
+    for table in TOTALS:
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("time_spent")
+    op.drop_index("ix_time_entries_day", table_name="time_entries")
+    op.drop_index("ix_time_entries_task_day", table_name="time_entries")
+    op.drop_table("time_entries")
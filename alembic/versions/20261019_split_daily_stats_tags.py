@@ -0,0 +1,70 @@
+"""daily_stats: one rollup row per tag plus an all-tasks row
+
+Rows used to be keyed on the joined `tasks.tag` string ("boulot, perso"),
+so a task with several tags matched no per-tag filter. Each row is now
+counted in the all-tasks row (tag "") and in the row of each of its tags.
+
+Revision ID: 20261019_split_daily_stats_tags
+Revises: 20261019_add_task_dependencies
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20261019_split_daily_stats_tags"
+down_revision = "20261019_add_task_dependencies"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "day, quadrant, tag, created, completed, tracked_seconds"
+
+
+def _parse(tag):
+    # Même règle que crud.parse_tags
+    names = []
+    for part in (tag or "").split(","):
+        name = part.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def upgrade():
+    bind = op.get_bind()
+    totals = {}
+    for day, quadrant, tag, created, completed, tracked in bind.execute(
+        sa.text(f"SELECT {COLUMNS} FROM daily_stats")
+    ):
+        for name in [""] + _parse(tag):
+            row = totals.setdefault((day, quadrant, name), [0, 0, 0])
+            row[0] += created
+            row[1] += completed
+            row[2] += tracked
+    bind.execute(sa.text("DELETE FROM daily_stats"))
+    if totals:
+        bind.execute(
+            sa.text(
+                f"INSERT INTO daily_stats ({COLUMNS}) VALUES "
+                "(:day, :quadrant, :tag, :created, :completed, :tracked)"
+            ),
+            [
+                {
+                    "day": day,
+                    "quadrant": quadrant,
+                    "tag": tag,
+                    "created": c,
+                    "completed": done,
+                    "tracked": tracked,
+                }
+                for (day, quadrant, tag), (c, done, tracked) in totals.items()
+            ],
+        )
+
+
+def downgrade():
+    # Les lignes par tag ne se recombinent pas en chaînes jointes : seules les
+    # lignes "toutes tâches" sont gardées (scripts/backfill_daily_stats.py
+    # reconstruit le détail par tag)
+    op.execute("DELETE FROM daily_stats WHERE tag != ''")
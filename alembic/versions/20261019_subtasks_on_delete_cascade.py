@@ -0,0 +1,38 @@
+"""subtasks.task_id: ON DELETE CASCADE
+
+Revision ID: 20261019_subtasks_on_delete_cascade
+Revises: 20261019_add_tasks_facets_index
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_subtasks_on_delete_cascade"
+down_revision = "20261019_add_tasks_facets_index"
+branch_labels = None
+depends_on = None
+
+# La clé étrangère d'origine n'a pas de nom : la convention lui en donne un
+# pour que le mode batch (recréation de la table) puisse la remplacer.
+NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+FK_NAME = "fk_subtasks_task_id_tasks"
+
+
+def _replace_fk(ondelete):
+    with op.batch_alter_table("subtasks", naming_convention=NAMING) as batch_op:
+        batch_op.drop_constraint(FK_NAME, type_="foreignkey")
+        batch_op.create_foreign_key(
+            FK_NAME, "tasks", ["task_id"], ["id"], ondelete=ondelete
+        )
+
+
+def upgrade():
+    # Les sous-tâches orphelines (tâche supprimée sans clés étrangères
+    # actives) bloqueraient l'activation de PRAGMA foreign_keys
+    op.execute("DELETE FROM subtasks WHERE task_id NOT IN (SELECT id FROM tasks)")
+    _replace_fk("CASCADE")
+
+
+def downgrade():
+    _replace_fk(None)
@@ -0,0 +1,42 @@
+"""tasks.id: AUTOINCREMENT
+
+Without it SQLite hands out max(id) + 1, so archiving or deleting the
+highest task let the next task reuse its id: archiving that task again hit
+the primary key of tasks_archive. The table is rebuilt (batch mode) and the
+sequence starts after the highest live or archived id.
+
+Revision ID: 20261019_tasks_autoincrement
+Revises: 20261019_split_daily_stats_tags
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_tasks_autoincrement"
+down_revision = "20261019_split_daily_stats_tags"
+branch_labels = None
+depends_on = None
+
+
+def _rebuild(autoincrement):
+    with op.batch_alter_table(
+        "tasks",
+        recreate="always",
+        table_kwargs={"sqlite_autoincrement": autoincrement},
+    ):
+        pass
+
+
+def upgrade():
+    _rebuild(True)
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+    op.execute(
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'tasks', COALESCE(MAX(id), 0)"
+        " FROM (SELECT id FROM tasks UNION ALL SELECT id FROM tasks_archive)"
+    )
+
+
+def downgrade():
+    _rebuild(False)
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
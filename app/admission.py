@@ -0,0 +1,243 @@
+"""Admission control: bounded concurrency and load shedding per route group.
+
+Reads (GET/HEAD) and writes (everything else) each get a concurrency limit
+and a bounded wait queue. SQLite has a single writer, so a burst of bulk
+writes otherwise piles up on the write lock until every request times out.
+When a group's queue is full the request fails fast with `503` and a
+`Retry-After` header instead.
+
+Interactive traffic has priority over bulk API traffic. It is woken first
+when a slot frees up, and bulk requests are shed once half of the queue is
+taken. Everything runs on the event loop, so plain counters and futures are
+enough (no lock).
+
+Classification is a best-effort heuristic, not access control:
+
+- HTML pages and forms (any path outside `/api/`) and the drag-and-drop
+  calls are interactive, whatever the method;
+- other `/api/` calls are interactive only when they carry the `UI_COOKIE`
+  marker. The middleware issues it (HttpOnly, SameSite=Strict) on page
+  responses, so the fetch() calls of the app's pages send it back. A client
+  that copies the cookie gets the same priority; browser headers such as
+  `Sec-Fetch-Site` are not trusted, any script can set them.
+
+Set `ADMISSION_UI_TOKEN` to share the marker between several workers
+(otherwise each process draws its own at start-up).
+"""
+
+import asyncio
+import json
+import os
+import re
+import secrets
+from collections import deque
+from typing import Deque, Dict
+
+READ_CONCURRENCY = int(os.environ.get("ADMISSION_READ_CONCURRENCY", "16"))
+READ_QUEUE = int(os.environ.get("ADMISSION_READ_QUEUE", "64"))
+WRITE_CONCURRENCY = int(os.environ.get("ADMISSION_WRITE_CONCURRENCY", "2"))
+WRITE_QUEUE = int(os.environ.get("ADMISSION_WRITE_QUEUE", "32"))
+QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "10"))
+RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", "1"))
+UI_COOKIE = "ui_session"
+UI_TOKEN = os.environ.get("ADMISSION_UI_TOKEN") or secrets.token_urlsafe(16)
+
+INTERACTIVE, BULK = "interactive", "bulk"
+
+# Jamais mis en file : fichiers statiques, supervision, flux SSE (longue durée)
+EXEMPT_PREFIXES = ("/static", "/metrics", "/api/events", "/api/profiles")
+# Appels glisser-déposer des pages Liste / Matrice
+DRAG_AND_DROP = re.compile(
+    r"^/api/tasks/(reorder|\d+/position|\d+/quadrant|\d+/subtasks/reorder)$"
+)
+
+
+class Limiter:
+    """Concurrency limit with a bounded, two-level priority wait queue."""
+
+    def __init__(self, name: str, concurrency: int, queue_size: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self.waiters: Dict[str, Deque[asyncio.Future]] = {
+            INTERACTIVE: deque(),
+            BULK: deque(),
+        }
+        self.shed: Dict[tuple, int] = {}  # (priority, reason) -> count
+
+    def queued(self, priority: str = None) -> int:
+        if priority:
+            return len(self.waiters[priority])
+        return sum(len(q) for q in self.waiters.values())
+
+    def _count_shed(self, priority: str, reason: str) -> None:
+        key = (priority, reason)
+        self.shed[key] = self.shed.get(key, 0) + 1
+
+    async def acquire(self, priority: str, timeout: float) -> bool:
+        """Take a slot, waiting in the queue if needed. False = shed."""
+        if self.in_flight < self.concurrency and not self.queued():
+            self.in_flight += 1
+            return True
+        # Le trafic de masse est délesté dès que la file est à moitié pleine
+        bound = self.queue_size if priority == INTERACTIVE else self.queue_size // 2
+        if self.queued() >= bound:
+            self._count_shed(priority, "queue_full")
+            return False
+
+        fut = asyncio.get_running_loop().create_future()
+        self.waiters[priority].append(fut)
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), timeout)
+            return True  # slot handed over by release()
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled():
+                return True  # granted right at the deadline
+            self._count_shed(priority, "timeout")
+            return False
+        except asyncio.CancelledError:
+            # Client parti pendant l'attente : rendre un créneau déjà attribué
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+        finally:
+            if not fut.done():
+                fut.cancel()
+            if fut in self.waiters[priority]:
+                self.waiters[priority].remove(fut)
+
+    def release(self) -> None:
+        """Free a slot, handing it to the next waiter (interactive first)."""
+        for priority in (INTERACTIVE, BULK):
+            queue = self.waiters[priority]
+            while queue:
+                fut = queue.popleft()
+                if not fut.done():
+                    fut.set_result(None)  # in_flight stays the same
+                    return
+        self.in_flight -= 1
+
+
+def _has_ui_cookie(scope) -> bool:
+    """True when the request carries the marker issued with the pages."""
+    for key, value in scope.get("headers", ()):
+        if key != b"cookie":
+            continue
+        for pair in value.decode("latin-1").split(";"):
+            name, _, token = pair.strip().partition("=")
+            if name == UI_COOKIE and secrets.compare_digest(token, UI_TOKEN):
+                return True
+    return False
+
+
+def classify(scope) -> str:
+    """Priority of a request: interactive (UI) or bulk (API clients)."""
+    path = scope["path"]
+    if not path.startswith("/api/") or DRAG_AND_DROP.match(path):
+        return INTERACTIVE
+    # fetch() des pages de l'app : le navigateur renvoie le cookie émis
+    return INTERACTIVE if _has_ui_cookie(scope) else BULK
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying the read / write limiters."""
+
+    def __init__(
+        self,
+        app,
+        read_concurrency: int = READ_CONCURRENCY,
+        read_queue: int = READ_QUEUE,
+        write_concurrency: int = WRITE_CONCURRENCY,
+        write_queue: int = WRITE_QUEUE,
+        timeout: float = QUEUE_TIMEOUT,
+        retry_after: int = RETRY_AFTER,
+    ):
+        self.app = app
+        self.read = Limiter("read", read_concurrency, read_queue)
+        self.write = Limiter("write", write_concurrency, write_queue)
+        self.timeout = timeout
+        self.retry_after = retry_after
+        limiters["read"], limiters["write"] = self.read, self.write
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.read if scope["method"] in ("GET", "HEAD") else self.write
+        if not await limiter.acquire(classify(scope), self.timeout):
+            await self._reject(send)
+            return
+        if not scope["path"].startswith("/api/") and not _has_ui_cookie(scope):
+            send = _issue_ui_cookie(send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": "Server busy, retry later"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def _issue_ui_cookie(send):
+    """Wrap `send` to set the UI marker cookie on a page response."""
+    cookie = f"{UI_COOKIE}={UI_TOKEN}; Path=/; HttpOnly; SameSite=Strict"
+
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            headers = list(message.get("headers", ()))
+            headers.append((b"set-cookie", cookie.encode("latin-1")))
+            message = dict(message, headers=headers)
+        await send(message)
+
+    return wrapped
+
+
+# Limiteurs de l'instance active du middleware, lus par /metrics
+limiters: Dict[str, Limiter] = {}
+
+
+def render_metrics() -> str:
+    """Queue depth, in-flight and shed counters in the Prometheus format."""
+    lines = [
+        "# HELP admission_in_flight Requests holding an admission slot.",
+        "# TYPE admission_in_flight gauge",
+    ]
+    lines += [
+        f'admission_in_flight{{group="{lim.name}"}} {lim.in_flight}'
+        for lim in limiters.values()
+    ]
+    lines += [
+        "# HELP admission_queue_depth Requests waiting for a slot.",
+        "# TYPE admission_queue_depth gauge",
+    ]
+    for lim in limiters.values():
+        for priority in (INTERACTIVE, BULK):
+            lines.append(
+                f'admission_queue_depth{{group="{lim.name}",priority="{priority}"}}'
+                f" {lim.queued(priority)}"
+            )
+    lines += [
+        "# HELP admission_shed_total Requests rejected with 503.",
+        "# TYPE admission_shed_total counter",
+    ]
+    for lim in limiters.values():
+        for (priority, reason), count in sorted(lim.shed.items()):
+            lines.append(
+                f'admission_shed_total{{group="{lim.name}",priority="{priority}",'
+                f'reason="{reason}"}} {count}'
+            )
+    return "\n".join(lines) + "\n"
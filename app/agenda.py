@@ -0,0 +1,170 @@
+"""Calendar view over due dates: real tasks plus virtual recurrence occurrences.
+
+The open task of a recurring series is its head: completing it materializes
+the next occurrence (`crud._maybe_create_next_occurrence`). Later occurrences
+are computed here, never stored. Expansion jumps straight to the window
+start: the k-th occurrence after the head is derived in constant time instead
+of chaining `_next_due_date` k times from the series origin. Results are
+cached per (range, data version).
+"""
+
+import calendar
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from . import crud, models
+
+AGENDA_CACHE_SIZE = int(os.getenv("AGENDA_CACHE_SIZE", "32"))
+
+# Pas de chaque motif : en jours (daily/weekly) ou en mois (monthly/yearly)
+DAY_STEPS = {"daily": 1, "weekly": 7}
+MONTH_STEPS = {"monthly": 1, "yearly": 12}
+
+_cache_lock = threading.Lock()
+_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+
+_COLUMNS = (
+    models.Task.id,
+    models.Task.title,
+    models.Task.status,
+    models.Task.urgent,
+    models.Task.important,
+    models.Task.quadrant,
+    models.Task.tag,
+    models.Task.due_date,
+    models.Task.recurrence_pattern,
+    models.Task.recurrence_end_date,
+)
+
+
+def _chained_day(origin: date, step: int, k: int) -> int:
+    """Day of month reached after k chained steps of `step` months.
+
+    `crud._add_months` clamps to the end of short months and the chain keeps
+    the clamped day (31 jan -> 28 feb -> 28 mar). The day only shrinks, and
+    any 4 years contain a 28-day February, so at most 48 months are looked at.
+    """
+    day = origin.day
+    for j in range(1, min(k, 48 // step) + 1):
+        if day <= 28:
+            break
+        y, m = divmod(origin.month - 1 + j * step, 12)
+        day = min(day, calendar.monthrange(origin.year + y, m + 1)[1])
+    return day
+
+
+def occurrence(pattern: str, origin: date, k: int) -> date:
+    """Due date of the k-th occurrence after `origin`, identical to k chained
+    `crud._next_due_date` calls."""
+    if pattern in DAY_STEPS:
+        return origin + timedelta(days=DAY_STEPS[pattern] * k)
+    step = MONTH_STEPS[pattern]
+    y, m = divmod(origin.month - 1 + k * step, 12)
+    return date(origin.year + y, m + 1, _chained_day(origin, step, k))
+
+
+def _first_index(pattern: str, origin: date, start: date) -> int:
+    """Smallest k >= 1 whose occurrence falls on or after `start`."""
+    if pattern in DAY_STEPS:
+        step = DAY_STEPS[pattern]
+        return max(1, -(-(start - origin).days // step))
+    months = (start.year - origin.year) * 12 + start.month - origin.month
+    k = months // MONTH_STEPS[pattern]
+    if k < 1:
+        return 1
+    return k if occurrence(pattern, origin, k) >= start else k + 1
+
+
+def expand(
+    pattern: Optional[str],
+    origin: date,
+    start: date,
+    end: date,
+    until: Optional[date] = None,
+) -> Iterator[Tuple[int, date]]:
+    """(k, due date) of the occurrences after `origin` within [start, end],
+    stopping after the series end date `until`."""
+    if pattern not in DAY_STEPS and pattern not in MONTH_STEPS:
+        return
+    last = min(end, until) if until else end
+    k = _first_index(pattern, origin, start)
+    while True:
+        due = occurrence(pattern, origin, k)
+        if due > last:
+            return
+        yield k, due
+        k += 1
+
+
+def _item(row, day: date, k: int) -> dict:
+    return {
+        "day": day,
+        "task_id": row.id,
+        "title": row.title,
+        "status": row.status if k == 0 else "todo",
+        "quadrant": row.quadrant
+        or crud._compute_quadrant_val(row.urgent, row.important),
+        "tag": row.tag,
+        "recurrence_pattern": row.recurrence_pattern,
+        "virtual": k > 0,
+        "occurrence": k,
+    }
+
+
+def build_agenda(db: Session, start: date, end: date) -> list:
+    """Agenda items of [start, end], sorted by day (real tasks first).
+
+    Two indexed queries: tasks due in the range (`ix_tasks_due_date`) and the
+    heads of recurring series (partial index `ix_tasks_recurring`).
+    """
+    T = models.Task
+    items = [
+        _item(row, row.due_date, 0)
+        for row in db.execute(select(*_COLUMNS).where(T.due_date.between(start, end)))
+    ]
+    heads = db.execute(
+        select(*_COLUMNS).where(
+            T.recurrence_pattern.is_not(None),
+            T.status != "done",
+            T.due_date < end,
+            or_(T.recurrence_end_date.is_(None), T.recurrence_end_date >= start),
+        )
+    )
+    for row in heads:
+        for k, due in expand(
+            row.recurrence_pattern, row.due_date, start, end, row.recurrence_end_date
+        ):
+            items.append(_item(row, due, k))
+    items.sort(key=lambda i: (i["day"], i["virtual"], i["task_id"], i["occurrence"]))
+    return items
+
+
+def get_agenda(db: Session, start: date, end: date) -> dict:
+    """Agenda of [start, end], recomputed only when the data version changes."""
+    version = crud.get_data_version(db)
+    key = (version, start, end)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    result = {
+        "start": start,
+        "end": end,
+        "data_version": version,
+        "items": build_agenda(db, start, end),
+    }
+    with _cache_lock:
+        # Les entrées d'une version antérieure ne resserviront plus
+        for stale in [k for k in _cache if k[0] != version]:
+            del _cache[stale]
+        _cache[key] = result
+        while len(_cache) > AGENDA_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
@@ -0,0 +1,45 @@
+"""Scheduled archiver: periodically moves old completed tasks to the archive.
+
+Disabled unless `ARCHIVE_AFTER_DAYS` is set. `scripts/archive_done_tasks.py`
+runs the same job once (cron-friendly).
+"""
+
+import asyncio
+import logging
+import os
+
+from starlette.concurrency import run_in_threadpool
+
+from . import crud
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "0") or 0)
+ARCHIVE_INTERVAL_SECONDS = int(os.environ.get("ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", "500"))
+
+
+def run_once(
+    older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE
+) -> int:
+    """Archive tasks completed more than `older_than_days` ago."""
+    db = SessionLocal()
+    try:
+        return crud.archive_completed_tasks(
+            db, older_than_days=older_than_days, batch_size=batch_size
+        )
+    finally:
+        db.close()
+
+
+async def run_forever() -> None:
+    """Run the archiver every `ARCHIVE_INTERVAL_SECONDS` until cancelled."""
+    while True:
+        try:
+            moved = await run_in_threadpool(run_once)
+            if moved:
+                logger.info("archived %d completed task(s)", moved)
+        except Exception:
+            logger.exception("archiver run failed")
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
@@ -0,0 +1,175 @@
+"""Static asset pipeline: fingerprinted copies, precompression, cache headers.
+
+`scripts/build_static.py` copies every file of `app/static/` to
+`app/static/dist/<name>.<hash>.<ext>` with gzip (and brotli, when the
+optional `brotli` package is installed) siblings, and writes
+`dist/manifest.json`. Templates call `static_url("app.css")`, which returns
+the fingerprinted URL, or the plain `/static/app.css` when no build exists
+(development).
+
+Fingerprinted files never change, so they are served with
+`Cache-Control: immutable` and a one-year max-age. Other static files must
+be revalidated (`no-cache`, ETag).
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles
+
+try:  # dépendance optionnelle
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_URL = "/static"
+DIST = "dist"
+MANIFEST = "manifest.json"
+HASH_LENGTH = 12
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Extensions précompressées (les images le sont déjà)
+COMPRESSIBLE = (".css", ".js", ".svg", ".json", ".html", ".txt", ".map")
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def build(static_dir: str = STATIC_DIR) -> Dict[str, dict]:
+    """Fingerprint and precompress the assets of `static_dir`; return the
+    manifest (`{"app.css": {"path": "dist/app.<hash>.css", "encodings": [...]}}`).
+    """
+    dist_dir = os.path.join(static_dir, DIST)
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir)
+
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_dir]
+        for filename in sorted(files):
+            source = os.path.join(root, filename)
+            name = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+            stem, ext = os.path.splitext(name)
+            hashed = f"{DIST}/{stem}.{digest}{ext}"
+            target = os.path.join(static_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(data)
+
+            encodings = []
+            if ext in COMPRESSIBLE:
+                # mtime=0 : même entrée, même fichier .gz
+                variants = [("gzip", ".gz", gzip.compress(data, 9, mtime=0))]
+                if brotli is not None:
+                    variants.insert(0, ("br", ".br", brotli.compress(data)))
+                for encoding, suffix, compressed in variants:
+                    if len(compressed) < len(data):
+                        with open(target + suffix, "wb") as f:
+                            f.write(compressed)
+                        encodings.append(encoding)
+            manifest[name] = {"path": hashed, "encodings": encodings}
+
+    with open(os.path.join(dist_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_dir: str = STATIC_DIR) -> Dict[str, dict]:
+    try:
+        with open(os.path.join(static_dir, DIST, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+_manifest = load_manifest()
+
+
+def static_url(name: str) -> str:
+    """URL of a static asset: fingerprinted when built, plain otherwise."""
+    entry = _manifest.get(name)
+    if entry is None:
+        return f"{STATIC_URL}/{name}"
+    return f"{STATIC_URL}/{entry['path']}"
+
+
+def reload_manifest(static_dir: str = STATIC_DIR) -> None:
+    global _manifest
+    _manifest = load_manifest(static_dir)
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into `{coding: q}` (q defaults to 1)."""
+    accepted = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0  # valeur invalide : codage ignoré
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def choose_encoding(header: str, available) -> Optional[str]:
+    """Precompressed variant to serve: the available coding with the highest
+    q > 0 (`*` covers unlisted codings, ties go to ENCODINGS order), or None."""
+    accepted = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for encoding, _ in ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if encoding in available and q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class AssetStaticFiles(StaticFiles):
+    """`StaticFiles` serving precompressed variants and cache headers."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encodings = {
+            entry["path"]: entry["encodings"]
+            for entry in load_manifest(str(self.directory)).values()
+        }
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        path = self.get_path(scope).replace(os.sep, "/")
+        available = self.encodings.get(path)
+        if available is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            response.headers.setdefault("cache-control", "no-cache")
+            return response
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(
+            request_headers.get("accept-encoding", ""), available
+        )
+        headers = {"cache-control": IMMUTABLE, "vary": "Accept-Encoding"}
+        if encoding:
+            headers["content-encoding"] = encoding
+            media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+            return FileResponse(
+                str(full_path) + dict(ENCODINGS)[encoding],
+                status_code=status_code,
+                headers=headers,
+                media_type=media_type,
+            )
+        return FileResponse(
+            full_path, status_code=status_code, stat_result=stat_result, headers=headers
+        )
@@ -1,9 +1,37 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import func, case, event, select, union_all, literal, insert, delete
+from sqlalchemy import and_, or_, update, bindparam
 from datetime import datetime, timezone, timedelta, date
 import calendar
-from typing import Optional, List, Dict
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Optional, List, Dict, Iterable, Set, Union
 from . import models, schemas
+from .dependency_graph import DependencyGraph
+from .events import bus
+
+logger = logging.getLogger(__name__)
+
+# Requêtes des chemins chauds construites une seule fois : paramètres liés
+# (bindparam) et clé de cache mémorisée sur l'objet, la compilation SQL est
+# donc réutilisée sans reconstruire ni re-hacher la requête à chaque appel.
+_TASK_BY_ID = select(models.Task).where(models.Task.id == bindparam("task_id"))
+_TASK_EXISTS = select(models.Task.id).where(models.Task.id == bindparam("task_id"))
+_TASK_COUNT = select(func.count(models.Task.id))
+_MAX_TASK_POSITION = select(func.max(models.Task.position))
+_SUBTASK_BY_ID = select(models.Subtask).where(
+    models.Subtask.id == bindparam("subtask_id")
+)
+_SUBTASKS_OF_TASK = (
+    select(models.Subtask)
+    .where(models.Subtask.task_id == bindparam("task_id"))
+    .order_by(models.Subtask.position.asc().nullslast())
+)
+_MAX_SUBTASK_POSITION = select(func.max(models.Subtask.position)).where(
+    models.Subtask.task_id == bindparam("task_id")
+)
 
 
 def _compute_quadrant_val(urgent: bool, important: bool) -> int:
@@ -32,7 +60,7 @@ def create_task(db: Session, task_in: schemas.TaskCreate) -> models.Task:
     # Determine position: use provided value, otherwise set to next available
     provided_position = getattr(task_in, "position", None)
     if provided_position is None:
-        max_pos = db.query(func.max(models.Task.position)).scalar()
+        max_pos = db.scalar(_MAX_TASK_POSITION)
         try:
             next_pos = (int(max_pos) if max_pos is not None else 0) + 1
         except Exception:
@@ -41,13 +69,10 @@ def create_task(db: Session, task_in: schemas.TaskCreate) -> models.Task:
     else:
         position_val = provided_position
 
-    # Normalize tag to lowercase (case-insensitive handling)
-    raw_tag = getattr(task_in, "tag", None)
-    if raw_tag is None:
-        tag_val = None
-    else:
-        t = raw_tag.strip()
-        tag_val = t.lower() if t != "" else None
+    # Tags normalisés (minuscules, sans doublons) ; `tags` prime sur `tag`
+    raw_tags = getattr(task_in, "tags", None)
+    tag_names = parse_tags(raw_tags if raw_tags is not None else task_in.tag)
+    tag_val = ", ".join(tag_names) or None
 
     task = models.Task(
         title=task_in.title,
@@ -63,87 +88,358 @@ def create_task(db: Session, task_in: schemas.TaskCreate) -> models.Task:
         recurrence_end_date=getattr(task_in, "recurrence_end_date", None),
     )
     db.add(task)
+    db.flush()
+    _sync_task_tags(db, task.id, [], None, tag_names, task.status != "done")
+    _bump_daily_stats(db, _utc_day(task.created_at), task, created=1)
+    _record_change(db, "task", task.id, "upsert", obj=task)
     db.commit()
-    db.refresh(task)
     return task
 
 
-def get_tasks(
-    db: Session,
+def _due_bucket_expr(cols, today: date):
+    """Section of the /list page: due-date bucket of todo tasks, "done" for
+    the others (same rules as `compute_due_status` in main.py)."""
+    return case(
+        (cols.status == "done", "done"),
+        (cols.due_date.is_(None), "none"),
+        (cols.due_date < today, "overdue"),
+        (cols.due_date == today, "today"),
+        (cols.due_date <= today + timedelta(days=7), "soon"),
+        else_="later",
+    )
+
+
+def _due_bucket(status: str, due_date: Optional[date], today: date) -> str:
+    """Python twin of `_due_bucket_expr`, for already grouped rows."""
+    if status == "done":
+        return "done"
+    if due_date is None:
+        return "none"
+    if due_date < today:
+        return "overdue"
+    if due_date == today:
+        return "today"
+    return "soon" if due_date <= today + timedelta(days=7) else "later"
+
+
+def _facet_criteria(
+    cols,
     status: Optional[str] = None,
     urgent: Optional[bool] = None,
     important: Optional[bool] = None,
-    q: Optional[str] = None,
-    tag: Optional[str] = None,
-    sort: Optional[str] = None,
-) -> List[models.Task]:
-    """Return a list of tasks filtered by the provided options.
-
-    Filter parameters are optional; `sort` supports 'due_asc', 'due_desc',
-    and 'created_desc' (default).
-    """
-    query = db.query(models.Task)
-
+    due: Optional[str] = None,
+    quadrant: Optional[int] = None,
+    today: Optional[date] = None,
+) -> Dict[str, object]:
+    """WHERE criteria of the filters that are also facets, by facet name."""
+    criteria = {}
     if status:
-        query = query.filter(models.Task.status == status)
+        criteria["status"] = cols.status == status
     if urgent is not None:
-        query = query.filter(models.Task.urgent == urgent)
+        criteria["urgent"] = cols.urgent == urgent
     if important is not None:
-        query = query.filter(models.Task.important == important)
+        criteria["important"] = cols.important == important
+    if due:
+        criteria["due"] = _due_bucket_expr(cols, today or date.today()) == due
+    if quadrant is not None:
+        criteria["quadrant"] = _quadrant_expr(cols) == quadrant
+    return criteria
+
+
+def _search_criteria(
+    cols,
+    q: Optional[str] = None,
+    tag: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    tag_mode: str = "all",
+) -> list:
+    """WHERE criteria of the text search and tag filters."""
+    criteria = []
     if q:
         search_term = f"%{q.lower()}%"
-        query = query.filter(
-            (func.lower(models.Task.title).like(search_term))
-            | (func.lower(models.Task.description).like(search_term))
+        criteria.append(
+            (func.lower(cols.title).like(search_term))
+            | (func.lower(cols.description).like(search_term))
         )
-    if tag:
-        # Case-insensitive comparison: compare lower(tag) == lower(param)
-        query = query.filter(func.lower(models.Task.tag) == tag.lower())
+    names = parse_tags([tag or ""] + list(tags or []))
+    if names:
+        criteria.append(_tag_criterion(cols, names, tag_mode))
+    return criteria
 
+
+def _task_filters(
+    cols,
+    status: Optional[str] = None,
+    urgent: Optional[bool] = None,
+    important: Optional[bool] = None,
+    q: Optional[str] = None,
+    tag: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    tag_mode: str = "all",
+    due: Optional[str] = None,
+    quadrant: Optional[int] = None,
+) -> list:
+    """Build the `get_tasks` WHERE criteria against `cols` (a task model or
+    the columns of a selectable with the same shape)."""
+    facets = _facet_criteria(cols, status, urgent, important, due, quadrant)
+    return list(facets.values()) + _search_criteria(cols, q, tag, tags, tag_mode)
+
+
+def _tag_criterion(cols, names: List[str], mode: str = "all"):
+    """Tasks carrying all (`mode="all"`) or any (`"any"`) of `names`."""
+    if cols is models.Task:
+        # Index tags.name puis ix_task_tags_tag : pas de parcours de tasks
+        matching = (
+            select(models.TaskTag.task_id)
+            .join(models.Tag, models.Tag.id == models.TaskTag.tag_id)
+            .where(models.Tag.name.in_(names))
+        )
+        if mode == "all" and len(names) > 1:
+            matching = matching.group_by(models.TaskTag.task_id).having(
+                func.count() == len(names)
+            )
+        return cols.id.in_(matching)
+    # Archives : seule la colonne `tag` ("a, b") est disponible ; lower() pour
+    # les lignes archivées avant la normalisation des tags
+    stored = func.lower(func.coalesce(cols.tag, ""))
+    padded = literal(",") + func.replace(stored, ", ", ",") + ","
+    tests = [padded.contains(f",{name},", autoescape=True) for name in names]
+    return and_(*tests) if mode == "all" else or_(*tests)
+
+
+def _task_order(cols, sort: Optional[str] = None) -> list:
+    """Build the `get_tasks` ORDER BY clauses against `cols`."""
     sort_key = sort or "created_desc"
     if sort_key == "due_asc":
         # Tâches sans date en premier, puis par date croissante
-        query = query.order_by(
-            models.Task.due_date.is_(None), models.Task.due_date.asc()
-        )
-    elif sort_key == "due_desc":
+        return [cols.due_date.is_(None), cols.due_date.asc()]
+    if sort_key == "due_desc":
         # Tâches avec date en premier, par date décroissante
-        query = query.order_by(models.Task.due_date.desc().nullslast())
-    elif sort_key == "position":
+        return [cols.due_date.desc().nullslast()]
+    if sort_key == "position":
         # Trier par position croissante; les positions NULL restent en fin
-        query = query.order_by(models.Task.position.asc().nullslast())
-    else:  # "created_desc"
-        query = query.order_by(models.Task.created_at.desc())
+        return [cols.position.asc().nullslast()]
+    # "created_desc"
+    return [cols.created_at.desc()]
+
+
+def get_tasks(
+    db: Session,
+    status: Optional[str] = None,
+    urgent: Optional[bool] = None,
+    important: Optional[bool] = None,
+    q: Optional[str] = None,
+    tag: Optional[str] = None,
+    sort: Optional[str] = None,
+    include_archived: bool = False,
+    tags: Optional[List[str]] = None,
+    tag_mode: str = "all",
+    due: Optional[str] = None,
+    quadrant: Optional[int] = None,
+) -> List[models.Task]:
+    """Return a list of tasks filtered by the provided options.
 
-    return query.all()
+    Filter parameters are optional; `sort` supports 'due_asc', 'due_desc',
+    'created_desc' (default) and 'ready' (tasks ready to work on first, then
+    blocked ones in dependency order, then done ones). `tag` / `tags` keep
+    the tasks carrying all of the given tags, or any of them with
+    `tag_mode="any"`. `due` is a /list section (see `LIST_SECTIONS`),
+    `quadrant` 1..4. Archived tasks are only included when
+    `include_archived` is True; they are then returned as read-only rows
+    with an `archived` flag.
+    """
+    filters = dict(
+        status=status,
+        urgent=urgent,
+        important=important,
+        q=q,
+        tag=tag,
+        tags=tags,
+        tag_mode=tag_mode,
+        due=due,
+        quadrant=quadrant,
+    )
+    if not include_archived:
+        tasks = (
+            db.query(models.Task)
+            .filter(*_task_filters(models.Task, **filters))
+            .order_by(*_task_order(models.Task, sort))
+            .all()
+        )
+        return _ready_first(db, tasks) if sort == "ready" else tasks
+
+    cold_table = models.TaskArchive.__table__
+    # colonnes communes : le chrono en cours n'existe que sur `tasks`
+    hot_cols = [c for c in models.Task.__table__.columns if c.name in cold_table.c]
+    cold_cols = [cold_table.c[c.name] for c in hot_cols]
+    union = union_all(
+        select(*hot_cols, literal(False).label("archived")).where(
+            *_task_filters(models.Task, **filters)
+        ),
+        select(*cold_cols, literal(True).label("archived")).where(
+            *_task_filters(models.TaskArchive, **filters)
+        ),
+    ).subquery()
+    rows = db.execute(select(union).order_by(*_task_order(union.c, sort))).all()
+    return _ready_first(db, rows) if sort == "ready" else rows
 
 
 def get_tasks_count(db: Session) -> int:
     """Return total number of tasks as an integer."""
-    return db.query(func.count(models.Task.id)).scalar()
+    return db.scalar(_TASK_COUNT)
+
+
+LIST_SECTIONS = ("overdue", "today", "soon", "later", "none", "done")
+
+
+FACET_VALUES = {
+    "status": ("todo", "done"),
+    "urgent": ("yes", "no"),
+    "important": ("yes", "no"),
+    "due": LIST_SECTIONS,
+    "quadrant": ("q1", "q2", "q3", "q4"),
+}
+
+
+def get_task_facets(
+    db: Session,
+    status: Optional[str] = None,
+    urgent: Optional[bool] = None,
+    important: Optional[bool] = None,
+    due: Optional[str] = None,
+    quadrant: Optional[int] = None,
+    q: Optional[str] = None,
+    tag: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    tag_mode: str = "all",
+    today: Optional[date] = None,
+) -> Dict:
+    """Task counts per facet value (filter chips), in one pass over `tasks`.
+
+    Each facet is counted with every filter but its own, i.e. the number of
+    tasks its chips would yield. Also returns `total` (no filter at all)
+    and `matching` (all filters: what `get_tasks` returns).
+    """
+    today = today or date.today()
+    m = models.Task
+    # GROUP BY sur les colonnes brutes, dans l'ordre de ix_tasks_facets :
+    # parcours de l'index sans tri ; échéance et quadrant dérivés en Python
+    # sur les groupes (quelques milliers au plus, un par date d'échéance).
+    # `quadrant` en tête : aucun filtre ne porte sur la colonne brute, donc
+    # l'index n'est jamais choisi pour un `status = ?` (lookups aléatoires).
+    keys = (m.quadrant, m.status, m.urgent, m.important, m.due_date)
+    rows = (
+        db.query(*keys, func.count())
+        .filter(*_search_criteria(m, q, tag, tags, tag_mode))
+        .group_by(*keys)
+        .all()
+    )
+    wanted = {
+        "status": status or None,
+        "urgent": None if urgent is None else ("yes" if urgent else "no"),
+        "important": None if important is None else ("yes" if important else "no"),
+        "due": due or None,
+        "quadrant": None if quadrant is None else f"q{quadrant}",
+    }
+    facets = {"total": 0, "matching": 0}
+    facets.update({name: dict.fromkeys(FACET_VALUES[name], 0) for name in wanted})
+    for quadrant_val, status_val, urgent_val, important_val, due_date, count in rows:
+        facets["total"] += count
+        if quadrant_val is None:
+            quadrant_val = (
+                (1 if important_val else 3)
+                if urgent_val
+                else (2 if important_val else 4)
+            )
+        values = {
+            "status": status_val,
+            "urgent": "yes" if urgent_val else "no",
+            "important": "yes" if important_val else "no",
+            "due": _due_bucket(status_val, due_date, today),
+            "quadrant": f"q{quadrant_val}",
+        }
+        failed = [n for n, v in values.items() if wanted[n] not in (None, v)]
+        if not failed:
+            facets["matching"] += count
+        # Compté dans une facette si seul son propre filtre l'exclut
+        for name, value in values.items():
+            if failed in ([], [name]) and value in facets[name]:
+                facets[name][value] += count
+    if q or tag or tags:
+        # la recherche réduit les groupes : total sans aucun filtre à part
+        facets["total"] = get_tasks_count(db)
+    return facets
+
+
+def task_matches(db: Session, task_id: int, **filters) -> bool:
+    """Whether a task passes the `get_tasks` filters."""
+    return (
+        db.query(models.Task.id)
+        .filter(models.Task.id == task_id, *_task_filters(models.Task, **filters))
+        .first()
+        is not None
+    )
 
 
 def get_task(db: Session, task_id: int) -> Optional[models.Task]:
     """Retrieve one task by id or return None if not found."""
-    return db.query(models.Task).filter(models.Task.id == task_id).first()
+    return db.scalars(_TASK_BY_ID, {"task_id": task_id}).first()
+
+
+def get_task_details(
+    db: Session, task_ids: List[int], with_subtasks: bool = True
+) -> List[models.Task]:
+    """Tasks by id, in the order of `task_ids` (unknown ids are skipped).
+
+    With `with_subtasks`, `task.subtasks` is loaded for all of them by one
+    extra `IN` query (selectinload), ordered by position.
+    """
+    stmt = select(models.Task).where(models.Task.id.in_(task_ids))
+    if with_subtasks:
+        stmt = stmt.options(selectinload(models.Task.subtasks))
+    by_id = {t.id: t for t in db.scalars(stmt)}
+    return [by_id[i] for i in dict.fromkeys(task_ids) if i in by_id]
+
 
+def task_exists(db: Session, task_id: int) -> bool:
+    """Whether a task exists, without loading it (Core primary-key lookup)."""
+    return db.scalar(_TASK_EXISTS, {"task_id": task_id}) is not None
 
-def get_general_stats(db: Session) -> Dict[str, int]:
-    """Return general statistics: total tasks and number done."""
+
+def get_general_stats(db: Session, include_archived: bool = False) -> Dict[str, int]:
+    """Return general statistics: total tasks and number done.
+
+    With `include_archived`, archived (always done) tasks are counted too.
+    """
     result = db.query(
         func.count(models.Task.id).label("total"),
         func.sum(case((models.Task.status == "done", 1), else_=0)).label("done"),
     ).one()
-    return {"total": result.total or 0, "done": result.done or 0}
-
-
-def get_completed_since_count(db: Session, since: datetime) -> int:
+    total = result.total or 0
+    done = result.done or 0
+    if include_archived:
+        archived = db.query(func.count(models.TaskArchive.id)).scalar() or 0
+        total += archived
+        done += archived
+    return {"total": total, "done": done}
+
+
+def get_completed_since_count(
+    db: Session, since: datetime, include_archived: bool = False
+) -> int:
     """Count tasks completed since the given datetime."""
-    return (
+    count = (
         db.query(func.count(models.Task.id))
         .filter(models.Task.status == "done", models.Task.completed_at >= since)
         .scalar()
     )
+    if include_archived:
+        count += (
+            db.query(func.count(models.TaskArchive.id))
+            .filter(models.TaskArchive.completed_at >= since)
+            .scalar()
+        )
+    return count
 
 
 def update_task(
@@ -151,26 +447,31 @@ def update_task(
 ) -> Optional[models.Task]:
     """Apply partial updates from `TaskUpdate` to a task and return it.
 
-    Returns None if the task does not exist.
+    Returns None if the task does not exist. The task is read once: its
+    previous status and tags drive the rollup and tag counter deltas.
     """
     task = get_task(db, task_id)
     if not task:
         return None
 
     prev_status = task.status
+    prev_tags = task.tags
+    # Ligne du cumul incrémentée à la complétion : à décrémenter si rouverte
+    completed_key = SimpleNamespace(
+        quadrant=task.quadrant,
+        urgent=task.urgent,
+        important=task.important,
+        tag=task.tag,
+    )
 
     dumped = task_in.model_dump(exclude_unset=True)
     for field, value in dumped.items():
-        # Normalize tag on update as well
-        if field == "tag":
-            if value is None:
-                norm = None
-            else:
-                s = str(value).strip()
-                norm = s.lower() if s != "" else None
-            setattr(task, field, norm)
-        else:
-            setattr(task, field, value)
+        if field in ("tag", "tags"):
+            continue  # normalized below
+        setattr(task, field, value)
+    if "tags" in dumped or "tag" in dumped:
+        raw = dumped["tags"] if "tags" in dumped else dumped["tag"]
+        task.tag = ", ".join(parse_tags(raw)) or None
 
     # If quadrant was not provided explicitly, recompute it from flags
     if "quadrant" not in dumped:
@@ -184,28 +485,59 @@ def update_task(
     if task.status == "done" and task.completed_at is None:
         task.completed_at = datetime.now(timezone.utc)
 
+    # Rollup quotidien : une transition de statut = un incrément
+    if prev_status != "done" and task.status == "done":
+        _bump_daily_stats(db, _utc_day(task.completed_at), task, completed=1)
+    elif prev_status == "done" and task.status != "done" and task.completed_at:
+        _bump_daily_stats(db, _utc_day(task.completed_at), completed_key, completed=-1)
+    elif task.status == "done" and task.completed_at:
+        _move_completion(db, _utc_day(task.completed_at), completed_key, task)
+
+    _sync_task_tags(
+        db, task.id, prev_tags, prev_status != "done", task.tags, task.status != "done"
+    )
+    _record_change(db, "task", task.id, "upsert", obj=task)
+
     # Handle recurrence: on transition to done, create next occurrence
     if prev_status != "done" and task.status == "done":
         _maybe_create_next_occurrence(db, task)
 
     db.commit()
-    db.refresh(task)
     return task
 
 
+def _update_returning(db: Session, model, row_id: int, values: dict, *criteria):
+    """`UPDATE ... RETURNING` of one row by id: a single statement, the ORM
+    object comes back loaded with the new values. None if no row matched."""
+    stmt = (
+        update(model)
+        .where(model.id == row_id, *criteria)
+        .values(**values)
+        .returning(model)
+        # un objet déjà chargé dans la session reprend les valeurs renvoyées
+        .execution_options(populate_existing=True)
+    )
+    return db.scalars(stmt).first()
+
+
 def set_task_position(
     db: Session, task_id: int, position: Optional[int]
 ) -> Optional[models.Task]:
     """Set the `position` of a single task. Returns the updated task or None if not found."""
-    task = get_task(db, task_id)
+    task = _update_returning(
+        db,
+        models.Task,
+        task_id,
+        {
+            # Allow nullable positions
+            "position": int(position) if position is not None else None,
+            "updated_at": datetime.now(timezone.utc),
+        },
+    )
     if not task:
         return None
-
-    # Allow nullable positions
-    task.position = int(position) if position is not None else None
-    task.updated_at = datetime.now(timezone.utc)
+    _record_change(db, "task", task.id, "upsert", obj=task)
     db.commit()
-    db.refresh(task)
     return task
 
 
@@ -222,126 +554,151 @@ def set_task_quadrant(
 
     Accepts None to clear quadrant (does not change flags in that case).
     """
-    task = get_task(db, task_id)
-    if not task:
-        return None
-
-    if quadrant is None:
-        task.quadrant = None
-    else:
+    values = {"quadrant": None, "updated_at": datetime.now(timezone.utc)}
+    if quadrant is not None:
         try:
             q = int(quadrant)
         except Exception:
             return None
-        task.quadrant = q
+        values["quadrant"] = q
         # Update flags based on quadrant
-        if q == 1:
-            task.urgent = True
-            task.important = True
-        elif q == 2:
-            task.urgent = False
-            task.important = True
-        elif q == 3:
-            task.urgent = True
-            task.important = False
-        else:
-            task.urgent = False
-            task.important = False
-
-    task.updated_at = datetime.now(timezone.utc)
-    # If marking done state not changed here
+        values["urgent"] = q in (1, 3)
+        values["important"] = q in (1, 2)
+
+    T = models.Task
+    task = _update_returning(db, T, task_id, values, T.status.is_distinct_from("done"))
+    if task is None:
+        # Tâche terminée (ou absente) : lue avant la mise à jour, sa
+        # complétion change de ligne dans le cumul quotidien
+        before = db.execute(
+            select(T.quadrant, T.urgent, T.important, T.tag, T.completed_at).where(
+                T.id == task_id
+            )
+        ).first()
+        if before is None:
+            return None
+        task = _update_returning(db, T, task_id, values)
+        if before.completed_at:
+            _move_completion(db, _utc_day(before.completed_at), before, task)
+    _record_change(db, "task", task.id, "upsert", obj=task)
     db.commit()
-    db.refresh(task)
     return task
 
 
+def _positions_by_id(items: list) -> Dict[int, Optional[int]]:
+    """{id: position} from reorder items (objects or dicts with `id` and
+    `position`); the last item wins for a repeated id."""
+    positions = {}
+    for it in items:
+        if isinstance(it, dict):
+            item_id, pos = it.get("id"), it.get("position")
+        else:
+            item_id, pos = it.id, it.position
+        positions[int(item_id)] = int(pos) if pos is not None else None
+    return positions
+
+
 def set_positions_bulk(db: Session, items: list) -> list:
     """Set positions for multiple tasks in a single transaction.
 
     `items` is an iterable of objects with attributes `id` and `position`.
-    Returns the list of updated Task objects.
+    One `UPDATE ... SET position = CASE id ... RETURNING` and one multi-row
+    change log insert, whatever the number of items; unknown ids are
+    skipped. Returns the updated Task objects, in the order of `items`.
     """
-    if not items:
+    positions = _positions_by_id(items)
+    if not positions:
         return []
-
-    ids = [
-        int(getattr(it, "id", it["id"])) if isinstance(it, dict) else int(it.id)
-        for it in items
-    ]
-    # Fetch existing tasks
-    tasks = db.query(models.Task).filter(models.Task.id.in_(ids)).all()
-    task_map = {t.id: t for t in tasks}
-
-    updated = []
-    now = datetime.now(timezone.utc)
-    for it in items:
-        if isinstance(it, dict):
-            tid = int(it.get("id"))
-            pos = it.get("position")
-        else:
-            tid = int(it.id)
-            pos = it.position
-
-        task = task_map.get(tid)
-        if not task:
-            continue
-        task.position = int(pos) if pos is not None else None
-        task.updated_at = now
-        updated.append(task)
-
+    tasks = db.scalars(
+        update(models.Task)
+        .where(models.Task.id.in_(positions))
+        .values(
+            position=case(positions, value=models.Task.id),
+            updated_at=datetime.now(timezone.utc),
+        )
+        .returning(models.Task)
+        .execution_options(populate_existing=True)
+    ).all()
+    by_id = {t.id: t for t in tasks}
+    updated = [by_id[tid] for tid in positions if tid in by_id]
+    _record_changes(db, "task", "upsert", [(t.id, None, t) for t in updated])
     db.commit()
-    # refresh updated tasks
-    for t in updated:
-        db.refresh(t)
-
     return updated
 
 
 def delete_task(db: Session, task_id: int) -> Optional[bool]:
-    """Delete a task by id. Returns True if deleted, None if not found."""
-    task = get_task(db, task_id)
-    if not task:
+    """Delete a task by id. Returns True if deleted, None if not found.
+
+    One `DELETE ... RETURNING` statement; subtasks and tag links go with the
+    task through `ON DELETE CASCADE`. Time entries have no foreign key (they
+    outlive archiving) and are deleted explicitly; the `daily_stats` rollup
+    keeps the time, like it keeps the creation count.
+    """
+    row = db.execute(
+        delete(models.Task)
+        .where(models.Task.id == task_id)
+        .returning(models.Task.tag, models.Task.status)
+    ).first()
+    if row is None:
         return None
+    db.execute(delete(models.TimeEntry).where(models.TimeEntry.task_id == task_id))
 
-    db.delete(task)
+    # Compteurs des tags (les liens eux-mêmes sont déjà partis en cascade)
+    _sync_task_tags(db, task_id, parse_tags(row.tag), row.status != "done", [], None)
+    # A task tombstone implies its subtasks are gone as well
+    _record_change(db, "task", task_id, "delete")
     db.commit()
     return True
 
 
-def get_eisenhower_stats(db: Session, status: Optional[str] = None) -> Dict[str, int]:
+def get_eisenhower_stats(
+    db: Session, status: Optional[str] = None, include_archived: bool = False
+) -> Dict[str, int]:
     """Return counts per Eisenhower quadrant (q1..q4).
 
-    Uses explicit boolean comparisons for cross-database clarity.
+    Uses explicit boolean comparisons for cross-database clarity. With
+    `include_archived`, archived tasks are added to the counts.
     """
+    models_to_count = [models.Task]
+    if include_archived:
+        models_to_count.append(models.TaskArchive)
+    counts = {"q1": 0, "q2": 0, "q3": 0, "q4": 0}
+    for model in models_to_count:
+        for key, value in _eisenhower_counts(db, model, status).items():
+            counts[key] += value
+    return counts
+
+
+def _eisenhower_counts(db: Session, model, status: Optional[str]) -> Dict[str, int]:
     query = db.query(
         func.sum(
             case(
-                ((models.Task.urgent) & (models.Task.important), 1),
+                ((model.urgent) & (model.important), 1),
                 else_=0,
             )
         ).label("q1"),
         func.sum(
             case(
-                ((~models.Task.urgent) & (models.Task.important), 1),
+                ((~model.urgent) & (model.important), 1),
                 else_=0,
             )
         ).label("q2"),
         func.sum(
             case(
-                ((models.Task.urgent) & (~models.Task.important), 1),
+                ((model.urgent) & (~model.important), 1),
                 else_=0,
             )
         ).label("q3"),
         func.sum(
             case(
-                (((~models.Task.urgent) & (~models.Task.important)), 1),
+                (((~model.urgent) & (~model.important)), 1),
                 else_=0,
             )
         ).label("q4"),
     )
 
     if status:
-        query = query.filter(models.Task.status == status)
+        query = query.filter(model.status == status)
 
     stats = query.one()
 
@@ -353,6 +710,176 @@ def get_eisenhower_stats(db: Session, status: Optional[str] = None) -> Dict[str,
     }
 
 
+# ===== Tags =====
+
+
+def parse_tags(value: Union[str, Iterable[str], None]) -> List[str]:
+    """Tag names from a comma-separated string or a list of them: stripped,
+    lowercased, without duplicates (first occurrence order)."""
+    if value is None:
+        return []
+    if not isinstance(value, str):
+        value = ",".join(value)
+    names = []
+    for part in value.split(","):
+        name = part.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def _tag_ids(db: Session, names: List[str]) -> Dict[str, int]:
+    """Ids of the tags `names`, creating the missing ones."""
+    db.execute(
+        sqlite_insert(models.Tag)
+        .values([{"name": name} for name in names])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    rows = db.execute(
+        select(models.Tag.name, models.Tag.id).where(models.Tag.name.in_(names))
+    )
+    return dict(rows.all())
+
+
+def _sync_task_tags(
+    db: Session,
+    task_id: int,
+    old_names: List[str],
+    was_open: Optional[bool],
+    new_names: List[str],
+    is_open: Optional[bool],
+) -> None:
+    """Update `task_tags` and the tag counters for one task mutation.
+
+    `old_names` / `was_open` describe the task before the mutation,
+    `new_names` / `is_open` after it (`[]` / None when it did not or no
+    longer exists). Only the differences are written.
+    """
+    deltas: Dict[str, list] = {}  # name -> [task_count, open_count]
+    for name in old_names:
+        delta = deltas.setdefault(name, [0, 0])
+        delta[0] -= 1
+        delta[1] -= int(bool(was_open))
+    for name in new_names:
+        delta = deltas.setdefault(name, [0, 0])
+        delta[0] += 1
+        delta[1] += int(bool(is_open))
+
+    removed = [n for n in old_names if n not in new_names]
+    added = [n for n in new_names if n not in old_names]
+    if removed:
+        db.execute(
+            delete(models.TaskTag).where(
+                models.TaskTag.task_id == task_id,
+                models.TaskTag.tag_id.in_(
+                    select(models.Tag.id).where(models.Tag.name.in_(removed))
+                ),
+            )
+        )
+    if added:
+        ids = _tag_ids(db, added)
+        db.execute(
+            insert(models.TaskTag),
+            [{"task_id": task_id, "tag_id": ids[name]} for name in added],
+        )
+
+    # Une requête par delta distinct (en général une seule)
+    by_delta: Dict[tuple, list] = {}
+    for name, delta in deltas.items():
+        if delta != [0, 0]:
+            by_delta.setdefault(tuple(delta), []).append(name)
+    for (total, opened), names in by_delta.items():
+        db.execute(
+            update(models.Tag)
+            .where(models.Tag.name.in_(names))
+            .values(
+                task_count=models.Tag.task_count + total,
+                open_count=models.Tag.open_count + opened,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _unlink_tags(db: Session, task_ids: List[int]) -> None:
+    """Drop the tag links of (done) tasks leaving `tasks` in bulk."""
+    counts = (
+        db.query(models.TaskTag.tag_id, func.count())
+        .filter(models.TaskTag.task_id.in_(task_ids))
+        .group_by(models.TaskTag.tag_id)
+        .all()
+    )
+    for tag_id, count in counts:
+        db.execute(
+            update(models.Tag)
+            .where(models.Tag.id == tag_id)
+            .values(task_count=models.Tag.task_count - count)
+            .execution_options(synchronize_session=False)
+        )
+    db.execute(delete(models.TaskTag).where(models.TaskTag.task_id.in_(task_ids)))
+
+
+def get_tags(
+    db: Session, prefix: Optional[str] = None, include_empty: bool = False
+) -> List[models.Tag]:
+    """Tags with their counters, most used first (facet list).
+
+    `prefix` is matched as a range on the unique `name` index.
+    """
+    # Compteurs modifiés en SQL pur : recharger les objets déjà en session
+    query = db.query(models.Tag).populate_existing()
+    if prefix:
+        prefix = prefix.strip().lower()
+        query = query.filter(
+            models.Tag.name >= prefix, models.Tag.name < prefix + "\U0010ffff"
+        )
+    if not include_empty:
+        query = query.filter(models.Tag.task_count > 0)
+    return query.order_by(models.Tag.task_count.desc(), models.Tag.name).all()
+
+
+def rebuild_tags(db: Session) -> int:
+    """Recompute `tags`, `task_tags` and the tag counters from `tasks.tag`
+    in bulk (backfill / repair). Returns the number of links written."""
+    tag_ids: Dict[str, int] = {}
+    counts: Dict[str, list] = {}
+    links, retag = [], []
+    rows = db.query(models.Task.id, models.Task.tag, models.Task.status).filter(
+        models.Task.tag.isnot(None)
+    )
+    for task_id, tag, status in rows.all():
+        names = parse_tags(tag)
+        normalized = ", ".join(names) or None
+        if normalized != tag:
+            retag.append({"id": task_id, "tag": normalized})
+        for name in names:
+            tag_id = tag_ids.setdefault(name, len(tag_ids) + 1)
+            count = counts.setdefault(name, [0, 0])
+            count[0] += 1
+            count[1] += int(status != "done")
+            links.append({"task_id": task_id, "tag_id": tag_id})
+
+    db.query(models.TaskTag).delete()
+    db.query(models.Tag).delete()
+    if tag_ids:
+        db.execute(
+            insert(models.Tag),
+            [
+                {
+                    "id": i,
+                    "name": n,
+                    "task_count": counts[n][0],
+                    "open_count": counts[n][1],
+                }
+                for n, i in tag_ids.items()
+            ],
+        )
+        db.execute(insert(models.TaskTag), links)
+    if retag:
+        db.execute(update(models.Task), retag)  # mise à jour groupée par clé primaire
+    db.commit()
+    return len(links)
+
+
 # ===== v0.5: Subtasks CRUD =====
 
 
@@ -360,18 +887,13 @@ def create_subtask(
     db: Session, task_id: int, subtask_in: schemas.SubtaskCreate
 ) -> Optional[models.Subtask]:
     """Create a subtask for a task. Returns the new subtask or None if parent task not found."""
-    parent = get_task(db, task_id)
-    if not parent:
+    if not task_exists(db, task_id):
         return None
 
     # Determine position: use provided or set to next available
     provided_position = getattr(subtask_in, "position", None)
     if provided_position is None:
-        max_pos = (
-            db.query(func.max(models.Subtask.position))
-            .filter(models.Subtask.task_id == task_id)
-            .scalar()
-        )
+        max_pos = db.scalar(_MAX_SUBTASK_POSITION, {"task_id": task_id})
         try:
             next_pos = (int(max_pos) if max_pos is not None else 0) + 1
         except Exception:
@@ -387,54 +909,141 @@ def create_subtask(
         position=position_val,
     )
     db.add(subtask)
+    db.flush()
+    _record_change(db, "subtask", subtask.id, "upsert", task_id=task_id, obj=subtask)
     db.commit()
-    db.refresh(subtask)
     return subtask
 
 
 def get_subtasks(db: Session, task_id: int) -> List[models.Subtask]:
     """Return all subtasks for a task, ordered by position."""
-    return (
-        db.query(models.Subtask)
-        .filter(models.Subtask.task_id == task_id)
-        .order_by(models.Subtask.position.asc().nullslast())
-        .all()
-    )
+    return db.scalars(_SUBTASKS_OF_TASK, {"task_id": task_id}).all()
 
 
 def get_subtask(db: Session, subtask_id: int) -> Optional[models.Subtask]:
     """Get a single subtask by ID."""
-    return db.query(models.Subtask).filter(models.Subtask.id == subtask_id).first()
+    return db.scalars(_SUBTASK_BY_ID, {"subtask_id": subtask_id}).first()
 
 
 def update_subtask(
-    db: Session, subtask_id: int, subtask_in: schemas.SubtaskUpdate
+    db: Session,
+    subtask_id: int,
+    subtask_in: schemas.SubtaskUpdate,
+    task_id: Optional[int] = None,
 ) -> Optional[models.Subtask]:
-    """Update a subtask. Returns the updated subtask or None if not found."""
-    subtask = get_subtask(db, subtask_id)
+    """Update a subtask. Returns the updated subtask or None if not found
+    (or, with `task_id`, if it belongs to another task)."""
+    scope = [] if task_id is None else [models.Subtask.task_id == task_id]
+    dumped = subtask_in.model_dump(exclude_unset=True)
+    if dumped:
+        subtask = _update_returning(db, models.Subtask, subtask_id, dumped, *scope)
+    else:
+        subtask = db.scalars(
+            select(models.Subtask).where(models.Subtask.id == subtask_id, *scope)
+        ).first()
     if not subtask:
         return None
 
-    dumped = subtask_in.model_dump(exclude_unset=True)
-    for field, value in dumped.items():
-        setattr(subtask, field, value)
-
+    _record_change(
+        db, "subtask", subtask.id, "upsert", task_id=subtask.task_id, obj=subtask
+    )
     db.commit()
-    db.refresh(subtask)
     return subtask
 
 
-def delete_subtask(db: Session, subtask_id: int) -> Optional[bool]:
-    """Delete a subtask. Returns True if deleted, None if not found."""
-    subtask = get_subtask(db, subtask_id)
-    if not subtask:
+def delete_subtask(
+    db: Session, subtask_id: int, task_id: Optional[int] = None
+) -> Optional[bool]:
+    """Delete a subtask. Returns True if deleted, None if not found (or,
+    with `task_id`, if it belongs to another task)."""
+    stmt = delete(models.Subtask).where(models.Subtask.id == subtask_id)
+    if task_id is not None:
+        stmt = stmt.where(models.Subtask.task_id == task_id)
+    row = db.execute(stmt.returning(models.Subtask.task_id)).first()
+    if row is None:
         return None
 
-    db.delete(subtask)
+    _record_change(db, "subtask", subtask_id, "delete", task_id=row.task_id)
     db.commit()
     return True
 
 
+def create_subtasks(
+    db: Session, task_id: int, items: List[schemas.SubtaskCreate]
+) -> Optional[List[models.Subtask]]:
+    """Create several subtasks of a task in one transaction.
+
+    Items without a position get a contiguous block after the current last
+    one (a single `max(position)` lookup). The rows are written by one
+    multi-row `INSERT ... RETURNING`. None if the parent task does not exist.
+    """
+    if not task_exists(db, task_id):
+        return None
+    if not items:
+        return []
+
+    next_pos = None
+    if any(item.position is None for item in items):
+        max_pos = db.scalar(_MAX_SUBTASK_POSITION, {"task_id": task_id})
+        next_pos = (int(max_pos) if max_pos is not None else 0) + 1
+    rows = []
+    for item in items:
+        position = item.position
+        if position is None:
+            position, next_pos = next_pos, next_pos + 1
+        rows.append(
+            {
+                "task_id": task_id,
+                "title": item.title,
+                "status": item.status,
+                "position": position,
+            }
+        )
+    # RETURNING sans ordre garanti : les ids croissants suivent l'insertion
+    subtasks = sorted(
+        db.scalars(insert(models.Subtask).returning(models.Subtask), rows),
+        key=lambda s: s.id,
+    )
+    _record_changes(db, "subtask", "upsert", [(s.id, task_id, s) for s in subtasks])
+    db.commit()
+    return subtasks
+
+
+def set_subtasks_status(
+    db: Session, task_id: int, status: str, ids: Optional[List[int]] = None
+) -> List[models.Subtask]:
+    """Set the status of all subtasks of a task (or of `ids` among them) in
+    one `UPDATE ... RETURNING`. Subtasks already in `status` are left alone;
+    returns the changed ones."""
+    criteria = [models.Subtask.task_id == task_id, models.Subtask.status != status]
+    if ids is not None:
+        criteria.append(models.Subtask.id.in_(ids))
+    subtasks = db.scalars(
+        update(models.Subtask)
+        .where(*criteria)
+        .values(status=status)
+        .returning(models.Subtask)
+    ).all()
+    _record_changes(db, "subtask", "upsert", [(s.id, task_id, s) for s in subtasks])
+    db.commit()
+    return subtasks
+
+
+def delete_done_subtasks(db: Session, task_id: int) -> List[int]:
+    """Delete the completed subtasks of a task in one `DELETE ... RETURNING`.
+
+    Returns the ids of the deleted subtasks.
+    """
+    ids = db.scalars(
+        delete(models.Subtask)
+        .where(models.Subtask.task_id == task_id, models.Subtask.status == "done")
+        .returning(models.Subtask.id)
+    ).all()
+    _record_changes(db, "subtask", "delete", [(i, task_id, None) for i in ids])
+    db.commit()
+    return ids
+
+
 # ===== Helpers: recurrence and subtask reordering =====
 
 
@@ -464,18 +1073,24 @@ def _next_due_date(
     return None
 
 
+def next_occurrence_date(task) -> Optional[date]:
+    """Due date of the occurrence following `task` in its recurring series,
+    or None (not recurring, or past the series end date)."""
+    nd = _next_due_date(task.recurrence_pattern, task.due_date)
+    if nd is None:
+        return None
+    # Respect end date
+    if task.recurrence_end_date and nd > task.recurrence_end_date:
+        return None
+    return nd
+
+
 def _maybe_create_next_occurrence(
     db: Session, completed: models.Task
 ) -> Optional[models.Task]:
-    pattern = completed.recurrence_pattern
-    if not pattern:
-        return None
-    nd = _next_due_date(pattern, completed.due_date)
+    nd = next_occurrence_date(completed)
     if nd is None:
         return None
-    # Respect end date
-    if completed.recurrence_end_date and nd > completed.recurrence_end_date:
-        return None
 
     # Create the next occurrence copying most fields
     create_in = schemas.TaskCreate(
@@ -499,33 +1114,999 @@ def set_subtask_positions_bulk(db: Session, task_id: int, items: list) -> list:
     """Set positions for multiple subtasks belonging to a task.
 
     Items is a list of objects/dicts with `id` and `position`.
-    Only subtasks with matching task_id are updated.
+    Only subtasks with matching task_id are updated, in one
+    `UPDATE ... RETURNING` (see `set_positions_bulk`).
     """
-    if not items:
+    positions = _positions_by_id(items)
+    if not positions:
         return []
+    subtasks = db.scalars(
+        update(models.Subtask)
+        .where(models.Subtask.id.in_(positions), models.Subtask.task_id == task_id)
+        .values(position=case(positions, value=models.Subtask.id))
+        .returning(models.Subtask)
+        .execution_options(populate_existing=True)
+    ).all()
+    by_id = {s.id: s for s in subtasks}
+    updated = [by_id[sid] for sid in positions if sid in by_id]
+    _record_changes(db, "subtask", "upsert", [(s.id, task_id, s) for s in updated])
+    db.commit()
+    return updated
 
-    ids = [
-        int(getattr(it, "id", it["id"])) if isinstance(it, dict) else int(it.id)
-        for it in items
-    ]
-    subtasks = db.query(models.Subtask).filter(models.Subtask.id.in_(ids)).all()
-    sub_map = {s.id: s for s in subtasks}
 
-    updated = []
-    for it in items:
-        if isinstance(it, dict):
-            sid = int(it.get("id"))
-            pos = it.get("position")
-        else:
-            sid = int(it.id)
-            pos = it.position
-        s = sub_map.get(sid)
-        if not s or s.task_id != task_id:
+# ===== Daily stats rollup =====
+
+
+def _utc_day(dt: Optional[datetime]) -> date:
+    """Return the UTC calendar day of `dt` (naive values are taken as UTC)."""
+    if dt is None:
+        return datetime.now(timezone.utc).date()
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.date()
+
+
+_DAILY_STATS_UPSERT = sqlite_insert(models.DailyStat).values(
+    day=bindparam("day"),
+    quadrant=bindparam("quadrant"),
+    tag=bindparam("tag"),
+    created=bindparam("created"),
+    completed=bindparam("completed"),
+)
+_DAILY_STATS_UPSERT = _DAILY_STATS_UPSERT.on_conflict_do_update(
+    index_elements=["day", "quadrant", "tag"],
+    set_={
+        "created": models.DailyStat.created + _DAILY_STATS_UPSERT.excluded.created,
+        "completed": models.DailyStat.completed
+        + _DAILY_STATS_UPSERT.excluded.completed,
+    },
+)
+
+
+def _rollup_tags(tag: Optional[str]) -> List[str]:
+    """Rollup rows a task counts in: "" (all tasks) and each of its tags."""
+    return [""] + parse_tags(tag)
+
+
+def _bump_daily_stats(
+    db: Session, day: date, task, created: int = 0, completed: int = 0
+) -> None:
+    """Add `created`/`completed` to the rollup rows of `task` for `day`.
+
+    Single upsert statement (one parameter set per rollup tag), part of the
+    caller's transaction.
+    """
+    quadrant = task.quadrant or _compute_quadrant_val(task.urgent, task.important)
+    db.execute(
+        _DAILY_STATS_UPSERT,
+        [
+            {
+                "day": day,
+                "quadrant": quadrant,
+                "tag": tag,
+                "created": created,
+                "completed": completed,
+            }
+            for tag in _rollup_tags(task.tag)
+        ],
+    )
+
+
+def _move_completion(db: Session, day: date, before, after) -> None:
+    """A done task changed quadrant or tags: move its completion from the
+    rollup rows it was counted in (`before`) to its current ones."""
+
+    def rows(task):
+        quadrant = task.quadrant or _compute_quadrant_val(task.urgent, task.important)
+        return quadrant, _rollup_tags(task.tag)
+
+    if rows(before) != rows(after):
+        _bump_daily_stats(db, day, before, completed=-1)
+        _bump_daily_stats(db, day, after, completed=1)
+
+
+def _quadrant_expr(model):
+    """SQL expression for a task's quadrant, derived from flags when unset."""
+    return func.coalesce(
+        model.quadrant,
+        case(
+            ((model.urgent) & (model.important), 1),
+            ((~model.urgent) & (model.important), 2),
+            ((model.urgent) & (~model.important), 3),
+            else_=4,
+        ),
+    )
+
+
+def rebuild_daily_stats(db: Session) -> int:
+    """Recompute `daily_stats` from `tasks`, `tasks_archive` and
+    `time_entries` (backfill).
+
+    Returns the number of rollup rows written.
+    """
+    totals: Dict[tuple, list] = {}
+    for model in (models.Task, models.TaskArchive):
+        quadrant = _quadrant_expr(model)
+        tag = func.coalesce(model.tag, "")
+        for column, slot in ((model.created_at, 0), (model.completed_at, 1)):
+            day = func.date(column)
+            query = db.query(day, quadrant, tag, func.count()).filter(
+                column.isnot(None)
+            )
+            if slot == 1:
+                query = query.filter(model.status == "done")
+            for d, q, t, count in query.group_by(day, quadrant, tag):
+                for name in _rollup_tags(t):
+                    key = (date.fromisoformat(d), q, name)
+                    totals.setdefault(key, [0, 0, 0])[slot] += count
+    E = models.TimeEntry
+    tracked = db.query(E.day, E.quadrant, E.tag, func.sum(E.seconds)).group_by(
+        E.day, E.quadrant, E.tag
+    )
+    for d, q, t, seconds in tracked:
+        for name in _rollup_tags(t):
+            totals.setdefault((d, q, name), [0, 0, 0])[2] += seconds or 0
+
+    db.query(models.DailyStat).delete()
+    db.add_all(
+        models.DailyStat(
+            day=day,
+            quadrant=quadrant,
+            tag=tag,
+            created=c,
+            completed=done,
+            tracked_seconds=seconds,
+        )
+        for (day, quadrant, tag), (c, done, seconds) in totals.items()
+    )
+    db.commit()
+    return len(totals)
+
+
+def _bucket_start(d: date, bucket: str) -> date:
+    if bucket == "week":
+        return d - timedelta(days=d.weekday())  # lundi
+    if bucket == "month":
+        return d.replace(day=1)
+    return d
+
+
+def _next_bucket(d: date, bucket: str) -> date:
+    if bucket == "week":
+        return d + timedelta(weeks=1)
+    if bucket == "month":
+        return _add_months(d, 1)
+    return d + timedelta(days=1)
+
+
+def get_stats_timeseries(
+    db: Session,
+    start: date,
+    end: date,
+    bucket: str = "day",
+    quadrant: Optional[int] = None,
+    tag: Optional[str] = None,
+) -> List[Dict]:
+    """Return created/completed counts and tracked time per bucket between
+    `start` and `end`.
+
+    Reads only the `daily_stats` rows of the range, so the cost does not
+    depend on the number of tasks. `bucket` is 'day', 'week' (starting
+    Monday) or 'month'; empty buckets are returned with zero counts.
+    """
+    query = db.query(
+        models.DailyStat.day,
+        func.sum(models.DailyStat.created),
+        func.sum(models.DailyStat.completed),
+        func.sum(models.DailyStat.tracked_seconds),
+    ).filter(models.DailyStat.day >= start, models.DailyStat.day <= end)
+    if quadrant is not None:
+        query = query.filter(models.DailyStat.quadrant == quadrant)
+    # Lignes "" : toutes les tâches ; une tâche compte aussi dans chacun de
+    # ses tags, les lignes par tag ne s'additionnent donc pas entre elles
+    tag = tag.strip().lower() if tag else ""
+    query = query.filter(models.DailyStat.tag == tag)
+
+    points: Dict[date, Dict] = {}
+    cursor = _bucket_start(start, bucket)
+    while cursor <= end:
+        points[cursor] = {
+            "start": cursor,
+            "created": 0,
+            "completed": 0,
+            "tracked_seconds": 0,
+        }
+        cursor = _next_bucket(cursor, bucket)
+
+    rows = query.group_by(models.DailyStat.day)
+    for day, created, completed, tracked in rows:
+        point = points[_bucket_start(day, bucket)]
+        point["created"] += created or 0
+        point["completed"] += completed or 0
+        point["tracked_seconds"] += tracked or 0
+    return list(points.values())
+
+
+# ===== Time tracking =====
+
+_SUBTASK_OF_TASK = select(models.Subtask.id).where(
+    models.Subtask.id == bindparam("subtask_id"),
+    models.Subtask.task_id == bindparam("task_id"),
+)
+_TIMER_STATE = select(models.Task.timer_started_at, models.Task.timer_subtask_id).where(
+    models.Task.id == bindparam("task_id")
+)
+_TRACKED_TIME_UPSERT = sqlite_insert(models.DailyStat).values(
+    day=bindparam("day"),
+    quadrant=bindparam("quadrant"),
+    tag=bindparam("tag"),
+    created=0,
+    completed=0,
+    tracked_seconds=bindparam("seconds"),
+)
+_TRACKED_TIME_UPSERT = _TRACKED_TIME_UPSERT.on_conflict_do_update(
+    index_elements=["day", "quadrant", "tag"],
+    set_={
+        "tracked_seconds": models.DailyStat.tracked_seconds
+        + _TRACKED_TIME_UPSERT.excluded.tracked_seconds
+    },
+)
+
+
+def _subtask_of_task(db: Session, task_id: int, subtask_id: int) -> bool:
+    params = {"subtask_id": subtask_id, "task_id": task_id}
+    return db.scalar(_SUBTASK_OF_TASK, params) is not None
+
+
+def _log_time(
+    db: Session,
+    task: models.Task,
+    seconds: int,
+    day: date,
+    subtask_id: Optional[int] = None,
+    started_at: Optional[datetime] = None,
+    source: str = "manual",
+) -> models.TimeEntry:
+    """Append a time entry, add it to the subtask total and to the daily
+    rollup. The caller has already added it to the task total."""
+    quadrant = task.quadrant or _compute_quadrant_val(task.urgent, task.important)
+    entry = db.scalars(
+        insert(models.TimeEntry)
+        .values(
+            task_id=task.id,
+            subtask_id=subtask_id,
+            day=day,
+            started_at=started_at,
+            seconds=seconds,
+            quadrant=quadrant,
+            tag=task.tag or "",
+            source=source,
+        )
+        .returning(models.TimeEntry)
+    ).one()
+    if subtask_id is not None:
+        subtask = _update_returning(
+            db,
+            models.Subtask,
+            subtask_id,
+            {"time_spent": models.Subtask.time_spent + seconds},
+        )
+        if subtask is not None:  # supprimée pendant que le chrono tournait
+            _record_change(
+                db, "subtask", subtask.id, "upsert", task_id=task.id, obj=subtask
+            )
+    db.execute(
+        _TRACKED_TIME_UPSERT,
+        [
+            {"day": day, "quadrant": quadrant, "tag": tag, "seconds": seconds}
+            for tag in _rollup_tags(task.tag)
+        ],
+    )
+    return entry
+
+
+def start_timer(
+    db: Session, task_id: int, subtask_id: Optional[int] = None
+) -> Optional[models.Task]:
+    """Start the timer of a task (on one of its subtasks with `subtask_id`).
+
+    A single `UPDATE ... RETURNING` when the timer is idle; starting a running
+    timer changes nothing. None if the task (or subtask) is not found.
+    """
+    if subtask_id is not None and not _subtask_of_task(db, task_id, subtask_id):
+        return None
+    task = _update_returning(
+        db,
+        models.Task,
+        task_id,
+        {
+            "timer_started_at": datetime.now(timezone.utc),
+            "timer_subtask_id": subtask_id,
+        },
+        models.Task.timer_started_at.is_(None),
+    )
+    if task is None:
+        return get_task(db, task_id)  # introuvable, ou chrono déjà lancé
+    _record_change(db, "task", task.id, "upsert", obj=task)
+    db.commit()
+    return task
+
+
+def stop_timer(db: Session, task_id: int) -> Optional[models.Task]:
+    """Stop the timer of a task and log the elapsed time.
+
+    The seconds go to an append-only time entry, the task (and subtask)
+    totals and the daily rollup, in one transaction; a zero-second run only
+    clears the timer. Stopping an idle timer changes nothing. None if the
+    task is not found.
+    """
+    state = db.execute(_TIMER_STATE, {"task_id": task_id}).first()
+    if state is None:
+        return None
+    started, subtask_id = state
+    if started is None:
+        return get_task(db, task_id)
+    started_utc = started if started.tzinfo else started.replace(tzinfo=timezone.utc)
+    seconds = max(int((datetime.now(timezone.utc) - started_utc).total_seconds()), 0)
+    task = _update_returning(
+        db,
+        models.Task,
+        task_id,
+        {
+            "timer_started_at": None,
+            "timer_subtask_id": None,
+            "time_spent": models.Task.time_spent + seconds,
+        },
+        # arrêt concurrent : un seul des deux ajoute le temps
+        models.Task.timer_started_at == started,
+    )
+    if task is None:
+        return get_task(db, task_id)
+    if seconds:
+        _log_time(
+            db,
+            task,
+            seconds,
+            _utc_day(started_utc),
+            subtask_id,
+            started_at=started,
+            source="timer",
+        )
+    _record_change(db, "task", task.id, "upsert", obj=task)
+    db.commit()
+    return task
+
+
+def add_time_entry(
+    db: Session, task_id: int, entry_in: schemas.TimeEntryCreate
+) -> Optional[models.TimeEntry]:
+    """Log time spent on a task (or one of its subtasks) by hand.
+
+    Returns the entry, or None if the task (or subtask) is not found.
+    """
+    subtask_id = entry_in.subtask_id
+    if subtask_id is not None and not _subtask_of_task(db, task_id, subtask_id):
+        return None
+    task = _update_returning(
+        db,
+        models.Task,
+        task_id,
+        {"time_spent": models.Task.time_spent + entry_in.seconds},
+    )
+    if task is None:
+        return None
+    entry = _log_time(
+        db, task, entry_in.seconds, entry_in.day or _utc_day(None), subtask_id
+    )
+    _record_change(db, "task", task.id, "upsert", obj=task)
+    db.commit()
+    return entry
+
+
+def get_time_entries(
+    db: Session, task_id: int, limit: int = 100
+) -> List[models.TimeEntry]:
+    """Latest time entries of a task, newest first."""
+    return db.scalars(
+        select(models.TimeEntry)
+        .where(models.TimeEntry.task_id == task_id)
+        .order_by(models.TimeEntry.id.desc())
+        .limit(limit)
+    ).all()
+
+
+def get_tracked_time(db: Session, start: date, end: date) -> Dict[str, int]:
+    """Tracked seconds per quadrant (q1..q4) between `start` and `end`,
+    from the `daily_stats` rollup."""
+    totals = {f"q{q}": 0 for q in range(1, 5)}
+    rows = (
+        db.query(models.DailyStat.quadrant, func.sum(models.DailyStat.tracked_seconds))
+        .filter(
+            models.DailyStat.day >= start,
+            models.DailyStat.day <= end,
+            models.DailyStat.tag == "",
+        )
+        .group_by(models.DailyStat.quadrant)
+    )
+    for quadrant, seconds in rows:
+        totals[f"q{quadrant}"] = seconds or 0
+    return totals
+
+
+# ===== Task dependencies =====
+
+# Au-delà, relire toutes les arêtes coûte moins que les requêtes IN
+DEPENDENCY_INCREMENTAL_MAX_TASKS = 1000
+
+
+class DependencyCycleError(ValueError):
+    """The dependency would close a cycle; `path` lists the task ids in
+    "blocks" order, first and last being the same task."""
+
+    def __init__(self, path: List[int]):
+        self.path = path
+        super().__init__("Dependency cycle: " + " -> ".join(map(str, path)))
+
+
+class _DependencyCache:
+    def __init__(self):
+        # Réentrant : les mutations relisent le graphe avant de relâcher
+        self.lock = threading.RLock()
+        self.version: Optional[int] = None
+        self.graph = DependencyGraph()
+
+
+_dependencies = _DependencyCache()
+
+_TD = models.TaskDependency
+_DEPENDENCY_NODES = select(_TD.task_id).union(select(_TD.depends_on_id))
+
+
+def _load_dependency_graph(db: Session) -> DependencyGraph:
+    edges = db.execute(select(_TD.task_id, _TD.depends_on_id)).all()
+    open_ids = db.scalars(
+        select(models.Task.id).where(
+            models.Task.status != "done", models.Task.id.in_(_DEPENDENCY_NODES)
+        )
+    )
+    return DependencyGraph.build(edges, open_ids)
+
+
+def _refresh_dependency_graph(db: Session, graph: DependencyGraph, since: int) -> bool:
+    """Apply the task changes logged after `since` to `graph`: new status
+    and current blockers of each changed task. False when the change log
+    cannot tell (compacted past `since`) or too many tasks changed."""
+    ids = _changed_task_ids(db, since, DEPENDENCY_INCREMENTAL_MAX_TASKS)
+    if ids is None:
+        return False
+    if not ids:
+        return True
+    # Chaque ajout / retrait d'arête journalise la tâche bloquée
+    blockers: Dict[int, Set[int]] = {task_id: set() for task_id in ids}
+    for task_id, blocker in db.execute(
+        select(_TD.task_id, _TD.depends_on_id).where(_TD.task_id.in_(ids))
+    ):
+        blockers[task_id].add(blocker)
+    touched = set(ids).union(*blockers.values())
+    status = dict(
+        db.execute(
+            select(models.Task.id, models.Task.status).where(
+                models.Task.id.in_(touched)
+            )
+        ).all()
+    )
+    open_ids = {task_id for task_id, st in status.items() if st != "done"}
+    for task_id in ids:
+        if task_id not in status:  # supprimée ou archivée
+            graph.remove_node(task_id)
             continue
-        s.position = int(pos) if pos is not None else None
-        updated.append(s)
+        graph.set_open(task_id, task_id in open_ids)
+        for edge in graph.set_blockers(task_id, blockers[task_id], open_ids):
+            # Écritures concurrentes hors de ce processus : l'arête est ignorée
+            logger.warning("dependency %d -> %d would close a cycle", *edge)
+    return True
+
+
+def _dependency_graph(db: Session) -> DependencyGraph:
+    """The cached graph at the current data version, updated from the
+    change log when possible. The caller holds `_dependencies.lock`."""
+    version = get_data_version(db)
+    cache = _dependencies
+    if cache.version == version:
+        return cache.graph
+    if (
+        cache.version is None
+        or cache.version > version
+        or not (_refresh_dependency_graph(db, cache.graph, cache.version))
+    ):
+        cache.graph = _load_dependency_graph(db)
+    cache.version = version
+    return cache.graph
+
+
+def _ready_first(db: Session, tasks: list) -> list:
+    """`sort=ready`: open tasks with no open blocker (in the query order),
+    then the blocked ones in topological order, then the done ones."""
+    with _dependencies.lock:
+        graph = _dependency_graph(db)
+
+        def key(task):
+            if task.status == "done":
+                return (2, 0)
+            if graph.is_blocked(task.id):
+                return (1, graph.rank[task.id])
+            return (0, 0)
+
+        return sorted(tasks, key=key)
+
+
+def get_blocked_task_ids(db: Session, task_ids: Iterable[int]) -> Set[int]:
+    """The ids among `task_ids` that wait for a task not done yet."""
+    with _dependencies.lock:
+        graph = _dependency_graph(db)
+        return {task_id for task_id in task_ids if graph.is_blocked(task_id)}
+
+
+def get_task_dependencies(db: Session, task_id: int) -> Optional[Dict]:
+    """Blockers and dependents of a task, None if the task is not found."""
+    if not task_exists(db, task_id):
+        return None
+    with _dependencies.lock:
+        graph = _dependency_graph(db)
+        return {
+            "task_id": task_id,
+            "blocked_by": sorted(graph.blockers.get(task_id, ())),
+            "blocking": sorted(graph.dependents.get(task_id, ())),
+            "blocked": graph.is_blocked(task_id),
+        }
+
+
+def add_task_dependency(
+    db: Session, task_id: int, depends_on_id: int
+) -> Optional[Dict]:
+    """Record that `task_id` is blocked by `depends_on_id`.
+
+    The cycle check runs on the cached graph (only the tasks ranked between
+    the two ends are visited) and raises `DependencyCycleError`. Adding an
+    existing edge changes nothing. Returns the dependencies of `task_id`, or
+    None if either task is not found.
+    """
+    found = db.scalars(
+        select(models.Task.id).where(models.Task.id.in_({task_id, depends_on_id}))
+    ).all()
+    if len(found) != len({task_id, depends_on_id}):
+        return None
+    # Verrou tenu jusqu'au commit : deux ajouts concurrents ne peuvent pas
+    # refermer un cycle à eux deux
+    with _dependencies.lock:
+        graph = _dependency_graph(db)
+        cycle = graph.find_cycle(task_id, depends_on_id)
+        if cycle is not None:
+            raise DependencyCycleError(cycle)
+        if depends_on_id not in graph.blockers.get(task_id, ()):
+            db.execute(
+                sqlite_insert(_TD)
+                .values(task_id=task_id, depends_on_id=depends_on_id)
+                .on_conflict_do_nothing()
+            )
+            _touch_blocked_task(db, task_id)
+        return get_task_dependencies(db, task_id)
+
+
+def remove_task_dependency(
+    db: Session, task_id: int, depends_on_id: int
+) -> Optional[Dict]:
+    """Remove a dependency; returns the dependencies of `task_id`, or None
+    if there was no such dependency."""
+    removed = db.execute(
+        delete(_TD)
+        .where(_TD.task_id == task_id, _TD.depends_on_id == depends_on_id)
+        .returning(_TD.task_id)
+    ).first()
+    if removed is None:
+        return None
+    _touch_blocked_task(db, task_id)
+    return get_task_dependencies(db, task_id)
+
 
+def _touch_blocked_task(db: Session, task_id: int) -> None:
+    """Log the blocked task as changed (the graph cache and the clients
+    pick the new edge up from the change feed) and commit."""
+    task = _update_returning(
+        db, models.Task, task_id, {"updated_at": datetime.now(timezone.utc)}
+    )
+    _record_change(db, "task", task_id, "upsert", obj=task)
     db.commit()
-    for s in updated:
-        db.refresh(s)
-    return updated
+
+
+# ===== Archive (hot/cold split) =====
+
+
+def _open_chain_ends(db: Session, tasks: List[models.Task]) -> Set[int]:
+    """Ids of the `tasks` that are the last hot occurrence of an unfinished
+    series.
+
+    Occurrences are linked by construction: the next one copies the pattern
+    and end date with `due_date = next_occurrence_date(...)`, and may itself
+    be archived already. The title is not compared (an occurrence may be
+    renamed). One query for the whole batch, over both tables.
+    """
+    wanted = {}
+    for task in tasks:
+        nd = next_occurrence_date(task)
+        if nd is not None:  # series ended: nothing left to continue
+            wanted[task.id] = (task.recurrence_pattern, nd, task.recurrence_end_date)
+    if not wanted:
+        return set()
+    due_dates = {key[1] for key in wanted.values()}
+    found = {
+        tuple(row)
+        for row in db.execute(
+            union_all(
+                *(
+                    select(
+                        model.recurrence_pattern,
+                        model.due_date,
+                        model.recurrence_end_date,
+                    ).where(
+                        model.recurrence_pattern.is_not(None),
+                        model.due_date.in_(due_dates),
+                    )
+                    for model in (models.Task, models.TaskArchive)
+                )
+            )
+        )
+    }
+    return {task_id for task_id, key in wanted.items() if key not in found}
+
+
+def archive_completed_tasks(
+    db: Session, older_than_days: int = 30, batch_size: int = 500
+) -> int:
+    """Move tasks completed more than `older_than_days` ago to the archive.
+
+    Runs in batches of `batch_size`, one transaction per batch; subtasks
+    move with their task. The last hot occurrence of an unfinished recurring
+    series is kept so the chain can still continue. Archived tasks leave the
+    hot set, so a delete tombstone is written to the change log for each.
+    Returns the number of archived tasks.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    # Colonnes communes (le chrono en cours ne part pas à l'archive)
+    archive_cols = models.TaskArchive.__table__.c
+    task_cols = [
+        c.name for c in models.Task.__table__.columns if c.name in archive_cols
+    ]
+    sub_cols = [c.name for c in models.Subtask.__table__.columns]
+    archived = 0
+    last_id = 0
+
+    while True:
+        candidates = (
+            db.query(models.Task)
+            .filter(
+                models.Task.status == "done",
+                models.Task.completed_at < cutoff,
+                models.Task.id > last_id,
+            )
+            .order_by(models.Task.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not candidates:
+            break
+        last_id = candidates[-1].id
+        chain_ends = _open_chain_ends(db, candidates)
+        ids = [t.id for t in candidates if t.id not in chain_ends]
+        if not ids:
+            continue
+
+        now = datetime.now(timezone.utc)
+        db.execute(
+            insert(models.TaskArchive).from_select(
+                task_cols + ["archived_at"],
+                select(
+                    *[models.Task.__table__.c[c] for c in task_cols],
+                    literal(now, type_=models.TaskArchive.archived_at.type),
+                ).where(models.Task.id.in_(ids)),
+            )
+        )
+        db.execute(
+            insert(models.SubtaskArchive).from_select(
+                sub_cols,
+                select(*[models.Subtask.__table__.c[c] for c in sub_cols]).where(
+                    models.Subtask.task_id.in_(ids)
+                ),
+            )
+        )
+        # Tags anciens non normalisés ("Work") : même forme que les tâches
+        # actives, pour que le filtre par tag trouve aussi les archives
+        renamed = []
+        for t in candidates:
+            tag = ", ".join(parse_tags(t.tag)) or None
+            if t.id not in chain_ends and t.tag != tag:
+                renamed.append({"archived_id": t.id, "tag": tag})
+        if renamed:
+            db.execute(
+                update(models.TaskArchive.__table__)
+                .where(archive_cols.id == bindparam("archived_id"))
+                .values(tag=bindparam("tag")),
+                renamed,
+            )
+        db.execute(delete(models.Subtask).where(models.Subtask.task_id.in_(ids)))
+        db.execute(
+            delete(models.TaskDependency).where(
+                or_(
+                    models.TaskDependency.task_id.in_(ids),
+                    models.TaskDependency.depends_on_id.in_(ids),
+                )
+            )
+        )
+        _unlink_tags(db, ids)  # tâches terminées : seul task_count baisse
+        db.execute(delete(models.Task).where(models.Task.id.in_(ids)))
+        for task_id in ids:
+            _record_change(db, "task", task_id, "delete")
+        db.commit()
+        archived += len(ids)
+
+    return archived
+
+
+# ===== Change feed (delta sync) =====
+
+
+def _record_change(
+    db: Session,
+    entity: str,
+    entity_id: int,
+    op: str,
+    task_id: Optional[int] = None,
+    obj=None,
+) -> None:
+    """Append a change log entry to the current transaction.
+
+    Must be called before `db.commit()` so the entry lands atomically with
+    the mutation it describes. `obj` (the upserted row) is serialized at
+    flush time and published on the event bus once the transaction commits.
+    """
+    change = models.Change(entity=entity, entity_id=entity_id, op=op, task_id=task_id)
+    db.add(change)
+    db.info.setdefault("pending_changes", []).append((change, obj))
+
+
+def _record_changes(db: Session, entity: str, op: str, rows: list) -> None:
+    """Bulk `_record_change`: `rows` are (entity_id, task_id, obj) tuples.
+
+    One multi-row `INSERT ... RETURNING` instead of one ORM insert per entry
+    (the flush cannot batch them: each needs its `seq` back). The bus
+    events are queued right away, the objects being already loaded.
+    """
+    if not rows:
+        return
+    now = datetime.now(timezone.utc)
+    seqs = dict(
+        db.execute(
+            insert(models.Change).returning(models.Change.entity_id, models.Change.seq),
+            [
+                {
+                    "entity": entity,
+                    "entity_id": entity_id,
+                    "task_id": task_id,
+                    "op": op,
+                    "created_at": now,
+                }
+                for entity_id, task_id, _ in rows
+            ],
+        ).all()
+    )
+    events = db.info.setdefault("pending_events", [])
+    for entity_id, task_id, obj in rows:
+        events.append(
+            _change_event(seqs[entity_id], entity, entity_id, task_id, op, obj)
+        )
+
+
+_OUT_SCHEMAS = {"task": schemas.TaskOut, "subtask": schemas.SubtaskOut}
+
+
+def _change_event(seq, entity, entity_id, task_id, op, obj) -> dict:
+    """Bus event of a change entry; upserts carry the serialized row."""
+    data = None
+    if obj is not None and op == "upsert":
+        data = _OUT_SCHEMAS[entity].model_validate(obj).model_dump(mode="json")
+    return {
+        "seq": seq,
+        "entity": entity,
+        "id": entity_id,
+        "task_id": task_id,
+        "op": op,
+        "data": data,
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _serialize_pending_changes(session, flush_context):
+    """Turn flushed change entries into bus events (objects are still loaded)."""
+    pending = session.info.pop("pending_changes", None)
+    if not pending:
+        return
+    events = session.info.setdefault("pending_events", [])
+    for change, obj in pending:
+        events.append(
+            _change_event(
+                change.seq,
+                change.entity,
+                change.entity_id,
+                change.task_id,
+                change.op,
+                obj,
+            )
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session):
+    for evt in session.info.pop("pending_events", ()):
+        bus.publish(evt)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_events(session, previous_transaction):
+    session.info.pop("pending_changes", None)
+    session.info.pop("pending_events", None)
+
+
+_DATA_VERSION = select(func.max(models.Change.seq))
+_CHANGE_HORIZON = select(func.min(models.ChangeConsumer.last_seq))
+
+
+def get_data_version(db: Session) -> int:
+    """Return the current data version (highest change sequence, 0 if none)."""
+    return db.scalar(_DATA_VERSION) or 0
+
+
+def _get_change_horizon(db: Session) -> Optional[int]:
+    """Return the lowest sequence acknowledged by every consumer, or None."""
+    return db.scalar(_CHANGE_HORIZON)
+
+
+def _changed_task_ids(db: Session, since: int, limit: int) -> Optional[List[int]]:
+    """Ids of the tasks named in the change log after `since`, for caches
+    kept in step with the log. None when the log cannot tell (compacted past
+    `since`) or more than `limit` tasks changed: the caller rebuilds."""
+    horizon = _get_change_horizon(db)
+    if horizon is not None and since < horizon:
+        return None
+    C = models.Change
+    ids = db.scalars(
+        select(C.entity_id)
+        .where(C.seq > since, C.entity == "task")
+        .distinct()
+        .limit(limit + 1)
+    ).all()
+    return ids if len(ids) <= limit else None
+
+
+def get_changes(db: Session, since: int = 0, limit: int = 1000) -> Dict:
+    """Return the net changes after `since`: one entry per entity.
+
+    Only the latest entry of each entity is returned, joined to the current
+    row for upserts. An upsert whose row no longer exists is reported as a
+    delete. When `since` predates the compaction horizon, tombstones may have
+    been compacted away: `reset` is then True and a full snapshot (as for
+    `since=0`) is returned.
+    """
+    since = max(int(since or 0), 0)
+    reset = False
+    horizon = _get_change_horizon(db)
+    if since and horizon is not None and since < horizon:
+        reset = True
+        since = 0
+
+    latest = (
+        db.query(func.max(models.Change.seq).label("seq"))
+        .filter(models.Change.seq > since)
+        .group_by(models.Change.entity, models.Change.entity_id)
+        .subquery()
+    )
+    rows = (
+        db.query(models.Change)
+        .join(latest, models.Change.seq == latest.c.seq)
+        .order_by(models.Change.seq.asc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    task_ids = [c.entity_id for c in rows if c.entity == "task" and c.op == "upsert"]
+    sub_ids = [c.entity_id for c in rows if c.entity == "subtask" and c.op == "upsert"]
+    task_map = {}
+    if task_ids:
+        task_map = {
+            t.id: t
+            for t in db.query(models.Task).filter(models.Task.id.in_(task_ids)).all()
+        }
+    sub_map = {}
+    if sub_ids:
+        sub_map = {
+            s.id: s
+            for s in db.query(models.Subtask)
+            .filter(models.Subtask.id.in_(sub_ids))
+            .all()
+        }
+
+    changes = []
+    for c in rows:
+        item = {
+            "seq": c.seq,
+            "entity": c.entity,
+            "id": c.entity_id,
+            "task_id": c.task_id,
+            "op": c.op,
+            "task": None,
+            "subtask": None,
+        }
+        if c.op == "upsert":
+            obj = (task_map if c.entity == "task" else sub_map).get(c.entity_id)
+            if obj is None:
+                item["op"] = "delete"
+            else:
+                item[c.entity] = obj
+        changes.append(item)
+
+    if has_more:
+        last_seq = rows[-1].seq
+    else:
+        last_seq = max(get_data_version(db), since)
+
+    return {
+        "since": since,
+        "last_seq": last_seq,
+        "reset": reset,
+        "has_more": has_more,
+        "changes": changes,
+    }
+
+
+def ack_changes(db: Session, consumer: str, seq: int) -> models.ChangeConsumer:
+    """Record that `consumer` has applied every change up to `seq`.
+
+    Acknowledgements only move forward.
+    """
+    row = db.get(models.ChangeConsumer, consumer)
+    if row is None:
+        row = models.ChangeConsumer(name=consumer, last_seq=int(seq))
+        db.add(row)
+    elif int(seq) > (row.last_seq or 0):
+        row.last_seq = int(seq)
+    row.updated_at = datetime.now(timezone.utc)
+    db.commit()
+    return row
+
+
+def compact_changes(db: Session) -> int:
+    """Compact the change log up to the lowest acknowledged sequence.
+
+    Drops superseded entries, tombstones and entries of subtasks whose parent
+    is gone. The newest entry is always kept so the data version never goes
+    backwards. Returns the number of deleted entries; nothing is compacted
+    until at least one consumer is registered.
+    """
+    horizon = _get_change_horizon(db)
+    if not horizon:
+        return 0
+    head = get_data_version(db)
+    horizon = min(horizon, head - 1)
+
+    C = models.Change
+    latest_seqs = db.query(func.max(C.seq)).group_by(C.entity, C.entity_id)
+    base = db.query(C).filter(C.seq <= horizon)
+
+    deleted = base.filter(C.seq.not_in(latest_seqs)).delete(synchronize_session=False)
+    deleted += base.filter(C.op == "delete").delete(synchronize_session=False)
+    deleted += base.filter(
+        C.entity == "subtask", C.task_id.not_in(db.query(models.Task.id))
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -1,6 +1,15 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Dict, Optional
+import json
+import logging
 import os
+import re
+import sys
+import time
 
 # Création du dossier data/ si pas déjà présent
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,11 +25,37 @@ engine = create_engine(
     connect_args={"check_same_thread": False},  # requis pour SQLite en mode local
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False : les objets renvoyés par crud après commit servent
+# directement à la réponse, sans SELECT de rechargement.
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
 
 Base = declarative_base()
 
 
+def _enable_foreign_keys(dbapi_conn, _record):
+    # SQLite n'applique les clés étrangères (et ON DELETE CASCADE) que si
+    # la connexion le demande
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA foreign_keys=ON")
+    cur.close()
+
+
+def enable_foreign_keys(target) -> None:
+    """Enforce foreign keys on every new connection of `target` (an Engine).
+
+    Needed for `subtasks` / `task_tags` rows to follow their task through
+    `ON DELETE CASCADE`. Not set on the migration engine: batch migrations
+    recreate tables, which must not cascade.
+    """
+    if not event.contains(target, "connect", _enable_foreign_keys):
+        event.listen(target, "connect", _enable_foreign_keys)
+
+
+enable_foreign_keys(engine)
+
+
 # Dépendance pour FastAPI : ouvre une session DB par requête
 def get_db():
     db = SessionLocal()
@@ -28,3 +63,179 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ----- Instrumentation SQL par requête -----
+
+# Listes de paramètres "IN (?, ?, ...)" ramenées à une seule forme
+_IN_LIST = re.compile(r"IN \(\?(?:,\s*\?)+\)")
+
+
+class QueryStats:
+    """Queries run on behalf of one request (see `track_queries`).
+
+    `shapes` counts statements by normalized SQL and is only filled when
+    `track_shapes` is set (repeated-statement / N+1 detection).
+    """
+
+    def __init__(self, track_shapes: bool = False):
+        self.count = 0
+        self.duration = 0.0  # seconds
+        self.track_shapes = track_shapes
+        self.shapes: Dict[str, int] = {}
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statement shapes executed more than `threshold` times."""
+        return {sql: n for sql, n in self.shapes.items() if n > threshold}
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+def track_queries(track_shapes: bool = False) -> QueryStats:
+    """Start collecting the queries of the current context and return the stats.
+
+    The object is shared by reference, so queries run in threads spawned with
+    a copy of the context (FastAPI's threadpool) are counted too.
+    """
+    stats = QueryStats(track_shapes)
+    _current_stats.set(stats)
+    return stats
+
+
+def normalize_sql(statement: str) -> str:
+    """Statement shape: IN lists collapsed, whitespace squeezed."""
+    return " ".join(_IN_LIST.sub("IN (?)", statement).split())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None or _slow_threshold:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+        if stats.track_shapes:
+            shape = _IN_LIST.sub("IN (?)", statement)
+            stats.shapes[shape] = stats.shapes.get(shape, 0) + 1
+    if _slow_threshold and elapsed >= _slow_threshold:
+        _log_slow_query(conn, statement, parameters, executemany, elapsed)
+
+
+def _handle_error(context):
+    # Requête en échec : pas d'after_cursor_execute, on dépile quand même
+    conn = context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument_engine(target) -> None:
+    """Hook the per-request query counters and the slow-query log on
+    `target` (an Engine)."""
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+        event.listen(target, "handle_error", _handle_error)
+
+
+# ----- Journal des requêtes lentes -----
+
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "0") or 0)
+SLOW_QUERY_LOG = os.environ.get(
+    "SLOW_QUERY_LOG", os.path.join(DB_DIR, "slow_queries.log")
+)
+SLOW_QUERY_LOG_BYTES = 5 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 3
+
+slow_query_logger = logging.getLogger("app.slow_queries")
+slow_query_logger.propagate = False
+_slow_threshold = 0.0  # seconds, 0 = disabled
+
+
+def configure_slow_query_log(threshold_ms: float, path: str = SLOW_QUERY_LOG) -> None:
+    """Log statements slower than `threshold_ms` as JSON lines to a rotating
+    file at `path` (`threshold_ms` <= 0 disables the log)."""
+    global _slow_threshold
+    for handler in list(slow_query_logger.handlers):
+        slow_query_logger.removeHandler(handler)
+        handler.close()
+    _slow_threshold = max(threshold_ms, 0) / 1000
+    if not _slow_threshold:
+        return
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=SLOW_QUERY_LOG_BYTES,
+        backupCount=SLOW_QUERY_LOG_BACKUPS,
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_query_logger.addHandler(handler)
+    slow_query_logger.setLevel(logging.INFO)
+
+
+def _calling_function() -> Optional[str]:
+    """Innermost `app` function (other than this module) on the stack,
+    e.g. `crud.get_tasks`."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.") and module != __name__:
+            return f"{module[4:]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def _params_shape(parameters, executemany: bool):
+    if executemany:
+        rows = list(parameters or ())
+        return {
+            "executemany": len(rows),
+            "row": _params_shape(rows[0], False) if rows else [],
+        }
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    return [type(v).__name__ for v in parameters or ()]
+
+
+def _explain(conn, statement: str, parameters, executemany: bool) -> Optional[list]:
+    if executemany:
+        parameters = next(iter(parameters or ()), ())
+    try:
+        # Curseur séparé : celui de la requête n'a peut-être pas encore été lu
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [row[-1] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception:
+        return None
+
+
+def _log_slow_query(conn, statement, parameters, executemany, elapsed) -> None:
+    slow_query_logger.info(
+        json.dumps(
+            {
+                "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "duration_ms": round(elapsed * 1000, 3),
+                "sql": normalize_sql(statement),
+                "params": _params_shape(parameters, executemany),
+                "caller": _calling_function(),
+                "plan": _explain(conn, statement, parameters, executemany),
+            },
+            ensure_ascii=False,
+        )
+    )
+
+
+instrument_engine(engine)
+configure_slow_query_log(SLOW_QUERY_MS)
@@ -0,0 +1,222 @@
+"""In-memory "blocked by" graph with a maintained topological order.
+
+Only tasks with at least one dependency edge are nodes. The topological
+order is kept up to date edge by edge (Pearce-Kelly dynamic topological
+sort): inserting an edge that already agrees with the order costs O(1),
+otherwise only the nodes whose rank lies between the two endpoints are
+visited and re-ranked; the same bounded search detects the cycles. The
+graph also counts, for each node, the blockers that are not done yet, so
+"is this task ready?" is O(1).
+
+This module holds the data structure only; `crud` loads it from
+`task_dependencies` and keeps it in sync with the change log.
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class DependencyGraph:
+    """Edges point from a blocker to the tasks waiting for it."""
+
+    def __init__(self):
+        self.blockers: Dict[int, Set[int]] = {}  # tâche -> tâches attendues
+        self.dependents: Dict[int, Set[int]] = {}  # tâche -> tâches en attente
+        self.rank: Dict[int, int] = {}  # position dans l'ordre topologique
+        self.open: Set[int] = set()  # nœuds pas encore terminés
+        self.waiting: Dict[int, int] = {}  # nœud -> bloqueurs non terminés
+        self._next_rank = 0
+        self._order: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return len(self.rank)
+
+    def __contains__(self, task_id: int) -> bool:
+        return task_id in self.rank
+
+    @classmethod
+    def build(
+        cls, edges: Iterable[Tuple[int, int]], open_ids: Iterable[int]
+    ) -> "DependencyGraph":
+        """Full build from (task_id, depends_on_id) edges and the ids of the
+        tasks not done (Kahn's algorithm, O(V + E))."""
+        graph = cls()
+        opened = set(open_ids)
+        for task_id, blocker in edges:
+            for node in (task_id, blocker):
+                if node not in graph.rank:
+                    graph.blockers[node], graph.dependents[node] = set(), set()
+                    graph.rank[node] = -1
+                    if node in opened:
+                        graph.open.add(node)
+            graph.blockers[task_id].add(blocker)
+            graph.dependents[blocker].add(task_id)
+        indegree = {node: len(b) for node, b in graph.blockers.items()}
+        ready = sorted(node for node, count in indegree.items() if count == 0)
+        while ready:
+            node = ready.pop()
+            graph.rank[node] = graph._next_rank
+            graph._next_rank += 1
+            for dependent in graph.dependents[node]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+        # Un cycle déjà en base (écritures concurrentes) : rangés en dernier
+        for node in sorted(n for n, r in graph.rank.items() if r < 0):
+            graph.rank[node] = graph._next_rank
+            graph._next_rank += 1
+        for node, blockers in graph.blockers.items():
+            graph.waiting[node] = len(blockers & graph.open)
+        return graph
+
+    # ----- Lecture -----
+
+    def is_blocked(self, task_id: int) -> bool:
+        """True if the task waits for at least one task not done yet."""
+        return self.waiting.get(task_id, 0) > 0
+
+    def order(self) -> List[int]:
+        """Node ids in topological order (blockers first); cached until the
+        next edge change."""
+        if self._order is None:
+            self._order = sorted(self.rank, key=self.rank.__getitem__)
+        return self._order
+
+    def find_cycle(self, task_id: int, blocker: int) -> Optional[List[int]]:
+        """The path `task_id -> ... -> blocker` (following "blocks" edges)
+        that the edge blocker -> task_id would close into a cycle, or None.
+
+        Only the nodes ranked between the two endpoints are visited.
+        """
+        if task_id == blocker:
+            return [task_id, task_id]
+        if task_id not in self.rank or blocker not in self.rank:
+            return None
+        upper = self.rank[blocker]
+        if self.rank[task_id] > upper:
+            return None  # l'ordre actuel convient déjà
+        parents = {task_id: None}
+        stack = [task_id]
+        while stack:
+            node = stack.pop()
+            if node == blocker:
+                path = [node]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                path.reverse()
+                return path + [task_id]
+            for dependent in self.dependents[node]:
+                if dependent not in parents and self.rank[dependent] <= upper:
+                    parents[dependent] = node
+                    stack.append(dependent)
+        return None
+
+    # ----- Mutations -----
+
+    def _add_node(self, task_id: int, is_open: bool) -> None:
+        self.blockers[task_id], self.dependents[task_id] = set(), set()
+        self.rank[task_id] = self._next_rank
+        self._next_rank += 1
+        self.waiting[task_id] = 0
+        if is_open:
+            self.open.add(task_id)
+        self._order = None
+
+    def _drop_if_isolated(self, task_id: int) -> None:
+        if self.blockers.get(task_id) or self.dependents.get(task_id):
+            return
+        for index in (self.blockers, self.dependents, self.rank, self.waiting):
+            index.pop(task_id, None)
+        self.open.discard(task_id)
+        self._order = None
+
+    def add_edge(
+        self, task_id: int, blocker: int, open_ids: Set[int]
+    ) -> Optional[List[int]]:
+        """Add "task_id is blocked by blocker". `open_ids` tells whether new
+        nodes are done. Returns the cycle path (graph unchanged) if the edge
+        would close one."""
+        cycle = self.find_cycle(task_id, blocker)
+        if cycle is not None:
+            return cycle
+        for node in (task_id, blocker):
+            if node not in self.rank:
+                self._add_node(node, node in open_ids)
+        if blocker in self.blockers[task_id]:
+            return None
+        if self.rank[blocker] > self.rank[task_id]:
+            self._reorder(blocker, task_id)
+        self.blockers[task_id].add(blocker)
+        self.dependents[blocker].add(task_id)
+        if blocker in self.open:
+            self.waiting[task_id] += 1
+        return None
+
+    def _reorder(self, blocker: int, task_id: int) -> None:
+        """Pearce-Kelly: move the nodes reachable from `task_id` (ranked up
+        to `blocker`) after those reaching `blocker` (ranked from `task_id`),
+        reusing their ranks."""
+        lower, upper = self.rank[task_id], self.rank[blocker]
+        forward = self._collect(task_id, self.dependents, lambda r: r <= upper)
+        backward = self._collect(blocker, self.blockers, lambda r: r >= lower)
+        moved = sorted(backward, key=self.rank.__getitem__) + sorted(
+            forward, key=self.rank.__getitem__
+        )
+        ranks = sorted(self.rank[node] for node in moved)
+        for node, rank in zip(moved, ranks):
+            self.rank[node] = rank
+        self._order = None
+
+    def _collect(self, start: int, edges: Dict[int, Set[int]], keep) -> Set[int]:
+        seen, stack = {start}, [start]
+        while stack:
+            for nxt in edges[stack.pop()]:
+                if nxt not in seen and keep(self.rank[nxt]):
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return seen
+
+    def remove_edge(self, task_id: int, blocker: int) -> None:
+        """Remove "task_id is blocked by blocker" (the order stays valid)."""
+        if blocker not in self.blockers.get(task_id, ()):
+            return
+        self.blockers[task_id].discard(blocker)
+        self.dependents[blocker].discard(task_id)
+        if blocker in self.open:
+            self.waiting[task_id] -= 1
+        self._drop_if_isolated(task_id)
+        self._drop_if_isolated(blocker)
+
+    def set_blockers(
+        self, task_id: int, blockers: Set[int], open_ids: Set[int]
+    ) -> List[Tuple[int, int]]:
+        """Replace the blockers of `task_id`; returns the edges refused
+        because they would close a cycle."""
+        for blocker in self.blockers.get(task_id, set()) - blockers:
+            self.remove_edge(task_id, blocker)
+        refused = []
+        current = self.blockers.get(task_id, set())
+        for blocker in sorted(blockers - current):
+            if self.add_edge(task_id, blocker, open_ids) is not None:
+                refused.append((task_id, blocker))
+        return refused
+
+    def set_open(self, task_id: int, is_open: bool) -> None:
+        """Record a status change (done or not) of a node."""
+        if task_id not in self.rank or (task_id in self.open) == is_open:
+            return
+        delta = 1 if is_open else -1
+        if is_open:
+            self.open.add(task_id)
+        else:
+            self.open.discard(task_id)
+        for dependent in self.dependents[task_id]:
+            self.waiting[dependent] += delta
+
+    def remove_node(self, task_id: int) -> None:
+        """Forget a deleted (or archived) task and its edges."""
+        if task_id not in self.rank:
+            return
+        for blocker in list(self.blockers[task_id]):
+            self.remove_edge(task_id, blocker)
+        for dependent in list(self.dependents.get(task_id, ())):
+            self.remove_edge(dependent, task_id)
@@ -0,0 +1,114 @@
+"""In-process async pub/sub bus feeding live updates (Server-Sent Events).
+
+`crud` mutations are published after their transaction commits; each
+subscriber gets a bounded queue and is dropped (its stream closed) when it
+falls too far behind, so a slow client can never stall the publishers.
+In-process listeners (callbacks) see every event synchronously, in the
+publishing thread.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Callable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 256
+
+
+class Subscription:
+    """A subscriber's bounded event queue."""
+
+    def __init__(self, bus: "EventBus", maxsize: int):
+        self.bus = bus
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Return the next event, or None once the subscription was dropped.
+
+        Raises `asyncio.TimeoutError` if nothing arrives within `timeout`.
+        """
+        if timeout is None:
+            return await self.queue.get()
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Fan-out of event dicts to every subscriber of the running event loop."""
+
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self._listeners: List[Callable[[dict], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, maxsize: Optional[int] = None) -> Subscription:
+        """Register a subscriber. Must be called from the event loop."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # New loop (server restart, tests): forget stale subscribers
+            self._subscribers.clear()
+            self._loop = loop
+            self._loop_thread = threading.get_ident()
+        sub = Subscription(self, maxsize or self.queue_size)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """Call `listener(event)` for every published event, from the
+        publishing thread; it must be quick and thread-safe."""
+        self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener: Callable[[dict], None]) -> None:
+        self._listeners = [f for f in self._listeners if f is not listener]
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: dict) -> None:
+        """Publish an event; safe to call from any thread."""
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("event listener failed")
+        loop = self._loop
+        if loop is None or not self._subscribers or loop.is_closed():
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._dispatch(event)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event: dict) -> None:
+        self.published += 1
+        for sub in list(self._subscribers):
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(sub)
+
+    def _drop(self, sub: Subscription) -> None:
+        """Disconnect a slow consumer: empty its queue and end its stream."""
+        self._subscribers.discard(sub)
+        sub.dropped = True
+        self.dropped += 1
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(None)
+
+
+# Bus partagé par l'application
+bus = EventBus()
@@ -0,0 +1,226 @@
+"""iCalendar (RFC 5545) feed of the open tasks with a due date.
+
+Each open task is an all-day VEVENT; the open task of a recurring series
+carries an RRULE derived from `recurrence_pattern`/`recurrence_end_date`.
+Rendered VEVENTs are kept per task with the data version they match. A poll
+at the same version only costs the `max(seq)` lookup (304 when the client
+sends the ETag); after a mutation only the tasks named in the change log
+since the cached version are rendered again.
+"""
+
+import os
+import threading
+from datetime import date, datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import agenda, crud, models
+
+ICS_UID_DOMAIN = os.getenv("ICS_UID_DOMAIN", "gestion-du-temps.local")
+ICS_CALENDAR_NAME = os.getenv("ICS_CALENDAR_NAME", "Gestion du temps")
+# Au-delà, une reconstruction complète coûte moins que la requête IN
+INCREMENTAL_MAX_TASKS = 1000
+CHUNK_EVENTS = 200
+
+FREQUENCIES = {
+    "daily": "DAILY",
+    "weekly": "WEEKLY",
+    "monthly": "MONTHLY",
+    "yearly": "YEARLY",
+}
+
+_COLUMNS = (
+    models.Task.id,
+    models.Task.title,
+    models.Task.description,
+    models.Task.tag,
+    models.Task.due_date,
+    models.Task.recurrence_pattern,
+    models.Task.recurrence_end_date,
+    models.Task.updated_at,
+)
+_OPEN_WITH_DUE = select(*_COLUMNS).where(
+    models.Task.status != "done", models.Task.due_date.is_not(None)
+)
+
+
+class _Feed:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version: Optional[int] = None
+        self.events: Dict[int, str] = {}
+        self.ordered: List[str] = []  # events par id de tâche
+
+
+_feed = _Feed()
+
+
+# ----- Rendu -----
+
+
+def _escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets (RFC 5545 §3.1), never inside a
+    UTF-8 sequence; continuation lines start with a space."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start, width = [], 0, 75
+    while start < len(data):
+        end = min(start + width, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start, width = end, 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_date(d: date) -> str:
+    return d.strftime("%Y%m%d")
+
+
+def _ics_stamp(value: Optional[datetime]) -> str:
+    value = value or datetime(1970, 1, 1)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _series_split(pattern: str, origin: date) -> Tuple[List[date], Optional[date]]:
+    """Split a monthly/yearly series whose day gets clamped.
+
+    The chain of `_next_due_date` keeps a clamped day (31 jan -> 28 feb ->
+    28 mar), which a plain RRULE cannot express. Returns the occurrences
+    before the day settles and the first settled one, from which a plain
+    RRULE applies; ([], None) when the RRULE can start at `origin`.
+    """
+    step = agenda.MONTH_STEPS.get(pattern)
+    if step is None or origin.day <= 28:
+        return [], None
+    settled = agenda.occurrence(pattern, origin, 48 // step).day
+    if origin.day == settled:
+        return [], None
+    dates, k = [], 1
+    while True:
+        due = agenda.occurrence(pattern, origin, k)
+        if due.day == settled:
+            return dates, due
+        dates.append(due)
+        k += 1
+
+
+def _vevent(row, uid: str, start: date, rrule=None, rdates=()) -> str:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}@{ICS_UID_DOMAIN}",
+        f"DTSTAMP:{_ics_stamp(row.updated_at)}",
+        f"DTSTART;VALUE=DATE:{_ics_date(start)}",
+        f"SUMMARY:{_escape(row.title or '')}",
+    ]
+    if row.description:
+        lines.append(f"DESCRIPTION:{_escape(row.description)}")
+    tags = crud.parse_tags(row.tag)
+    if tags:
+        lines.append("CATEGORIES:" + ",".join(_escape(t) for t in tags))
+    if rrule:
+        lines.append(f"RRULE:{rrule}")
+    if rdates:
+        lines.append("RDATE;VALUE=DATE:" + ",".join(_ics_date(d) for d in rdates))
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+
+def render_task(row) -> str:
+    """VEVENT(s) of an open task; recurring series get an RRULE (and, when
+    the day of month gets clamped, a second VEVENT for the settled part)."""
+    uid = f"task-{row.id}"
+    freq = FREQUENCIES.get(row.recurrence_pattern or "")
+    until = row.recurrence_end_date
+    if freq is None or (until and until <= row.due_date):
+        return _vevent(row, uid, row.due_date)
+    rule = f"FREQ={freq}" + (f";UNTIL={_ics_date(until)}" if until else "")
+    rdates, settled = _series_split(row.recurrence_pattern, row.due_date)
+    if settled is None:
+        return _vevent(row, uid, row.due_date, rrule=rule)
+    rdates = [d for d in rdates if not until or d <= until]
+    head = _vevent(row, uid, row.due_date, rdates=rdates)
+    if until and settled > until:
+        return head
+    return head + _vevent(row, f"{uid}-series", settled, rrule=rule)
+
+
+# ----- Cache incrémental -----
+
+
+def _rebuild(db: Session) -> Dict[int, str]:
+    return {row.id: render_task(row) for row in db.execute(_OPEN_WITH_DUE)}
+
+
+def _refresh(
+    db: Session, events: Dict[int, str], since: int
+) -> Optional[Dict[int, str]]:
+    """Re-render the tasks changed after `since`; None when the change log
+    cannot tell (compacted past `since`) or too many tasks changed."""
+    ids = crud._changed_task_ids(db, since, INCREMENTAL_MAX_TASKS)
+    if ids is None:
+        return None
+    events = dict(events)
+    for task_id in ids:
+        events.pop(task_id, None)
+    if ids:
+        for row in db.execute(_OPEN_WITH_DUE.where(models.Task.id.in_(ids))):
+            events[row.id] = render_task(row)
+    return events
+
+
+def get_feed(db: Session, version: Optional[int] = None) -> Tuple[int, List[str]]:
+    """(data version, rendered VEVENTs ordered by task id) at the current
+    version (or `version`, already read), updated from the change log when
+    possible."""
+    if version is None:
+        version = crud.get_data_version(db)
+    with _feed.lock:
+        cached_version, events, ordered = _feed.version, _feed.events, _feed.ordered
+    if cached_version == version:
+        return version, ordered
+    refreshed = None
+    if cached_version is not None and cached_version < version:
+        refreshed = _refresh(db, events, cached_version)
+    events = refreshed if refreshed is not None else _rebuild(db)
+    ordered = [events[task_id] for task_id in sorted(events)]
+    with _feed.lock:
+        _feed.version, _feed.events, _feed.ordered = version, events, ordered
+    return version, ordered
+
+
+def stream(events: List[str]) -> Iterator[str]:
+    """The VCALENDAR document, in chunks of `CHUNK_EVENTS` events."""
+    yield "".join(
+        _fold(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//Gestion du temps//FR",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{_escape(ICS_CALENDAR_NAME)}",
+        )
+    )
+    for i in range(0, len(events), CHUNK_EVENTS):
+        yield "".join(events[i : i + CHUNK_EVENTS])
+    yield "END:VCALENDAR\r\n"
+
+
+def etag(version: int) -> str:
+    return f'"ics-{version}"'
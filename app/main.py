@@ -1,16 +1,32 @@
 from fastapi import FastAPI, Request, Depends, Form, status, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone, date
-from typing import Optional
+from typing import Literal, Optional
 from urllib.parse import urlencode
+from contextlib import asynccontextmanager
+import asyncio
+import os
 
 from .database import Base, engine, get_db
-from . import crud
+from . import crud, archiver, analytics, reminders
+from .assets import AssetStaticFiles, static_url
+from .admission import AdmissionMiddleware
+from .metrics import MetricsMiddleware, QueryTimingMiddleware
+from .profiling import ProfilingMiddleware
 from .routers import tasks as tasks_router
 from .routers import subtasks as subtasks_router
+from .routers import changes as changes_router
+from .routers import events as events_router
+from .routers import stats as stats_router
+from .routers import tags as tags_router
+from .routers import metrics as metrics_router
+from .routers import profiles as profiles_router
+from .routers import agenda as agenda_router
+from .routers import time_tracking as time_router
+from .routers import dependencies as dependencies_router
 
 
 # Quadrants
@@ -59,19 +75,130 @@ def compute_due_status(due_date: Optional[date]) -> str:
     return "later"
 
 
+def format_duration(seconds: Optional[int]) -> str:
+    """Temps suivi lisible : "0 min", "45 min", "2 h 05"."""
+    minutes = (seconds or 0) // 60
+    if minutes < 60:
+        return f"{minutes} min"
+    return f"{minutes // 60} h {minutes % 60:02d}"
+
+
 # Crée les tables SQLite si elles n'existent pas
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Gestion du Temps - MVP")
 
-# servir /static
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tâches de fond (désactivées par défaut)
+    background = []
+    if archiver.ARCHIVE_AFTER_DAYS > 0:
+        background.append(asyncio.create_task(archiver.run_forever()))
+    # Rappels d'échéance (tas de minuteurs tenu à jour par le bus)
+    if reminders.REMINDERS_ENABLED:
+        background.append(asyncio.create_task(reminders.run_forever()))
+    yield
+    for task in background:
+        task.cancel()
+
+
+app = FastAPI(title="Gestion du Temps - MVP", lifespan=lifespan)
+
+# Limitation de concurrence lecture / écriture (503 + Retry-After si saturé)
+app.add_middleware(AdmissionMiddleware)
+# Compression des réponses HTML/JSON au-delà de GZIP_MIN_SIZE octets
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.environ.get("GZIP_MIN_SIZE", "1024")),
+    compresslevel=6,
+)
+# Métriques par route (exposées sur /metrics), délestages compris
+app.add_middleware(MetricsMiddleware)
+# Nombre de requêtes SQL et temps DB par requête (en-tête Server-Timing)
+app.add_middleware(QueryTimingMiddleware)
+# Profilage à la demande (inactif sans PROFILE_SECRET)
+app.add_middleware(ProfilingMiddleware)
+
+# servir /static (fichiers empreintés + précompressés : scripts/build_static.py)
+app.mount("/static", AssetStaticFiles(directory="app/static"), name="static")
 
 templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["static_url"] = static_url
+templates.env.filters["duration"] = format_duration
 
 # brancher les routes API REST
 app.include_router(tasks_router.router)
 app.include_router(subtasks_router.router)
+app.include_router(changes_router.router)
+app.include_router(events_router.router)
+app.include_router(stats_router.router)
+app.include_router(tags_router.router)
+app.include_router(metrics_router.router)
+app.include_router(profiles_router.router)
+app.include_router(agenda_router.router)
+app.include_router(time_router.router)
+app.include_router(dependencies_router.router)
+
+
+def list_filters(params) -> dict:
+    """`crud.get_tasks` filters from the /list query parameters."""
+
+    def yesno(val: Optional[str]):
+        if val is None or val == "" or val == "all":
+            return None
+        return True if val == "yes" else False
+
+    status_f = params.get("status_f")
+    due_f = params.get("due_f")
+    quadrant_f = params.get("quadrant_f")
+    q = params.get("q")
+    tag = params.get("tag")
+    return {
+        "status": status_f if status_f in {"todo", "done"} else None,
+        "urgent": yesno(params.get("urgent_f")),
+        "important": yesno(params.get("important_f")),
+        "due": due_f if due_f in crud.LIST_SECTIONS else None,
+        "quadrant": int(quadrant_f) if quadrant_f in {"1", "2", "3", "4"} else None,
+        "q": q.strip() if q else None,
+        "tag": tag.strip() if tag else None,
+    }
+
+
+# --- Fragments HTML (mises à jour partielles) ---
+FRAGMENT_MEDIA_TYPE = "text/html+fragment"
+
+
+def wants_fragment(request: Request) -> bool:
+    """htmx-style partial update: `HX-Request: true` or an Accept header
+    asking for `text/html+fragment`."""
+    if request.headers.get("hx-request") == "true":
+        return True
+    return FRAGMENT_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def render_fragment(request: Request, name: str, context: dict) -> HTMLResponse:
+    response = templates.TemplateResponse(name, {"request": request, **context})
+    response.headers["Vary"] = "HX-Request, Accept"
+    return response
+
+
+def list_fragment(request: Request, db: Session, task_id: Optional[int]):
+    """The /list row of one task (if it still passes the page filters, sent
+    as the query string) and the section counters."""
+    filters = list_filters(request.query_params)
+    task = None
+    if task_id is not None and crud.task_matches(db, task_id, **filters):
+        task = crud.get_task(db, task_id)
+        task.quadrant = compute_quadrant(task)
+        if task.status == "done":
+            task.due_status = "done"
+        else:
+            task.due_status = compute_due_status(task.due_date)
+
+    facets = crud.get_task_facets(db, **filters)
+    counts = dict(facets["due"], shown=facets["matching"], total=facets["total"])
+    return render_fragment(
+        request, "partials/list_fragment.html", {"task": task, "counts": counts}
+    )
 
 
 @app.get("/list", response_class=HTMLResponse)
@@ -81,33 +208,32 @@ def page_list(
     status_f: Optional[str] = None,  # "all" | "todo" | "done"
     urgent_f: Optional[str] = None,  # "all" | "yes" | "no"
     important_f: Optional[str] = None,  # "all" | "yes" | "no"
+    due_f: Optional[str] = None,  # "all" | section d'échéance (crud.LIST_SECTIONS)
+    quadrant_f: Optional[str] = None,  # "all" | "1".."4"
     q: Optional[str] = None,  # recherche texte
     tag: Optional[str] = None,  # filter by tag
-    sort: Optional[str] = None,  # "created_desc" | "due_asc" | "due_desc" | "position"
+    sort: Optional[
+        str
+    ] = None,  # "created_desc" | "due_asc" | "due_desc" | "position" | "ready"
 ):
-    def yesno(val: Optional[str]):
-        if val is None or val == "" or val == "all":
-            return None
-        return True if val == "yes" else False
-
     # --- Filtres et Tri ---
-    status_val = status_f if status_f in {"todo", "done"} else None
-    urgent_val = yesno(urgent_f)
-    important_val = yesno(important_f)
-    search_query = q.strip() if q else None
-    tag_query = tag.strip() if tag else None
+    filters = list_filters(
+        dict(
+            status_f=status_f,
+            urgent_f=urgent_f,
+            important_f=important_f,
+            due_f=due_f,
+            quadrant_f=quadrant_f,
+            q=q,
+            tag=tag,
+        )
+    )
     sort_key = sort or "created_desc"
 
-    tasks = crud.get_tasks(
-        db,
-        status=status_val,
-        urgent=urgent_val,
-        important=important_val,
-        q=search_query,
-        tag=tag_query,
-        sort=sort_key,
-    )
-    total_count = crud.get_tasks_count(db)
+    tasks = crud.get_tasks(db, sort=sort_key, **filters)
+    # Compteurs des filtres et total en une seule requête
+    facets = crud.get_task_facets(db, **filters)
+    total_count = facets["total"]
 
     # --- Quadrant + statut d'échéance + regroupement ---
     overdue = []
@@ -147,19 +273,25 @@ def page_list(
         {"key": "later", "label": "Plus tard", "tasks": later},
         {"key": "none", "label": "Sans échéance", "tasks": nodate},
     ]
+    due_labels = {section["key"]: section["label"] for section in due_sections}
+    due_labels["done"] = "Terminées"
 
     # --- Bandeau "filtres actifs" (chips) ---
     current = {
         "status_f": status_f or "all",
         "urgent_f": urgent_f or "all",
         "important_f": important_f or "all",
+        "due_f": due_f or "all",
+        "quadrant_f": quadrant_f or "all",
         "q": (q or "").strip(),
         "tag": tag or "",
         "sort": sort or "created_desc",
     }
 
+    CHOICE_FILTERS = ("status_f", "urgent_f", "important_f", "due_f", "quadrant_f")
+
     def is_active(key: str, val: str) -> bool:
-        if key in ("status_f", "urgent_f", "important_f"):
+        if key in CHOICE_FILTERS:
             return val not in ("", None, "all")
         if key == "q":
             return bool(val)
@@ -172,7 +304,7 @@ def page_list(
     def build_query(d: dict) -> str:
         keep = {}
         for k, v in d.items():
-            if k in ("status_f", "urgent_f", "important_f"):
+            if k in CHOICE_FILTERS:
                 if v and v != "all":
                     keep[k] = v
             elif k == "q":
@@ -188,7 +320,7 @@ def page_list(
 
     def url_without(remove_key: str) -> str:
         copy = dict(current)
-        if remove_key in ("status_f", "urgent_f", "important_f"):
+        if remove_key in CHOICE_FILTERS:
             copy[remove_key] = "all"
         elif remove_key == "q":
             copy[remove_key] = ""
@@ -198,15 +330,15 @@ def page_list(
         "status_f": url_without("status_f"),
         "urgent_f": url_without("urgent_f"),
         "important_f": url_without("important_f"),
+        "due_f": url_without("due_f"),
+        "quadrant_f": url_without("quadrant_f"),
         "q": url_without("q"),
         "tag": "/list",
         "all": "/list",
     }
 
     has_filters = any(
-        is_active(k, v)
-        for k, v in current.items()
-        if k in ("status_f", "urgent_f", "important_f", "q")
+        is_active(k, v) for k, v in current.items() if k in CHOICE_FILTERS + ("q",)
     )
 
     return templates.TemplateResponse(
@@ -215,23 +347,31 @@ def page_list(
             "request": request,
             "tasks": tasks,
             "due_sections": due_sections,
+            "due_labels": due_labels,
             "done_tasks": done_tasks,
             "status_f": current["status_f"],
             "urgent_f": current["urgent_f"],
             "important_f": current["important_f"],
+            "due_f": current["due_f"],
+            "quadrant_f": current["quadrant_f"],
             "q": current["q"],
             "sort": current["sort"],
             "urls_clear": urls_clear,
             "has_filters": has_filters,
             "total_count": total_count,
+            "facets": facets,
         },
     )
 
 
 @app.get("/matrix", response_class=HTMLResponse)
-def page_matrix(request: Request, db: Session = Depends(get_db)):
+def page_matrix(request: Request, db: Session = Depends(get_db), ready: bool = False):
     # On ne montre que les tâches à faire dans la matrice
     tasks = crud.get_tasks(db, status="todo")
+    if ready:
+        # Seulement les tâches prêtes : aucune dépendance encore ouverte
+        blocked = crud.get_blocked_task_ids(db, [t.id for t in tasks])
+        tasks = [t for t in tasks if t.id not in blocked]
 
     q1 = []
     q2 = []
@@ -259,6 +399,7 @@ def page_matrix(request: Request, db: Session = Depends(get_db)):
             "q2": q2,
             "q3": q3,
             "q4": q4,
+            "ready": ready,
         },
     )
 
@@ -266,7 +407,8 @@ def page_matrix(request: Request, db: Session = Depends(get_db)):
 # Page de statistiques
 @app.get("/stats", response_class=HTMLResponse)
 def page_stats(request: Request, db: Session = Depends(get_db)):
-    stats = crud.get_general_stats(db)
+    # Historique : on compte aussi les tâches archivées
+    stats = crud.get_general_stats(db, include_archived=True)
     total = stats["total"]
     done = stats["done"]
     todo = total - done
@@ -275,10 +417,29 @@ def page_stats(request: Request, db: Session = Depends(get_db)):
     # Terminé récemment (7 derniers jours)
     now_utc = datetime.now(timezone.utc)
     seven_days_ago = now_utc - timedelta(days=7)
-    done_last_7 = crud.get_completed_since_count(db, since=seven_days_ago)
+    done_last_7 = crud.get_completed_since_count(
+        db, since=seven_days_ago, include_archived=True
+    )
+
+    # Graphique hebdomadaire (8 dernières semaines) depuis le rollup quotidien
+    today = date.today()
+    weekly = crud.get_stats_timeseries(
+        db, today - timedelta(weeks=7, days=today.weekday()), today, bucket="week"
+    )
+    weekly_max = max([1] + [max(w["created"], w["completed"]) for w in weekly])
+
+    # Moyenne de productivité : tâches terminées par jour sur 28 jours
+    last_28 = crud.get_stats_timeseries(db, today - timedelta(days=27), today)
+    avg_done_per_day = round(sum(p["completed"] for p in last_28) / 28, 1)
+
+    # Analyse de productivité (NumPy, en cache par version des données)
+    productivity = analytics.get_analytics(db)
+
+    # Temps suivi par quadrant sur 30 jours (cumul quotidien)
+    tracked = crud.get_tracked_time(db, today - timedelta(days=29), today)
 
     # Répartition Eisenhower
-    eisenhower_all = crud.get_eisenhower_stats(db)
+    eisenhower_all = crud.get_eisenhower_stats(db, include_archived=True)
     eisenhower_todo = crud.get_eisenhower_stats(db, status="todo")
 
     return templates.TemplateResponse(
@@ -302,12 +463,19 @@ def page_stats(request: Request, db: Session = Depends(get_db)):
                 "nn": eisenhower_todo.get("q4", 0),
             },
             "done_last_7": done_last_7,
+            "weekly": weekly,
+            "weekly_max": weekly_max,
+            "avg_done_per_day": avg_done_per_day,
+            "productivity": productivity,
+            "tracked": tracked,
+            "tracked_total": sum(tracked.values()),
         },
     )
 
 
 @app.post("/list/add")
 def add_task_from_form(
+    request: Request,
     title: str = Form(...),
     urgent: bool = Form(False),
     important: bool = Form(False),
@@ -337,8 +505,10 @@ def add_task_from_form(
     )
 
     # Sauvegarder en base
-    crud.create_task(db, task_in)
+    task = crud.create_task(db, task_in)
 
+    if wants_fragment(request):
+        return list_fragment(request, db, task.id)
     # Rediriger vers /list pour rafraîchir l'affichage
     return RedirectResponse(url="/list", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -346,31 +516,107 @@ def add_task_from_form(
 # Marquer une tâche comme terminée
 @app.post("/list/complete/{task_id}")
 def complete_task_from_list(
+    request: Request,
     task_id: int,
     db: Session = Depends(get_db),
 ):
     from . import schemas
 
     task_in = schemas.TaskUpdate(status="done")
-    crud.update_task(db, task_id, task_in)
+    task = crud.update_task(db, task_id, task_in)
 
+    if wants_fragment(request):
+        if task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return list_fragment(request, db, task_id)
     return RedirectResponse(url="/list", status_code=status.HTTP_303_SEE_OTHER)
 
 
 # Rétablir une tâche terminée
 @app.post("/list/reopen/{task_id}")
 def reopen_task_from_list(
+    request: Request,
     task_id: int,
     db: Session = Depends(get_db),
 ):
     from . import schemas
 
     task_in = schemas.TaskUpdate(status="todo")
-    crud.update_task(db, task_id, task_in)
+    task = crud.update_task(db, task_id, task_in)
+
+    if wants_fragment(request):
+        if task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return list_fragment(request, db, task_id)
+    return RedirectResponse(url="/list", status_code=status.HTTP_303_SEE_OTHER)
+
+
+# Lancer / arrêter le chrono d'une tâche
+def _toggle_timer(db: Session, task_id: int, action: str):
+    if action == "start":
+        return crud.start_timer(db, task_id)
+    return crud.stop_timer(db, task_id)
+
+
+@app.post("/list/timer/{action}/{task_id}")
+def timer_from_list(
+    request: Request,
+    task_id: int,
+    action: Literal["start", "stop"],
+    db: Session = Depends(get_db),
+):
+    task = _toggle_timer(db, task_id, action)
 
+    if wants_fragment(request):
+        if task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return list_fragment(request, db, task_id)
     return RedirectResponse(url="/list", status_code=status.HTTP_303_SEE_OTHER)
 
 
+@app.post("/matrix/timer/{action}/{task_id}")
+def timer_from_matrix(
+    request: Request,
+    task_id: int,
+    action: Literal["start", "stop"],
+    db: Session = Depends(get_db),
+):
+    task = _toggle_timer(db, task_id, action)
+
+    if not wants_fragment(request):
+        return RedirectResponse(url="/matrix", status_code=status.HTTP_303_SEE_OTHER)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    task.quadrant = compute_quadrant(task)
+    task.due_status = compute_due_status(task.due_date)
+    counts = crud.get_eisenhower_stats(db, status="todo")
+    return render_fragment(
+        request, "partials/matrix_fragment.html", {"task": task, "counts": counts}
+    )
+
+
+# Déplacer une carte de la matrice (glisser-déposer)
+@app.post("/matrix/move/{task_id}")
+def move_task_from_matrix(
+    request: Request,
+    task_id: int,
+    quadrant: int = Form(...),
+    db: Session = Depends(get_db),
+):
+    task = crud.set_task_quadrant(db, task_id, quadrant)
+
+    if not wants_fragment(request):
+        return RedirectResponse(url="/matrix", status_code=status.HTTP_303_SEE_OTHER)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    task.quadrant = compute_quadrant(task)
+    task.due_status = compute_due_status(task.due_date)
+    counts = crud.get_eisenhower_stats(db, status="todo")
+    return render_fragment(
+        request, "partials/matrix_fragment.html", {"task": task, "counts": counts}
+    )
+
+
 # Modifier des tâches existantes
 @app.get("/list/edit/{task_id}", response_class=HTMLResponse)
 def edit_task_page(
@@ -378,12 +624,12 @@ def edit_task_page(
     request: Request,
     db: Session = Depends(get_db),
 ):
-    # Récupérer la tâche via la couche CRUD
-    task = crud.get_task(db, task_id)
+    # Tâche et sous-tâches (ordonnées) chargées ensemble
+    task = next(iter(crud.get_task_details(db, [task_id])), None)
     if not task:
         raise HTTPException(status_code=404, detail="Tâche introuvable")
 
-    subtasks = crud.get_subtasks(db, task_id)
+    subtasks = task.subtasks
 
     return templates.TemplateResponse(
         "edit_task.html",
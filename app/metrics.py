@@ -0,0 +1,241 @@
+"""Request metrics (Prometheus text format) collected by an ASGI middleware,
+and per-request SQL timing (`Server-Timing` header).
+
+Series are labelled by route template (`/api/tasks/{task_id}`), never by raw
+path, so their number stays bounded. All updates happen on the event loop
+thread (the middleware is async and never awaits while updating), which
+makes plain ints and lists safe without any lock.
+"""
+
+import logging
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from starlette.routing import Match, Mount
+
+from .database import track_queries
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000)
+UNMATCHED = "<unmatched>"
+ROUTE_CACHE_SIZE = 4096
+# Mode debug : avertit quand une même requête SQL tourne plus de N fois
+SQL_REPEAT_THRESHOLD = int(os.environ.get("SQL_REPEAT_THRESHOLD", "0") or 0)
+
+
+class _Series:
+    """Counters of one (method, route) pair."""
+
+    __slots__ = (
+        "in_flight",
+        "statuses",
+        "latency_counts",
+        "latency_sum",
+        "size_counts",
+        "size_sum",
+    )
+
+    def __init__(self):
+        self.in_flight = 0
+        self.statuses: Dict[int, int] = {}
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)  # + le="+Inf"
+        self.latency_sum = 0.0
+        self.size_counts = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+
+
+class Metrics:
+    """Registry of per-route request metrics."""
+
+    def __init__(self):
+        self.series: Dict[Tuple[str, str], _Series] = {}
+        self._routes: Dict[Tuple[str, str], str] = {}
+
+    def reset(self) -> None:
+        self.series.clear()
+        self._routes.clear()
+
+    def route_template(self, app, scope) -> str:
+        """Return the template of the route matching `scope`.
+
+        Resolved like the router does (first full match, else first partial
+        match) and cached per method and path.
+        """
+        key = (scope["method"], scope["path"])
+        template = self._routes.get(key)
+        if template is not None:
+            return template
+        template = UNMATCHED
+        for route in getattr(getattr(app, "router", None), "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.NONE:
+                continue
+            if match == Match.FULL or template == UNMATCHED:
+                template = route.path
+                if isinstance(route, Mount):
+                    template += "/{path}"
+            if match == Match.FULL:
+                break
+        if len(self._routes) >= ROUTE_CACHE_SIZE:
+            self._routes.clear()  # borne simple : les ids dans l'URL sont illimités
+        self._routes[key] = template
+        return template
+
+    def get_series(self, method: str, route: str) -> _Series:
+        series = self.series.get((method, route))
+        if series is None:
+            series = self.series[(method, route)] = _Series()
+        return series
+
+    def render(self) -> str:
+        """Return every series in the Prometheus text exposition format."""
+        lines: List[str] = []
+        items = sorted(self.series.items())
+
+        def labels(method, route, **extra):
+            pairs = [("method", method), ("route", route)] + list(extra.items())
+            return ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs)
+
+        lines += [
+            "# HELP http_requests_total Total HTTP requests by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), s in items:
+            for status, count in sorted(s.statuses.items()):
+                lines.append(
+                    f"http_requests_total{{{labels(method, route, status=status)}}}"
+                    f" {count}"
+                )
+
+        lines += [
+            "# HELP http_requests_in_progress Requests currently being served.",
+            "# TYPE http_requests_in_progress gauge",
+        ]
+        for (method, route), s in items:
+            lines.append(
+                f"http_requests_in_progress{{{labels(method, route)}}} {s.in_flight}"
+            )
+
+        for name, help_text, bounds, attr in (
+            (
+                "http_request_duration_seconds",
+                "Request latency until the response is fully sent.",
+                LATENCY_BUCKETS,
+                "latency",
+            ),
+            (
+                "http_response_size_bytes",
+                "Response body size.",
+                SIZE_BUCKETS,
+                "size",
+            ),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, route), s in items:
+                base = labels(method, route)
+                cumulative = 0
+                for bound, count in zip(bounds, getattr(s, f"{attr}_counts")):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{{{base},le="{float(bound)!r}"}} {cumulative}'
+                    )
+                cumulative += getattr(s, f"{attr}_counts")[-1]
+                lines.append(f'{name}_bucket{{{base},le="+Inf"}} {cumulative}')
+                lines.append(f"{name}_sum{{{base}}} {getattr(s, f'{attr}_sum')}")
+                lines.append(f"{name}_count{{{base}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Metrics()
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding `registry` (HTTP requests only)."""
+
+    def __init__(self, app, metrics: Metrics = registry):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        route = self.metrics.route_template(scope.get("app"), scope)
+        series = self.metrics.get_series(scope["method"], route)
+        series.in_flight += 1
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            series.in_flight -= 1
+            series.statuses[status] = series.statuses.get(status, 0) + 1
+            series.latency_counts[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+            series.latency_sum += elapsed
+            series.size_counts[bisect_left(SIZE_BUCKETS, size)] += 1
+            series.size_sum += size
+
+
+class QueryTimingMiddleware:
+    """ASGI middleware adding a `Server-Timing` header with the request's
+    query count and DB time, e.g. `db;dur=12.4;desc="5 queries", app;dur=30.1`.
+
+    With `repeat_threshold` > 0 (env `SQL_REPEAT_THRESHOLD`), logs a warning
+    when one statement shape runs more than that many times in a request,
+    the usual sign of an N+1 access pattern.
+    """
+
+    def __init__(self, app, repeat_threshold: int = SQL_REPEAT_THRESHOLD):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats = track_queries(track_shapes=self.repeat_threshold > 0)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                elapsed = (time.perf_counter() - started) * 1000
+                timing = (
+                    f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries",'
+                    f" app;dur={elapsed:.1f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+        if self.repeat_threshold > 0:
+            for sql, count in stats.repeated(self.repeat_threshold).items():
+                logger.warning(
+                    "%s %s: statement ran %d times (possible N+1): %s",
+                    scope["method"],
+                    scope["path"],
+                    count,
+                    " ".join(sql.split())[:200],
+                )
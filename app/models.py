@@ -7,6 +7,8 @@ from sqlalchemy import (
     DateTime,
     Date,
     ForeignKey,
+    Index,
+    text,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -15,6 +17,22 @@ from .database import Base
 
 class Task(Base):
     __tablename__ = "tasks"
+    # Index couvrant des compteurs de facettes (crud.get_task_facets)
+    __table_args__ = (
+        Index(
+            "ix_tasks_facets", "quadrant", "status", "urgent", "important", "due_date"
+        ),
+        # Agenda (app.agenda) : tâches par plage d'échéance, têtes de séries
+        Index("ix_tasks_due_date", "due_date"),
+        Index(
+            "ix_tasks_recurring",
+            "due_date",
+            sqlite_where=text("recurrence_pattern IS NOT NULL"),
+        ),
+        # AUTOINCREMENT : l'id d'une tâche archivée ou supprimée n'est jamais
+        # réattribué (sinon tasks_archive et time_entries le confondraient)
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -48,9 +66,80 @@ class Task(Base):
     )
     completed_at = Column(DateTime, nullable=True)
 
-    # relationship to subtasks
+    # Suivi du temps : total dénormalisé (secondes, sous-tâches comprises)
+    # et chrono en cours (un seul par tâche, éventuellement sur une sous-tâche)
+    time_spent = Column(Integer, nullable=False, default=0, server_default="0")
+    timer_started_at = Column(DateTime, nullable=True)
+    timer_subtask_id = Column(Integer, nullable=True)
+
+    # relationship to subtasks (deleted by the database: ON DELETE CASCADE),
+    # loaded in the same order as crud.get_subtasks
     subtasks = relationship(
-        "Subtask", back_populates="task", cascade="all, delete-orphan"
+        "Subtask",
+        back_populates="task",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by=lambda: (Subtask.position.asc().nullslast(), Subtask.id),
+    )
+
+    @property
+    def tags(self) -> list:
+        """Tag names; `tag` holds them normalized and comma-separated."""
+        return [t.strip() for t in self.tag.split(",") if t.strip()] if self.tag else []
+
+
+class Tag(Base):
+    """Normalized tag (lowercase name) with usage counters.
+
+    `task_count` / `open_count` (tasks not done) cover the hot `tasks`
+    table and are maintained incrementally by `crud`, so the facet list
+    never counts `task_tags` at read time.
+    """
+
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+    task_count = Column(Integer, nullable=False, default=0)
+    open_count = Column(Integer, nullable=False, default=0)
+
+
+class TaskTag(Base):
+    """Task <-> tag association (several tags per task)."""
+
+    __tablename__ = "task_tags"
+    # La clé primaire sert task -> tags, l'index tag -> tasks (filtres)
+    __table_args__ = (Index("ix_task_tags_tag", "tag_id", "task_id"),)
+
+    task_id = Column(
+        Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag_id = Column(
+        Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True
+    )
+
+
+class TaskDependency(Base):
+    """ "Blocked by" edge: `task_id` waits for `depends_on_id` to be done.
+
+    The primary key serves task -> blockers, the index blocker -> dependents.
+    Edges go with either task (`ON DELETE CASCADE`); `crud` refuses edges
+    that would close a cycle.
+    """
+
+    __tablename__ = "task_dependencies"
+    __table_args__ = (
+        Index("ix_task_dependencies_depends_on", "depends_on_id", "task_id"),
+    )
+
+    task_id = Column(
+        Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True
+    )
+    depends_on_id = Column(
+        Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True
+    )
+    created_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
 
 
@@ -58,11 +147,14 @@ class Subtask(Base):
     __tablename__ = "subtasks"
 
     id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    task_id = Column(
+        Integer, ForeignKey("tasks.id", ondelete="CASCADE"), nullable=False
+    )
 
     title = Column(String, nullable=False)
     status = Column(String, default="todo")  # "todo" / "done"
     position = Column(Integer, nullable=True)
+    time_spent = Column(Integer, nullable=False, default=0, server_default="0")
 
     created_at = Column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
@@ -70,3 +162,143 @@ class Subtask(Base):
 
     # relationship back to parent task
     task = relationship("Task", back_populates="subtasks")
+
+
+class TaskArchive(Base):
+    """Cold storage for completed tasks moved out of `tasks` by the archiver.
+
+    Rows keep their original id and recurrence fields so history and
+    recurrence chains stay resolvable.
+    """
+
+    __tablename__ = "tasks_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    urgent = Column(Boolean, default=False)
+    important = Column(Boolean, default=False)
+    due_date = Column(Date, nullable=True)
+    tag = Column(String, nullable=True)
+    position = Column(Integer, nullable=True)
+    quadrant = Column(Integer, nullable=True)
+    status = Column(String, default="done")
+    recurrence_pattern = Column(String, nullable=True)
+    recurrence_end_date = Column(Date, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime, nullable=True, index=True)
+    time_spent = Column(Integer, nullable=False, default=0, server_default="0")
+
+    archived_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+    subtasks = relationship(
+        "SubtaskArchive", back_populates="task", cascade="all, delete-orphan"
+    )
+
+
+class SubtaskArchive(Base):
+    __tablename__ = "subtasks_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    task_id = Column(
+        Integer, ForeignKey("tasks_archive.id"), nullable=False, index=True
+    )
+
+    title = Column(String, nullable=False)
+    status = Column(String, default="todo")
+    position = Column(Integer, nullable=True)
+    time_spent = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True))
+
+    task = relationship("TaskArchive", back_populates="subtasks")
+
+
+class DailyStat(Base):
+    """Per-day rollup of task activity, maintained incrementally by `crud`.
+
+    One row per (day, quadrant, tag). Rows with `tag = ""` count every task;
+    a task also counts once in the row of each of its tags, so per-tag rows
+    overlap and are never summed together. Days are UTC.
+    """
+
+    __tablename__ = "daily_stats"
+
+    day = Column(Date, primary_key=True)
+    quadrant = Column(Integer, primary_key=True)
+    tag = Column(String, primary_key=True, default="")
+
+    created = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    tracked_seconds = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class TimeEntry(Base):
+    """Append-only time tracking entry (timer run or manual entry).
+
+    `task_id` is not a foreign key: entries outlive archiving. `quadrant` and
+    `tag` are snapshots taken when the time is logged, so the `daily_stats`
+    rollup can be rebuilt from this table alone. `day` is the UTC day the
+    time was spent (timer start day).
+    """
+
+    __tablename__ = "time_entries"
+    __table_args__ = (
+        Index("ix_time_entries_task_day", "task_id", "day"),
+        Index("ix_time_entries_day", "day"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False)
+    subtask_id = Column(Integer, nullable=True)
+    day = Column(Date, nullable=False)
+    started_at = Column(DateTime, nullable=True)  # chrono uniquement (UTC)
+    seconds = Column(Integer, nullable=False)
+    quadrant = Column(Integer, nullable=False)
+    tag = Column(String, nullable=False, default="")
+    source = Column(String, nullable=False)  # "timer" / "manual"
+
+    created_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
+class Change(Base):
+    """Append-only change log entry, written in the same transaction as the
+    task/subtask mutation it describes.
+
+    `seq` is monotonically increasing (AUTOINCREMENT: never reused, even
+    after compaction) and doubles as the data version of the database.
+    """
+
+    __tablename__ = "changes"
+    __table_args__ = (
+        Index("ix_changes_entity", "entity", "entity_id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)  # "task" / "subtask"
+    entity_id = Column(Integer, nullable=False)
+    # parent task id for subtask entries (a task tombstone implies its subtasks)
+    task_id = Column(Integer, nullable=True)
+    op = Column(String, nullable=False)  # "upsert" / "delete"
+
+    created_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
+class ChangeConsumer(Base):
+    """Last change sequence acknowledged by a named delta-sync consumer."""
+
+    __tablename__ = "change_consumers"
+
+    name = Column(String, primary_key=True)
+    last_seq = Column(Integer, nullable=False, default=0)
+    updated_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
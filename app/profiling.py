@@ -0,0 +1,231 @@
+"""On-demand request profiling (opt-in, disabled by default).
+
+A request carrying a valid signed token (`X-Profile` header or `profile`
+query parameter) runs under a sampling profiler and the result is saved as
+a speedscope file (https://www.speedscope.app) in `PROFILE_DIR`.
+
+Enabled only when `PROFILE_SECRET` is set. A token is
+`<expiry unix time>.<hex HMAC-SHA256 of the expiry>`;
+`scripts/profile_token.py` prints one. At most one request is profiled at a
+time, and no more than one every `PROFILE_MIN_INTERVAL` seconds.
+
+The sampler reads every thread's stack (`sys._current_frames`), so sync
+endpoints running in the threadpool are captured too. Stacks of requests
+served concurrently also show up, grouped under their thread name.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+
+from .database import BASE_DIR
+
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET", "")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(BASE_DIR, "data", "profiles"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "2"))
+PROFILE_MIN_INTERVAL = float(os.environ.get("PROFILE_MIN_INTERVAL", "10"))
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", "50"))
+
+# Jamais profilés : la consultation des profils ne doit pas en créer
+EXEMPT_PREFIXES = ("/api/profiles",)
+PROFILE_NAME = re.compile(r"^[\w.-]+\.speedscope\.json$")
+
+# Feuilles de pile d'un thread inactif (attente de travail / d'E-S)
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "base_events.py")
+
+
+def make_token(secret: str, ttl: int = 3600) -> str:
+    """Return a profiling token valid for `ttl` seconds."""
+    expiry = str(int(time.time()) + ttl)
+    sig = hmac.new(secret.encode(), expiry.encode(), hashlib.sha256).hexdigest()
+    return f"{expiry}.{sig}"
+
+
+def verify_token(token: Optional[str], secret: str = None) -> bool:
+    """Check the signature and expiry of `token` (False when disabled)."""
+    secret = PROFILE_SECRET if secret is None else secret
+    if not secret or not token or "." not in token:
+        return False
+    expiry, _, sig = token.partition(".")
+    expected = hmac.new(secret.encode(), expiry.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(sig, expected):
+        return False
+    return expiry.isdigit() and int(expiry) >= time.time()
+
+
+class Sampler:
+    """Background thread sampling the stacks of all other threads."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: List[Tuple[Tuple, float]] = []  # (stack, weight)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.append((names.get(ident, str(ident)), "<thread>", 0))
+                self.samples.append((tuple(reversed(stack)), weight))
+
+
+def to_speedscope(sampler: Sampler, name: str) -> Dict:
+    """Convert the samples to the speedscope "sampled" file format."""
+    frames: List[Dict] = []
+    index: Dict[Tuple, int] = {}
+    samples, weights = [], []
+    for stack, weight in sampler.samples:
+        ids = []
+        for key in stack:
+            if key not in index:
+                index[key] = len(frames)
+                func, path, line = key
+                frames.append({"name": func, "file": path, "line": line})
+            ids.append(index[key])
+        samples.append(ids)
+        weights.append(round(weight * 1000, 3))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sampler.elapsed * 1000, 3),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+        "name": name,
+        "exporter": "app.profiling",
+    }
+
+
+def list_profiles(directory: str = None) -> List[Dict]:
+    """Saved profiles, newest first."""
+    directory = directory or PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    out = []
+    for entry in os.scandir(directory):
+        if PROFILE_NAME.match(entry.name):
+            stat = entry.stat()
+            out.append(
+                {
+                    "name": entry.name,
+                    "size": stat.st_size,
+                    "created_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                }
+            )
+    return sorted(out, key=lambda p: p["name"], reverse=True)
+
+
+def _save(directory: str, name: str, data: Dict, max_files: int) -> None:
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    for old in list_profiles(directory)[max_files:]:
+        os.remove(os.path.join(directory, old["name"]))
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that carry a valid token."""
+
+    def __init__(
+        self,
+        app,
+        secret: str = None,
+        directory: str = None,
+        interval_ms: float = PROFILE_INTERVAL_MS,
+        min_interval: float = PROFILE_MIN_INTERVAL,
+        max_files: int = PROFILE_MAX_FILES,
+    ):
+        self.app = app
+        self.secret = PROFILE_SECRET if secret is None else secret
+        self.directory = directory or PROFILE_DIR
+        self.interval = interval_ms / 1000
+        self.min_interval = min_interval
+        self.max_files = max_files
+        self._busy = False
+        self._last_started = float("-inf")
+
+    def _token(self, scope) -> Optional[str]:
+        for key, value in scope.get("headers", ()):
+            if key == b"x-profile":
+                return value.decode("latin-1")
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        return (query.get("profile") or [None])[0]
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not self.secret
+            or scope["path"].startswith(EXEMPT_PREFIXES)
+            or not verify_token(self._token(scope), self.secret)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        now = time.monotonic()
+        if self._busy or now - self._last_started < self.min_interval:
+            await self.app(scope, receive, _with_header(send, "rate-limited"))
+            return
+        self._busy = True
+        self._last_started = now
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = re.sub(r"[^\w]+", "_", scope["path"]).strip("_") or "root"
+        name = f"{stamp}-{scope['method']}-{slug[:60]}.speedscope.json"
+        sampler = Sampler(self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, _with_header(send, name))
+        finally:
+            sampler.stop()
+            self._busy = False
+            data = to_speedscope(sampler, f"{scope['method']} {scope['path']}")
+            await run_in_threadpool(_save, self.directory, name, data, self.max_files)
+
+
+def _with_header(send, value: str):
+    async def send_wrapper(message):
+        if message["type"] == "http.response.start":
+            message["headers"] = list(message.get("headers", [])) + [
+                (b"x-profile", value.encode("latin-1"))
+            ]
+        await send(message)
+
+    return send_wrapper
@@ -0,0 +1,240 @@
+"""Deadline reminders: a timer heap over the due dates of open tasks.
+
+The heap is loaded once at startup (open tasks due today or later: one range
+query on `ix_tasks_due_date`), then kept up to date from the change events
+every `crud` mutation publishes on the bus: O(log n) per change, no periodic
+scan of `tasks`. Each task gets two reminders, `due_today` at REMINDER_HOUR
+on its due date and `overdue` at midnight the day after. Fired reminders are
+logged and published on the bus (SSE `event: reminder`).
+"""
+
+import asyncio
+import heapq
+import logging
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import models
+from .database import SessionLocal
+from .events import bus
+
+logger = logging.getLogger(__name__)
+
+REMINDERS_ENABLED = os.environ.get("REMINDERS_ENABLED", "1") == "1"
+REMINDER_HOUR = int(os.environ.get("REMINDER_HOUR", "9"))
+# Réveil au moins toutes les heures (changement d'heure système, veille)
+MAX_SLEEP_SECONDS = 3600.0
+
+
+def fire_times(due: date) -> List[Tuple[datetime, str]]:
+    """(local time, kind) of the reminders of a task due on `due`."""
+    return [
+        (datetime.combine(due, time(REMINDER_HOUR)), "due_today"),
+        (datetime.combine(due + timedelta(days=1), time.min), "overdue"),
+    ]
+
+
+class ReminderScheduler:
+    """Min-heap of (fire time, task id, kind, generation) entries.
+
+    A task's entries are pushed when its due date changes; older entries stay
+    in the heap and are skipped when popped (their generation no longer
+    matches). The heap is rebuilt once stale entries outnumber live ones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap: List[tuple] = []
+        # tâche ouverte suivie -> (échéance, titre, génération)
+        self._tasks: Dict[int, Tuple[date, str, int]] = {}
+        self._generation = 0
+        self._stale = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.fired = 0
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def load(self, db: Session, now: Optional[datetime] = None) -> int:
+        """(Re)load the open tasks that still have a reminder ahead."""
+        now = now or datetime.now()
+        T = models.Task
+        rows = db.execute(
+            select(T.id, T.title, T.due_date).where(
+                T.status != "done", T.due_date >= now.date()
+            )
+        ).all()
+        with self._lock:
+            self._tasks, self._heap, self._stale = {}, [], 0
+            for task_id, title, due in rows:
+                self._generation += 1
+                self._tasks[task_id] = (due, title, self._generation)
+                self._heap.extend(self._entries(task_id, due, now))
+            heapq.heapify(self._heap)
+        self._wake()
+        return len(rows)
+
+    def _entries(self, task_id: int, due: date, now: datetime) -> list:
+        return [
+            (at, task_id, kind, self._generation)
+            for at, kind in fire_times(due)
+            if at > now
+        ]
+
+    def track(
+        self,
+        task_id: int,
+        due: Optional[date],
+        title: str = "",
+        now: Optional[datetime] = None,
+    ) -> None:
+        """Schedule the reminders of an open task due on `due`; `due=None`
+        stops tracking it (done, deleted or no due date)."""
+        now = now or datetime.now()
+        with self._lock:
+            previous = self._tasks.get(task_id)
+            if previous is not None and previous[0] == due:
+                # Même échéance : les entrées en place restent valables
+                self._tasks[task_id] = (due, title, previous[2])
+                return
+            if previous is not None:
+                del self._tasks[task_id]
+                self._stale += 2
+            earliest = self._heap[0][0] if self._heap else None
+            if due is not None:
+                self._generation += 1
+                entries = self._entries(task_id, due, now)
+                if entries:  # sinon tous ses rappels sont déjà passés
+                    self._tasks[task_id] = (due, title, self._generation)
+                for entry in entries:
+                    heapq.heappush(self._heap, entry)
+            if self._stale > len(self._heap) // 2 + 64:
+                self._compact()
+            wake = bool(self._heap) and (
+                earliest is None or self._heap[0][0] < earliest
+            )
+        if wake:
+            self._wake()
+
+    def _compact(self) -> None:
+        self._heap = [e for e in self._heap if not self._is_stale(e)]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def on_event(self, evt: dict) -> None:
+        """Bus listener: follow the task changes published by `crud`."""
+        if evt.get("entity") != "task":
+            return
+        data = evt.get("data") or {}
+        if evt.get("op") != "upsert" or data.get("status") == "done":
+            self.track(evt["id"], None)
+            return
+        due = data.get("due_date")
+        self.track(
+            evt["id"], date.fromisoformat(due) if due else None, data.get("title", "")
+        )
+
+    def pop_due(self, now: Optional[datetime] = None) -> List[dict]:
+        """Pop the reminders whose time has come (skipping stale entries)."""
+        now = now or datetime.now()
+        fired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if self._is_stale(entry):
+                    self._stale = max(self._stale - 1, 0)
+                    continue
+                at, task_id, kind, _ = entry
+                due, title, _ = self._tasks[task_id]
+                if kind == "overdue":
+                    del self._tasks[task_id]  # plus rien à rappeler
+                fired.append(
+                    {
+                        "entity": "reminder",
+                        "kind": kind,
+                        "id": task_id,
+                        "task_id": task_id,
+                        "title": title,
+                        "due_date": due.isoformat(),
+                        "at": at.isoformat(),
+                    }
+                )
+        return fired
+
+    def _is_stale(self, entry: tuple) -> bool:
+        current = self._tasks.get(entry[1])
+        return current is None or current[2] != entry[3]
+
+    def next_fire_time(self) -> Optional[datetime]:
+        """Time of the next live reminder (stale entries on top are dropped)."""
+        with self._lock:
+            while self._heap and self._is_stale(self._heap[0]):
+                heapq.heappop(self._heap)
+                self._stale = max(self._stale - 1, 0)
+            return self._heap[0][0] if self._heap else None
+
+    def emit(self, reminder: dict) -> None:
+        self.fired += 1
+        logger.info(
+            "reminder %s: task %d %r (due %s)",
+            reminder["kind"],
+            reminder["task_id"],
+            reminder["title"],
+            reminder["due_date"],
+        )
+        bus.publish(reminder)
+
+    def _wake(self) -> None:
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def run(self) -> None:
+        """Fire reminders on time until cancelled."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            self._wakeup.clear()
+            for reminder in self.pop_due():
+                self.emit(reminder)
+            delay = MAX_SLEEP_SECONDS
+            next_at = self.next_fire_time()
+            if next_at is not None:
+                delay = min(delay, max((next_at - datetime.now()).total_seconds(), 0))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Planificateur partagé par l'application
+scheduler = ReminderScheduler()
+
+
+def _load() -> int:
+    db = SessionLocal()
+    try:
+        return scheduler.load(db)
+    finally:
+        db.close()
+
+
+async def run_forever() -> None:
+    """Load the heap, follow the bus and fire reminders until cancelled."""
+    bus.add_listener(scheduler.on_event)
+    try:
+        try:
+            tracked = await run_in_threadpool(_load)
+            logger.info("reminders: %d task(s) with an upcoming due date", tracked)
+        except Exception:
+            logger.exception("reminders: initial load failed")
+        await scheduler.run()
+    finally:
+        bus.remove_listener(scheduler.on_event)
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Optional
+
+from .. import schemas, agenda, crud, ics
+from ..database import get_db
+
+router = APIRouter(prefix="/api/agenda", tags=["agenda"])
+
+# Garde-fou : une année de calendrier par appel
+MAX_RANGE_DAYS = 366
+
+
+@router.get("/", response_model=schemas.AgendaOut)
+def get_agenda(
+    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+):
+    """Tasks due between `from` and `to` (default: the next 30 days), plus the
+    virtual future occurrences of open recurring series."""
+    start = start or date.today()
+    end = end or start + timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=422, detail="'from' must be before 'to'")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=422, detail="Date range too large")
+    return agenda.get_agenda(db, start, end)
+
+
+@router.get("/feed.ics", response_class=StreamingResponse)
+def get_ics_feed(request: Request, db: Session = Depends(get_db)):
+    """iCalendar feed of the open tasks with a due date (recurring series as
+    RRULEs). Polls with the current ETag get a 304 after one version check."""
+    version = crud.get_data_version(db)
+    tag = ics.etag(version)
+    headers = {"ETag": tag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), tag):
+        return Response(status_code=304, headers=headers)
+    _, events = ics.get_feed(db, version)
+    return StreamingResponse(
+        ics.stream(events),
+        media_type="text/calendar; charset=utf-8",
+        headers=headers,
+    )
+
+
+def _etag_matches(header: Optional[str], tag: str) -> bool:
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == tag for c in candidates)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from .. import schemas, crud
+from ..database import get_db
+
+router = APIRouter(prefix="/api/changes", tags=["changes"])
+
+
+@router.get("/", response_model=schemas.ChangeFeedOut)
+def list_changes(
+    db: Session = Depends(get_db),
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    consumer: Optional[str] = None,
+):
+    """Return the upserts and delete tombstones after `since`.
+
+    Clients store `last_seq` and pass it back as `since` on the next call.
+    Passing `consumer` acknowledges `since` for that consumer, which lets the
+    log be compacted once every consumer has advanced. If `reset` is true the
+    client must drop its local state and apply the returned full snapshot.
+    """
+    feed = crud.get_changes(db, since=since, limit=limit)
+    if consumer:
+        crud.ack_changes(db, consumer, feed["since"])
+    return feed
+
+
+@router.post("/compact")
+def compact_changes(db: Session = Depends(get_db)):
+    """Compact the change log up to the lowest acknowledged sequence."""
+    return {"deleted": crud.compact_changes(db)}
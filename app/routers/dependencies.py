@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from .. import schemas, crud
+from ..database import get_db
+
+router = APIRouter(prefix="/api/tasks/{task_id}/dependencies", tags=["dependencies"])
+
+
+@router.get("/", response_model=schemas.TaskDependenciesOut)
+def get_dependencies(task_id: int, db: Session = Depends(get_db)):
+    """Tasks this task is blocked by, and tasks it blocks."""
+    deps = crud.get_task_dependencies(db, task_id)
+    if deps is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return deps
+
+
+@router.post("/", response_model=schemas.TaskDependenciesOut)
+def add_dependency(
+    task_id: int, dep_in: schemas.DependencyCreate, db: Session = Depends(get_db)
+):
+    """Mark the task as blocked by `depends_on_id`; 409 if that would close
+    a cycle."""
+    try:
+        deps = crud.add_task_dependency(db, task_id, dep_in.depends_on_id)
+    except crud.DependencyCycleError as exc:
+        raise HTTPException(
+            status_code=409, detail={"message": str(exc), "cycle": exc.path}
+        )
+    if deps is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return deps
+
+
+@router.delete("/{depends_on_id}", response_model=schemas.TaskDependenciesOut)
+def remove_dependency(task_id: int, depends_on_id: int, db: Session = Depends(get_db)):
+    """Remove a dependency of the task."""
+    deps = crud.remove_task_dependency(db, task_id, depends_on_id)
+    if deps is None:
+        raise HTTPException(status_code=404, detail="Dependency not found")
+    return deps
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from ..events import bus
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+# Intervalle des commentaires keep-alive (secondes)
+KEEPALIVE_SECONDS = 15.0
+
+
+def format_sse(evt: dict) -> str:
+    """Serialize a bus event as one Server-Sent Events message."""
+    lines = []
+    if evt.get("seq") is not None:
+        lines.append(f"id: {evt['seq']}")
+    lines.append(f"event: {evt.get('entity', 'message')}")
+    lines.append(f"data: {json.dumps(evt, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get("/")
+async def stream_events(request: Request):
+    """Stream task/subtask changes as Server-Sent Events.
+
+    Each message carries the change sequence as its id. A reconnecting client
+    (`Last-Event-ID` header) first receives a `resync` event, since changes
+    published while it was away are not replayed; `/api/changes/` serves
+    that catch-up.
+    """
+    sub = bus.subscribe()
+    last_event_id = request.headers.get("last-event-id")
+
+    async def gen():
+        try:
+            yield "retry: 3000\n\n"
+            if last_event_id:
+                yield (
+                    f"event: resync\ndata: "
+                    f"{json.dumps({'since': last_event_id})}\n\n"
+                )
+            while True:
+                try:
+                    evt = await sub.get(timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if evt is None:
+                    # Consommateur trop lent : on ferme, le client se reconnecte
+                    break
+                yield format_sse(evt)
+        finally:
+            sub.close()
+
+    return StreamingResponse(
+        gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
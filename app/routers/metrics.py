@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from .. import admission
+from ..metrics import registry
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """Expose the request metrics in the Prometheus text format."""
+    body = registry.render() + admission.render_metrics()
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,36 @@
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from .. import profiling, schemas
+
+router = APIRouter(prefix="/api/profiles", tags=["profiles"])
+
+
+def require_token(
+    x_profile: Optional[str] = Header(None), profile: Optional[str] = Query(None)
+):
+    """Admin access: the same signed token as the profiling trigger."""
+    if not profiling.PROFILE_SECRET:
+        raise HTTPException(status_code=404, detail="Profiling disabled")
+    if not profiling.verify_token(x_profile or profile):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@router.get(
+    "/", response_model=List[schemas.ProfileOut], dependencies=[Depends(require_token)]
+)
+def list_profiles():
+    """List the captured profiles, newest first."""
+    return profiling.list_profiles()
+
+
+@router.get("/{name}", dependencies=[Depends(require_token)])
+def download_profile(name: str):
+    """Download one profile (open it on https://www.speedscope.app)."""
+    path = os.path.join(profiling.PROFILE_DIR, name)
+    if not profiling.PROFILE_NAME.match(name) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Literal, Optional
+
+from .. import schemas, crud, analytics
+from ..database import get_db
+
+router = APIRouter(prefix="/api/stats", tags=["stats"])
+
+# Garde-fou : au plus ~10 ans de points quotidiens
+MAX_RANGE_DAYS = 3660
+
+
+@router.get("/timeseries", response_model=schemas.TimeseriesOut)
+def stats_timeseries(
+    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    bucket: Literal["day", "week", "month"] = "day",
+    quadrant: Optional[int] = Query(None, ge=1, le=4),
+    tag: Optional[str] = None,
+):
+    """Created/completed task counts per day, week or month.
+
+    Defaults to the last 30 days. Served from the `daily_stats` rollup.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=422, detail="'from' must be before 'to'")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=422, detail="Date range too large")
+
+    points = crud.get_stats_timeseries(
+        db, start, end, bucket=bucket, quadrant=quadrant, tag=tag
+    )
+    return {"bucket": bucket, "start": start, "end": end, "points": points}
+
+
+@router.get("/time", response_model=schemas.TrackedTimeOut)
+def stats_tracked_time(
+    db: Session = Depends(get_db),
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+):
+    """Tracked time per quadrant (seconds), default the last 30 days.
+
+    Served from the `daily_stats` rollup.
+    """
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=422, detail="'from' must be before 'to'")
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=422, detail="Date range too large")
+
+    quadrants = crud.get_tracked_time(db, start, end)
+    return {
+        "start": start,
+        "end": end,
+        "total_seconds": sum(quadrants.values()),
+        "quadrants": quadrants,
+    }
+
+
+@router.get("/analytics", response_model=schemas.AnalyticsOut)
+def stats_analytics(db: Session = Depends(get_db)):
+    """Lead-time percentiles, per-quadrant throughput, overdue rates and the
+    rolling average of completions, over hot and archived tasks."""
+    return analytics.get_analytics(db)
@@ -19,6 +19,36 @@ def create_subtask(
     return subtask
 
 
+@router.post("/batch", response_model=List[schemas.SubtaskOut])
+def create_subtasks_batch(
+    task_id: int, payload: schemas.SubtaskBatchCreate, db: Session = Depends(get_db)
+):
+    """Create several subtasks at once (positions allocated as a block)."""
+    subtasks = crud.create_subtasks(db, task_id, payload.items)
+    if subtasks is None:
+        raise HTTPException(status_code=404, detail="Parent task not found")
+    return subtasks
+
+
+@router.post("/status")
+def set_subtasks_status(
+    task_id: int, payload: schemas.SubtaskBulkStatus, db: Session = Depends(get_db)
+):
+    """Check / uncheck every subtask of a task (or the given `ids`)."""
+    if not crud.task_exists(db, task_id):
+        raise HTTPException(status_code=404, detail="Parent task not found")
+    updated = crud.set_subtasks_status(db, task_id, payload.status, payload.ids)
+    return {"updated": [s.id for s in updated]}
+
+
+@router.delete("/done")
+def delete_done_subtasks(task_id: int, db: Session = Depends(get_db)):
+    """Delete the completed subtasks of a task."""
+    if not crud.task_exists(db, task_id):
+        raise HTTPException(status_code=404, detail="Parent task not found")
+    return {"deleted": crud.delete_done_subtasks(db, task_id)}
+
+
 @router.get("/", response_model=List[schemas.SubtaskOut])
 def list_subtasks(task_id: int, db: Session = Depends(get_db)):
     """Get all subtasks for a task."""
@@ -42,8 +72,8 @@ def update_subtask(
     db: Session = Depends(get_db),
 ):
     """Update a subtask."""
-    subtask = crud.update_subtask(db, subtask_id, subtask_in)
-    if not subtask or subtask.task_id != task_id:
+    subtask = crud.update_subtask(db, subtask_id, subtask_in, task_id=task_id)
+    if not subtask:
         raise HTTPException(status_code=404, detail="Subtask not found")
     return subtask
 
@@ -51,11 +81,7 @@ def update_subtask(
 @router.delete("/{subtask_id}")
 def delete_subtask(task_id: int, subtask_id: int, db: Session = Depends(get_db)):
     """Delete a subtask."""
-    subtask = crud.get_subtask(db, subtask_id)
-    if not subtask or subtask.task_id != task_id:
-        raise HTTPException(status_code=404, detail="Subtask not found")
-
-    ok = crud.delete_subtask(db, subtask_id)
+    ok = crud.delete_subtask(db, subtask_id, task_id=task_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Subtask not found")
     return {"ok": True}
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from .. import schemas, crud
+from ..database import get_db
+
+router = APIRouter(prefix="/api/tags", tags=["tags"])
+
+
+@router.get("/", response_model=List[schemas.TagOut])
+def list_tags(
+    db: Session = Depends(get_db),
+    prefix: Optional[str] = None,
+    include_empty: bool = False,
+):
+    """Tags with their task counts (all / not done), most used first.
+
+    Counters are maintained on every mutation: no aggregation at read time.
+    """
+    return crud.get_tags(db, prefix=prefix, include_empty=include_empty)
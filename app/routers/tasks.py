@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from .. import schemas, crud
 from ..database import get_db
@@ -17,9 +17,60 @@ def list_tasks(
     q: Optional[str] = None,
     tag: Optional[str] = None,
     sort: Optional[str] = None,
+    include_archived: bool = False,
+    tags: Optional[List[str]] = Query(None),
+    tag_mode: Literal["all", "any"] = "all",
+    due: Optional[Literal[crud.LIST_SECTIONS]] = None,
+    quadrant: Optional[int] = Query(None, ge=1, le=4),
 ):
+    """`tag` / repeated `tags` (comma-separated values allowed) keep the
+    tasks carrying all of them, or any with `tag_mode=any`."""
     return crud.get_tasks(
-        db, status=status, urgent=urgent, important=important, q=q, tag=tag, sort=sort
+        db,
+        status=status,
+        urgent=urgent,
+        important=important,
+        q=q,
+        tag=tag,
+        sort=sort,
+        include_archived=include_archived,
+        tags=tags,
+        tag_mode=tag_mode,
+        due=due,
+        quadrant=quadrant,
+    )
+
+
+@router.get("/facets", response_model=schemas.TaskFacetsOut)
+def task_facets(
+    db: Session = Depends(get_db),
+    status: Optional[str] = None,
+    urgent: Optional[bool] = None,
+    important: Optional[bool] = None,
+    q: Optional[str] = None,
+    tag: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    tag_mode: Literal["all", "any"] = "all",
+    due: Optional[Literal[crud.LIST_SECTIONS]] = None,
+    quadrant: Optional[int] = Query(None, ge=1, le=4),
+):
+    """Counts per value of each filter (status, urgent, important, due
+    bucket, quadrant) for the same filters as the task list, in one query.
+
+    A facet is counted without its own filter: each count is what selecting
+    that value would return.
+    """
+    return crud.get_task_facets(
+        db,
+        status=status,
+        urgent=urgent,
+        important=important,
+        due=due,
+        quadrant=quadrant,
+        q=q,
+        tag=tag,
+        tags=tags,
+        tag_mode=tag_mode,
     )
 
 
@@ -28,12 +79,83 @@ def create_task(task_in: schemas.TaskCreate, db: Session = Depends(get_db)):
     return crud.create_task(db, task_in)
 
 
-@router.get("/{task_id}", response_model=schemas.TaskOut)
-def get_one_task(task_id: int, db: Session = Depends(get_db)):
-    task = crud.get_task(db, task_id)
+TASK_INCLUDES = ("subtasks", "stats")
+MAX_DETAIL_IDS = 200
+
+
+def _parse_include(include: Optional[str]) -> set:
+    parts = {p.strip() for p in (include or "").split(",") if p.strip()}
+    unknown = parts.difference(TASK_INCLUDES)
+    if unknown:
+        raise HTTPException(
+            status_code=422, detail=f"Unknown include: {', '.join(sorted(unknown))}"
+        )
+    return parts
+
+
+def _task_detail(task, include: set) -> schemas.TaskDetailOut:
+    """Detail document of a task; `task.subtasks` must be loaded if
+    `include` asks for subtasks or stats."""
+    data = schemas.TaskOut.model_validate(task).model_dump()
+    if "subtasks" in include:
+        data["subtasks"] = [schemas.SubtaskOut.model_validate(s) for s in task.subtasks]
+    if "stats" in include:
+        total = len(task.subtasks)
+        done = sum(1 for s in task.subtasks if s.status == "done")
+        data["stats"] = schemas.TaskStatsOut(
+            subtasks_total=total,
+            subtasks_done=done,
+            progress=round(done / total, 4) if total else 0.0,
+            next_occurrence=crud.next_occurrence_date(task),
+        )
+    return schemas.TaskDetailOut(**data)
+
+
+@router.get(
+    "/details",
+    response_model=List[schemas.TaskDetailOut],
+    response_model_exclude_unset=True,
+)
+def get_task_details(
+    ids: str,
+    include: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Detail documents of several tasks (`ids=1,2,3`), in the order given;
+    unknown ids are skipped. Same `include` as `GET /api/tasks/{id}`."""
+    try:
+        task_ids = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be integers")
+    if len(task_ids) > MAX_DETAIL_IDS:
+        raise HTTPException(
+            status_code=422, detail=f"At most {MAX_DETAIL_IDS} ids per call"
+        )
+    parts = _parse_include(include)
+    tasks = crud.get_task_details(db, task_ids, with_subtasks=bool(parts))
+    return [_task_detail(t, parts) for t in tasks]
+
+
+# exclude_unset : sans `include`, même document qu'un TaskOut
+@router.get(
+    "/{task_id}",
+    response_model=schemas.TaskDetailOut,
+    response_model_exclude_unset=True,
+)
+def get_one_task(
+    task_id: int, include: Optional[str] = None, db: Session = Depends(get_db)
+):
+    """A task; `include=subtasks,stats` embeds its ordered subtasks and the
+    derived fields (subtask progress, next recurrence date), loaded with it
+    in one call."""
+    parts = _parse_include(include)
+    if not parts:
+        task = crud.get_task(db, task_id)
+    else:
+        task = next(iter(crud.get_task_details(db, [task_id])), None)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    return _task_detail(task, parts)
 
 
 @router.put("/{task_id}", response_model=schemas.TaskOut)
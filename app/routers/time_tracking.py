@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from .. import schemas, crud
+from ..database import get_db
+
+router = APIRouter(prefix="/api/tasks/{task_id}", tags=["time"])
+
+
+@router.post("/timer/start", response_model=schemas.TaskOut)
+def start_timer(
+    task_id: int,
+    payload: Optional[schemas.TimerStart] = None,
+    db: Session = Depends(get_db),
+):
+    """Start the task's timer (optionally on one of its subtasks); no-op if
+    it is already running."""
+    subtask_id = payload.subtask_id if payload else None
+    task = crud.start_timer(db, task_id, subtask_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task or subtask not found")
+    return task
+
+
+@router.post("/timer/stop", response_model=schemas.TaskOut)
+def stop_timer(task_id: int, db: Session = Depends(get_db)):
+    """Stop the task's timer and log the elapsed time; no-op if idle."""
+    task = crud.stop_timer(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+
+@router.get("/time", response_model=List[schemas.TimeEntryOut])
+def list_time_entries(
+    task_id: int,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """Latest time entries of the task, newest first."""
+    return crud.get_time_entries(db, task_id, limit=limit)
+
+
+@router.post("/time", response_model=schemas.TimeEntryOut)
+def add_time_entry(
+    task_id: int, entry_in: schemas.TimeEntryCreate, db: Session = Depends(get_db)
+):
+    """Log time spent on the task (or one of its subtasks) by hand."""
+    entry = crud.add_time_entry(db, task_id, entry_in)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Task or subtask not found")
+    return entry
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Literal, Optional
 from datetime import datetime, date
 
 
@@ -11,7 +11,8 @@ class TaskBase(BaseModel):
     due_date: Optional[date] = None  # date (YYYY-MM-DD)
     status: str = "todo"  # "todo" / "done"
     # optional fields
-    tag: Optional[str] = None
+    tag: Optional[str] = None  # one or more tags, comma-separated
+    tags: Optional[list[str]] = None  # takes precedence over `tag`
     position: Optional[int] = None
     quadrant: Optional[int] = None
     # v0.5: recurrence fields
@@ -32,6 +33,7 @@ class TaskUpdate(BaseModel):
     status: Optional[str] = None
     completed_at: Optional[datetime] = None
     tag: Optional[str] = None
+    tags: Optional[list[str]] = None
     position: Optional[int] = None
     quadrant: Optional[int] = None
     recurrence_pattern: Optional[str] = None
@@ -44,10 +46,34 @@ class TaskOut(TaskBase):
     updated_at: datetime
     completed_at: Optional[datetime] = None
     quadrant: Optional[int] = None
+    tags: list[str] = []
+    archived: bool = False  # only set by include_archived queries
+    # time tracking: total seconds (subtasks included), running timer
+    time_spent: int = 0
+    timer_started_at: Optional[datetime] = None
+    timer_subtask_id: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class TaskStatsOut(BaseModel):
+    subtasks_total: int
+    subtasks_done: int
+    progress: float  # subtasks done / total, 0 without subtasks
+    next_occurrence: Optional[date] = None  # recurring tasks only
+
+
+class TaskFacetsOut(BaseModel):
+    total: int  # all tasks, no filter
+    matching: int  # tasks passing every filter
+    # value -> count, each facet counted without its own filter
+    status: dict[str, int]
+    urgent: dict[str, int]
+    important: dict[str, int]
+    due: dict[str, int]
+    quadrant: dict[str, int]
+
+
 class TaskPositionUpdate(BaseModel):
     position: Optional[int]
 
@@ -86,10 +112,28 @@ class SubtaskOut(SubtaskBase):
     id: int
     task_id: int
     created_at: datetime
+    time_spent: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class TaskDetailOut(TaskOut):
+    # filled on request (`include=subtasks,stats`), left out of the
+    # response otherwise (routes use response_model_exclude_unset)
+    subtasks: Optional[list[SubtaskOut]] = None
+    stats: Optional[TaskStatsOut] = None
+
+
+# Subtask batch operations
+class SubtaskBatchCreate(BaseModel):
+    items: list[SubtaskCreate] = Field(..., min_length=1, max_length=500)
+
+
+class SubtaskBulkStatus(BaseModel):
+    status: Literal["todo", "done"]
+    ids: Optional[list[int]] = None  # None: every subtask of the task
+
+
 # Subtask bulk reorder
 class SubtaskReorderItem(BaseModel):
     id: int
@@ -98,3 +142,140 @@ class SubtaskReorderItem(BaseModel):
 
 class SubtaskBulkReorder(BaseModel):
     items: list[SubtaskReorderItem]
+
+
+# Time tracking
+class TimerStart(BaseModel):
+    subtask_id: Optional[int] = None
+
+
+class TimeEntryCreate(BaseModel):
+    seconds: int = Field(..., gt=0, le=86400)
+    day: Optional[date] = None  # default: today (UTC)
+    subtask_id: Optional[int] = None
+
+
+class TimeEntryOut(BaseModel):
+    id: int
+    task_id: int
+    subtask_id: Optional[int] = None
+    day: date
+    started_at: Optional[datetime] = None
+    seconds: int
+    source: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Dépendances "bloquée par"
+class DependencyCreate(BaseModel):
+    depends_on_id: int
+
+
+class TaskDependenciesOut(BaseModel):
+    task_id: int
+    blocked_by: list[int]  # tâches attendues
+    blocking: list[int]  # tâches qui attendent celle-ci
+    blocked: bool  # au moins une tâche attendue n'est pas terminée
+
+
+# Change feed (delta sync)
+class ChangeOut(BaseModel):
+    seq: int
+    entity: str  # "task" / "subtask"
+    id: int
+    task_id: Optional[int] = None
+    op: str  # "upsert" / "delete"
+    task: Optional[TaskOut] = None
+    subtask: Optional[SubtaskOut] = None
+
+
+class ChangeFeedOut(BaseModel):
+    since: int
+    last_seq: int
+    reset: bool = False
+    has_more: bool = False
+    changes: list[ChangeOut]
+
+
+# Stats
+class TimeseriesPoint(BaseModel):
+    start: date
+    created: int
+    completed: int
+    tracked_seconds: int = 0
+
+
+class TrackedTimeOut(BaseModel):
+    start: date
+    end: date
+    total_seconds: int
+    quadrants: dict[str, int]  # q1..q4
+
+
+class TimeseriesOut(BaseModel):
+    bucket: str
+    start: date
+    end: date
+    points: list[TimeseriesPoint]
+
+
+class QuadrantThroughput(BaseModel):
+    completed: int
+    per_week: float
+
+
+class OverdueStats(BaseModel):
+    completed_late_rate: Optional[float] = None
+    open_overdue_rate: Optional[float] = None
+    open_overdue: int
+
+
+class RollingPoint(BaseModel):
+    day: date
+    avg: float
+
+
+class AgendaItemOut(BaseModel):
+    day: date
+    task_id: int
+    title: str
+    status: str
+    quadrant: int
+    tag: Optional[str] = None
+    recurrence_pattern: Optional[str] = None
+    # occurrence future d'une série, calculée et non stockée
+    virtual: bool
+    occurrence: int  # rang après la tâche ouverte de la série (0 = réelle)
+
+
+class AgendaOut(BaseModel):
+    start: date
+    end: date
+    data_version: int
+    items: list[AgendaItemOut]
+
+
+class AnalyticsOut(BaseModel):
+    data_version: int
+    tasks: int
+    completed: int
+    lead_time_days: dict[str, Optional[float]]
+    throughput: dict[str, QuadrantThroughput]
+    overdue: OverdueStats
+    rolling_window_days: int
+    rolling_completed_per_day: list[RollingPoint]
+
+
+class ProfileOut(BaseModel):
+    name: str
+    size: int
+    created_at: datetime
+
+
+class TagOut(BaseModel):
+    name: str
+    task_count: int
+    open_count: int
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,4 @@
+"""Performance benchmarks (not collected by pytest).
+
+Run `python -m benchmarks.crud_bench --help` from the repository root.
+"""
@@ -0,0 +1,407 @@
+"""Micro-benchmarks of the `app.crud` functions on seeded SQLite databases.
+
+Usage (from the repository root):
+
+    python -m benchmarks.crud_bench --sizes 1k,100k
+    python -m benchmarks.crud_bench --sizes 1k --save-baseline
+    python -m benchmarks.crud_bench --sizes 1m --repeat 3 --check
+
+Seeded databases are cached in `benchmarks/.data/` (one file per seed
+configuration) and copied to a temporary file before each run, so write
+benchmarks never alter the cached data. Results are written as JSON and
+compared against `benchmarks/baseline.json` when it exists. The baseline
+is machine specific and not versioned: save one locally before a change.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import sqlalchemy
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app import agenda, analytics, crud, models, schemas
+from .seed import SEED_FORMAT, SeedConfig, make_engine, seed_database
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, ".data")
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+RESULTS_PATH = os.path.join(HERE, "results.json")
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def config_for(tasks: int, seed: int = 42) -> SeedConfig:
+    """Seed configuration used for a benchmark size."""
+    return SeedConfig(
+        tasks=tasks,
+        subtasks=tasks // 2,
+        tags=20,
+        recurrence_series=max(1, tasks // 200),
+        dependencies=tasks // 5,
+        done_ratio=0.4,
+        seed=seed,
+    )
+
+
+def cached_database(cfg: SeedConfig) -> str:
+    """Return the path of the seeded database for `cfg`, seeding it if needed."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"{cfg.key()}.db")
+    if not os.path.exists(path):
+        tmp = path + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        started = time.perf_counter()
+        seed_database(tmp, cfg)
+        os.replace(tmp, path)
+        print(
+            f"seeded {cfg.tasks} tasks in {time.perf_counter() - started:.1f}s",
+            file=sys.stderr,
+        )
+    return path
+
+
+# ----- Benchmark cases -----
+# A case is (name, prepare, run): `prepare(db)` is untimed and returns the
+# argument passed to the timed `run(db, arg)`.
+
+
+def _open_recurring_task(db):
+    task = crud.create_task(
+        db,
+        schemas.TaskCreate(
+            title="bench recurring",
+            urgent=True,
+            important=False,
+            due_date=date(2026, 1, 1),
+            recurrence_pattern="weekly",
+        ),
+    )
+    return task.id
+
+
+def _reorder_items(db, count: int = 100):
+    ids = [
+        row.id
+        for row in db.query(models.Task.id)
+        .order_by(models.Task.position.desc())
+        .limit(count)
+    ]
+    return [{"id": tid, "position": pos} for pos, tid in enumerate(ids, 1)]
+
+
+def _cold_analytics(db):
+    analytics._state = analytics._State()
+
+
+def _analytics_after(change):
+    """prepare: warm the analytics cache, then apply `change` (untimed)."""
+
+    def prepare(db):
+        analytics.get_analytics(db)
+        change(db)
+
+    return prepare
+
+
+def _complete_one(db):
+    task_id = db.scalar(
+        select(models.Task.id).where(models.Task.status == "todo").limit(1)
+    )
+    crud.update_task(db, task_id, schemas.TaskUpdate(status="done"))
+
+
+def _cases():
+    since = datetime(2025, 12, 1, tzinfo=timezone.utc)
+    end = date(2026, 1, 1)
+    cases = []
+    for sort in ("created_desc", "due_asc", "due_desc", "position", "ready"):
+        run = lambda db, _, s=sort: crud.get_tasks(db, sort=s)  # noqa: E731
+        cases.append((f"get_tasks[sort={sort}]", None, run))
+    filters = {
+        "status=todo": dict(status="todo"),
+        "urgent": dict(urgent=True),
+        "important": dict(important=True),
+        "q": dict(q="facture"),
+        "tag": dict(tag="tag-3"),
+        "tags=any": dict(tags=["tag-3", "tag-5"], tag_mode="any"),
+    }
+    for label, kwargs in filters.items():
+        run = lambda db, _, k=kwargs: crud.get_tasks(db, **k)  # noqa: E731
+        cases.append((f"get_tasks[{label}]", None, run))
+    cases += [
+        (
+            "get_tasks[include_archived]",
+            None,
+            lambda db, _: crud.get_tasks(db, status="todo", include_archived=True),
+        ),
+        ("get_task", None, lambda db, _: crud.get_task(db, 1)),
+        ("get_tasks_count", None, lambda db, _: crud.get_tasks_count(db)),
+        (
+            "get_task_facets",
+            None,
+            lambda db, _: crud.get_task_facets(db, status="todo", tag="tag-3"),
+        ),
+        (
+            "build_agenda[90d]",
+            None,
+            lambda db, _: agenda.build_agenda(db, end - timedelta(days=89), end),
+        ),
+        ("get_general_stats", None, lambda db, _: crud.get_general_stats(db)),
+        (
+            "get_completed_since_count",
+            None,
+            lambda db, _: crud.get_completed_since_count(db, since),
+        ),
+        ("get_eisenhower_stats", None, lambda db, _: crud.get_eisenhower_stats(db)),
+        (
+            "get_eisenhower_stats[status=todo]",
+            None,
+            lambda db, _: crud.get_eisenhower_stats(db, status="todo"),
+        ),
+        (
+            "get_stats_timeseries[day,90d]",
+            None,
+            lambda db, _: crud.get_stats_timeseries(db, end - timedelta(days=89), end),
+        ),
+        (
+            "get_stats_timeseries[week,1y]",
+            None,
+            lambda db, _: crud.get_stats_timeseries(
+                db, end - timedelta(days=364), end, bucket="week"
+            ),
+        ),
+        (
+            "create_task",
+            None,
+            lambda db, _: crud.create_task(
+                db, schemas.TaskCreate(title="bench", urgent=False, important=True)
+            ),
+        ),
+        (
+            "update_task[recurrence]",
+            _open_recurring_task,
+            lambda db, tid: crud.update_task(
+                db, tid, schemas.TaskUpdate(status="done")
+            ),
+        ),
+        ("set_positions_bulk[100]", _reorder_items, crud.set_positions_bulk),
+        # objectif : < 50 ms sur 1M tâches une fois l'historique en mémoire
+        (
+            "get_analytics[cold]",
+            _cold_analytics,
+            lambda db, _: analytics.get_analytics(db),
+        ),
+        (
+            "get_analytics[after reorder]",
+            _analytics_after(
+                lambda db: crud.set_positions_bulk(db, _reorder_items(db))
+            ),
+            lambda db, _: analytics.get_analytics(db),
+        ),
+        (
+            "get_analytics[after completion]",
+            _analytics_after(_complete_one),
+            lambda db, _: analytics.get_analytics(db),
+        ),
+    ]
+    return cases
+
+
+def _time_case(Session, prepare, run, repeat: int, warmup: int):
+    samples = []
+    for i in range(warmup + repeat):
+        # Session neuve à chaque tour : pas de cache d'identité entre mesures
+        db = Session()
+        try:
+            arg = prepare(db) if prepare else None
+            started = time.perf_counter()
+            run(db, arg)
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+        if i >= warmup:
+            samples.append(elapsed * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "repeat": repeat,
+    }
+
+
+def _reset_caches() -> None:
+    # Caches indexés par version des données : toutes les bases seedées sont
+    # en version 0, ils ne doivent pas survivre d'une taille à l'autre
+    with agenda._cache_lock:
+        agenda._cache.clear()
+    crud._dependencies = crud._DependencyCache()
+    analytics._state = analytics._State()
+
+
+def run_size(cfg: SeedConfig, repeat: int = 5, warmup: int = 1, only=None) -> dict:
+    """Run every case against a fresh copy of the seeded database for `cfg`."""
+    source = cached_database(cfg)
+    _reset_caches()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        shutil.copyfile(source, path)
+        engine = make_engine(path)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        results = {}
+        try:
+            for name, prepare, run in _cases():
+                if only and not any(part in name for part in only):
+                    continue
+                results[name] = _time_case(Session, prepare, run, repeat, warmup)
+                print(
+                    f"  {name:<38} {results[name]['median_ms']:>10.2f} ms",
+                    file=sys.stderr,
+                )
+        finally:
+            engine.dispose()
+    return results
+
+
+# ----- Baseline comparison -----
+
+
+def compare(current: dict, baseline: dict, tolerance: float, floor_ms: float) -> dict:
+    """Compare `current` against `baseline`.
+
+    A case regresses when its median exceeds the baseline median by more
+    than `tolerance` (relative) and `floor_ms` (absolute, to ignore noise on
+    sub-millisecond cases). Cases the baseline lacks are listed in `missing`
+    and `stale` is set when the baseline was measured on another seed
+    format: save a new baseline in both cases.
+    """
+    regressions, missing = [], []
+    for size, cases in current.get("results", {}).items():
+        base_cases = baseline.get("results", {}).get(size, {})
+        for name, stats in cases.items():
+            base = base_cases.get(name)
+            if not base:
+                missing.append({"size": size, "case": name})
+                continue
+            now_ms, base_ms = stats["median_ms"], base["median_ms"]
+            if now_ms > base_ms * (1 + tolerance) and now_ms - base_ms > floor_ms:
+                regressions.append(
+                    {
+                        "size": size,
+                        "case": name,
+                        "baseline_ms": base_ms,
+                        "median_ms": now_ms,
+                        "ratio": round(now_ms / base_ms, 2) if base_ms else None,
+                    }
+                )
+    seed_format = baseline.get("meta", {}).get("seed_format")
+    return {
+        "regressions": regressions,
+        "missing": missing,
+        "stale": seed_format != current.get("meta", {}).get("seed_format"),
+    }
+
+
+def _parse_sizes(value: str) -> dict:
+    sizes = {}
+    for label in value.split(","):
+        label = label.strip().lower()
+        if label in SIZES:
+            sizes[label] = SIZES[label]
+        elif label.isdigit():
+            sizes[label] = int(label)
+        else:
+            raise argparse.ArgumentTypeError(f"unknown size: {label}")
+    return sizes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--sizes",
+        type=_parse_sizes,
+        default=_parse_sizes("1k,100k"),
+        help="comma-separated sizes: 1k, 100k, 1m or a task count (default: 1k,100k)",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--only", help="comma-separated substrings: run matching cases only"
+    )
+    parser.add_argument("--out", default=RESULTS_PATH, help="results JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="write the results to the baseline file instead of comparing",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed relative slowdown before a case counts as a regression",
+    )
+    parser.add_argument("--floor-ms", type=float, default=1.0)
+    parser.add_argument(
+        "--check", action="store_true", help="exit with status 1 on regressions"
+    )
+    args = parser.parse_args(argv)
+    only = args.only.split(",") if args.only else None
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "seed_format": SEED_FORMAT,
+        },
+        "results": {},
+    }
+    for label, tasks in args.sizes.items():
+        print(f"[{label}] {tasks} tasks", file=sys.stderr)
+        cfg = config_for(tasks, seed=args.seed)
+        report["results"][label] = run_size(cfg, args.repeat, args.warmup, only)
+
+    target = args.baseline if args.save_baseline else args.out
+    with open(target, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"results written to {target}", file=sys.stderr)
+    if args.save_baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}: run with --save-baseline first")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    verdict = compare(report, baseline, args.tolerance, args.floor_ms)
+    if verdict["stale"]:
+        print("STALE baseline: measured on another seed format, save a new one")
+    for m in verdict["missing"]:
+        print(f"MISSING [{m['size']}] {m['case']}: not in baseline")
+    for r in verdict["regressions"]:
+        print(
+            f"REGRESSION [{r['size']}] {r['case']}: "
+            f"{r['baseline_ms']:.2f} ms -> {r['median_ms']:.2f} ms (x{r['ratio']})"
+        )
+    if not verdict["regressions"]:
+        print("no regression against baseline")
+    return 1 if verdict["regressions"] and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+"""HTTP load harness: drives the whole stack (routing, dependencies, pydantic,
+Jinja) and reports throughput, latency percentiles and error rates.
+
+Usage (from the repository root):
+
+    python -m benchmarks.http_load --size 1k --concurrency 8 --duration 20
+    python -m benchmarks.http_load --mix api_list=5,create=2,complete=1
+    python -m benchmarks.http_load --url http://127.0.0.1:8000 --requests 2000
+    python -m benchmarks.http_load --replay access.log --concurrency 4
+
+By default the app runs in-process through httpx's ASGI transport, on a copy
+of a seeded benchmark database (see `benchmarks.seed`). With `--url` the
+requests go to a running server instead (e.g. `uvicorn app.main:app`), which
+then uses its own database.
+
+`--replay` takes a JSON Lines file (`{"method": ..., "path": ..., "json": ...}`
+per line) or a uvicorn / common log format access log, and plays its requests
+in order instead of the synthetic mix.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+
+from .crud_bench import SIZES, cached_database, config_for
+from .seed import make_engine
+
+DEFAULT_MIX = {
+    "list": 10,
+    "matrix": 10,
+    "stats": 5,
+    "api_list": 30,
+    "create": 20,
+    "complete": 15,
+    "reorder": 10,
+}
+REORDER_BATCH = 20
+LOG_LINE = re.compile(r'"(?P<method>[A-Z]+) (?P<path>\S+) HTTP/[\d.]+"')
+
+
+# ----- Requests -----
+# Each operation returns (method, path, json_body) from the shared state.
+
+
+class State:
+    """Open task ids the workers can complete or reorder."""
+
+    def __init__(self, open_ids, rng: random.Random):
+        self.open_ids = list(open_ids)
+        self.rng = rng
+
+    def pop_open(self):
+        if not self.open_ids:
+            return None
+        i = self.rng.randrange(len(self.open_ids))
+        self.open_ids[i], self.open_ids[-1] = self.open_ids[-1], self.open_ids[i]
+        return self.open_ids.pop()
+
+    def sample(self, k: int):
+        return self.rng.sample(self.open_ids, min(k, len(self.open_ids)))
+
+
+def _op_request(op: str, state: State):
+    rng = state.rng
+    if op == "list":
+        return "GET", "/list", None
+    if op == "matrix":
+        return "GET", "/matrix", None
+    if op == "stats":
+        return "GET", "/stats", None
+    if op == "api_list":
+        return "GET", "/api/tasks/?status=todo&sort=position", None
+    if op == "create":
+        body = {
+            "title": f"load {rng.randrange(10**6)}",
+            "urgent": rng.random() < 0.5,
+            "important": rng.random() < 0.5,
+        }
+        return "POST", "/api/tasks/", body
+    if op == "complete":
+        task_id = state.pop_open()
+        if task_id is None:
+            return None
+        return "PUT", f"/api/tasks/{task_id}", {"status": "done"}
+    if op == "reorder":
+        ids = state.sample(REORDER_BATCH)
+        items = [{"id": tid, "position": pos} for pos, tid in enumerate(ids, 1)]
+        return "POST", "/api/tasks/reorder", {"items": items}
+    raise ValueError(f"unknown operation: {op}")
+
+
+def load_replay(path: str) -> list:
+    """Parse a JSON Lines request log or an access log into request tuples."""
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                entry = json.loads(line)
+                requests.append(
+                    (
+                        entry.get("method", "GET").upper(),
+                        entry["path"],
+                        entry.get("json"),
+                    )
+                )
+                continue
+            match = LOG_LINE.search(line)
+            if match:
+                requests.append((match["method"], match["path"], None))
+    return requests
+
+
+# ----- Runner -----
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples: dict, elapsed: float) -> dict:
+    """Build the report from `{label: [(latency_s, ok), ...]}`."""
+
+    def stats(values):
+        latencies = sorted(v[0] * 1000 for v in values)
+        errors = sum(1 for v in values if not v[1])
+        return {
+            "requests": len(values),
+            "errors": errors,
+            "error_rate": round(errors / len(values), 4) if values else 0.0,
+            "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        }
+
+    everything = [v for values in samples.values() for v in values]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "total": stats(everything),
+        "operations": {
+            label: stats(values) for label, values in sorted(samples.items())
+        },
+    }
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    next_request,
+    concurrency: int,
+    duration: float = None,
+    total: int = None,
+) -> dict:
+    """Run `concurrency` workers until `duration` seconds or `total` requests.
+
+    `next_request()` returns `(label, method, path, json)` or None when there
+    is nothing left to send.
+    """
+    samples = defaultdict(list)
+    sent = 0
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    async def worker():
+        nonlocal sent
+        while True:
+            if total is not None and sent >= total:
+                return
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            item = next_request()
+            if item is None:
+                return
+            sent += 1
+            label, method, path, body = item
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            samples[label].append((time.perf_counter() - t0, ok))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(samples, time.perf_counter() - started)
+
+
+def mix_requests(mix: dict, state: State):
+    """Weighted random picker over the operations of `mix`."""
+    ops = list(mix)
+    weights = [mix[op] for op in ops]
+
+    def next_request():
+        for _ in range(10):  # skip operations that have nothing to act on
+            op = state.rng.choices(ops, weights)[0]
+            req = _op_request(op, state)
+            if req is not None:
+                return (op,) + req
+        return None
+
+    return next_request
+
+
+def replay_requests(entries: list, loops: int = 1):
+    """Play `entries` in order, `loops` times, labelled by method + path."""
+    queue = iter([e for _ in range(loops) for e in entries])
+
+    def next_request():
+        entry = next(queue, None)
+        if entry is None:
+            return None
+        method, path, body = entry
+        return (f"{method} {path.split('?')[0]}", method, path, body)
+
+    return next_request
+
+
+def _open_task_ids(path: str) -> list:
+    from sqlalchemy import text
+
+    engine = make_engine(path)
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT id FROM tasks WHERE status = 'todo'"))
+            return [r[0] for r in rows]
+    finally:
+        engine.dispose()
+
+
+async def _fetch_open_ids(client: httpx.AsyncClient) -> list:
+    response = await client.get("/api/tasks/?status=todo")
+    response.raise_for_status()
+    return [t["id"] for t in response.json()]
+
+
+def print_report(report: dict) -> None:
+    header = f"{'operation':<28}{'reqs':>8}{'err%':>7}{'rps':>9}"
+    header += f"{'p50':>9}{'p95':>9}{'p99':>9}"
+    print(header)
+    rows = list(report["operations"].items()) + [("TOTAL", report["total"])]
+    for label, s in rows:
+        print(
+            f"{label[:27]:<28}{s['requests']:>8}{s['error_rate'] * 100:>6.1f}%"
+            f"{s['rps']:>9.1f}{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}"
+        )
+    print(f"elapsed: {report['elapsed_s']}s (latencies in ms)")
+
+
+def _parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown operation: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def _main(args) -> dict:
+    rng = random.Random(args.seed)
+    if args.replay:
+        next_request = replay_requests(load_replay(args.replay), args.loops)
+    else:
+        next_request = None
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+            if next_request is None:
+                state = State(await _fetch_open_ids(client), rng)
+                next_request = mix_requests(args.mix, state)
+            return await run_load(
+                client, next_request, args.concurrency, args.duration, args.requests
+            )
+
+    # In-process: the app is imported here so `--url` runs need no app setup
+    from app.database import get_db, instrument_engine
+    from app.main import app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "load.db")
+        shutil.copyfile(cached_database(config_for(SIZES[args.size])), path)
+        if next_request is None:
+            state = State(_open_task_ids(path), rng)
+            next_request = mix_requests(args.mix, state)
+
+        from sqlalchemy.orm import sessionmaker
+
+        engine = make_engine(path)
+        instrument_engine(engine)  # Server-Timing sur la base de test aussi
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench", timeout=60
+            ) as client:
+                return await run_load(
+                    client, next_request, args.concurrency, args.duration, args.requests
+                )
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            engine.dispose()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", help="target a running server instead of in-process")
+    parser.add_argument(
+        "--size",
+        choices=sorted(SIZES),
+        default="1k",
+        help="seeded database for in-process runs (default: 1k)",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--duration", type=float, default=None, help="seconds (default: 10)"
+    )
+    parser.add_argument("--requests", type=int, default=None, help="stop after N")
+    parser.add_argument(
+        "--mix",
+        type=_parse_mix,
+        default=dict(DEFAULT_MIX),
+        help="weights, e.g. list=1,api_list=5,create=2 "
+        f"(operations: {', '.join(DEFAULT_MIX)})",
+    )
+    parser.add_argument("--replay", help="request log to replay (JSONL or access log)")
+    parser.add_argument("--loops", type=int, default=1, help="replay passes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args(argv)
+    if args.duration is None and args.requests is None and not args.replay:
+        args.duration = 10.0
+
+    report = asyncio.run(_main(args))
+    report["config"] = {
+        "target": args.url or f"asgi:{args.size}",
+        "concurrency": args.concurrency,
+        "mix": None if args.replay else args.mix,
+        "replay": args.replay,
+    }
+    print_report(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return 1 if report["total"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Deterministic synthetic data for the benchmarks.
+
+`seed_database` builds a throwaway SQLite file with the app schema and a
+reproducible mix of tasks, subtasks, tags and recurrence chains: the same
+`SeedConfig` always yields the same rows.
+"""
+
+import random
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import models, crud
+from app.database import enable_foreign_keys
+
+PATTERNS = ("daily", "weekly", "monthly")
+SERIES_LENGTH = 4  # occurrences per recurrence chain (3 done + 1 open)
+CHUNK = 50_000
+WORDS = (
+    "lorem ipsum dolor sit amet rapport facture client réunion appel "
+    "budget revue planning courses sport lecture code déploiement"
+).split()
+
+
+# À incrémenter quand le schéma seedé change (invalide le cache .data/)
+SEED_FORMAT = 7
+
+
+@dataclass(frozen=True)
+class SeedConfig:
+    tasks: int = 1000
+    subtasks: int = 500
+    tags: int = 20
+    recurrence_series: int = 10
+    dependencies: int = 200
+    done_ratio: float = 0.4
+    days: int = 365  # history spread of created_at
+    seed: int = 42
+
+    def key(self) -> str:
+        """Stable file-name friendly identifier of the configuration."""
+        parts = [f"{k}{v}" for k, v in asdict(self).items()]
+        return "-".join(parts + [f"v{SEED_FORMAT}"])
+
+
+def make_engine(path: str):
+    """Engine on `path` with the connection settings used by the app."""
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    enable_foreign_keys(engine)
+    return engine
+
+
+def _fast_pragmas(dbapi_conn, _record):
+    # Seeding only: the file is throwaway, durability does not matter
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=OFF")
+    cur.execute("PRAGMA synchronous=OFF")
+    cur.close()
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(3)).capitalize()
+
+
+def _task_rows(cfg: SeedConfig, rng: random.Random, now: datetime):
+    """Yield task rows: recurrence chains first, then standalone tasks."""
+    tags = [f"tag-{i}" for i in range(cfg.tags)]
+    series_rows = min(cfg.recurrence_series * SERIES_LENGTH, cfg.tasks)
+    for i in range(cfg.tasks):
+        urgent = rng.random() < 0.5
+        important = rng.random() < 0.5
+        created = now - timedelta(seconds=rng.randrange(cfg.days * 86400))
+        due = None
+        if rng.random() < 0.7:
+            due = (created + timedelta(days=rng.randrange(-10, 60))).date()
+        row = dict(
+            id=i + 1,
+            title=_title(rng),
+            description=_title(rng) if rng.random() < 0.5 else None,
+            urgent=urgent,
+            important=important,
+            due_date=due,
+            tag=rng.choice(tags) if tags and rng.random() < 0.8 else None,
+            position=i + 1,
+            quadrant=crud._compute_quadrant_val(urgent, important),
+            status="todo",
+            recurrence_pattern=None,
+            recurrence_end_date=None,
+            created_at=created,
+            updated_at=created,
+            completed_at=None,
+        )
+        if i < series_rows:
+            # Chaîne de récurrence : toutes les occurrences sauf la dernière
+            # sont terminées
+            row["title"] = f"Série {i // SERIES_LENGTH}"
+            row["recurrence_pattern"] = PATTERNS[(i // SERIES_LENGTH) % 3]
+            done = i % SERIES_LENGTH != SERIES_LENGTH - 1
+        else:
+            done = rng.random() < cfg.done_ratio
+        if done:
+            completed = created + timedelta(seconds=rng.randrange(30 * 86400))
+            row["status"] = "done"
+            row["completed_at"] = min(completed, now).replace(tzinfo=None)
+        yield row
+
+
+def _subtask_rows(cfg: SeedConfig, rng: random.Random, now: datetime):
+    for i in range(cfg.subtasks):
+        yield dict(
+            id=i + 1,
+            task_id=rng.randrange(cfg.tasks) + 1,
+            title=_title(rng),
+            status="done" if rng.random() < cfg.done_ratio else "todo",
+            position=i % 10,
+            created_at=now - timedelta(seconds=rng.randrange(cfg.days * 86400)),
+        )
+
+
+def _dependency_rows(cfg: SeedConfig, rng: random.Random):
+    # Bloqueur toujours plus ancien (id plus petit) : graphe sans cycle
+    edges = set()
+    for _ in range(cfg.dependencies if cfg.tasks > 1 else 0):
+        task_id = rng.randrange(2, cfg.tasks + 1)
+        edges.add((task_id, rng.randrange(1, task_id)))
+    for task_id, depends_on_id in sorted(edges):
+        yield dict(task_id=task_id, depends_on_id=depends_on_id)
+
+
+def _insert_chunked(conn, table, rows) -> None:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK:
+            conn.execute(insert(table), batch)
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+
+
+def seed_database(path: str, cfg: SeedConfig = SeedConfig()) -> None:
+    """Create the schema in `path` and fill it according to `cfg`.
+
+    Rows are bulk inserted with Core statements (no change-log entries),
+    then `daily_stats` is rebuilt so the rollup matches the tasks.
+    """
+    if cfg.tasks < 1:
+        raise ValueError("cfg.tasks must be >= 1")
+    rng = random.Random(cfg.seed)
+    # Fixed reference instant so that two seeds are byte-for-byte comparable
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    engine = make_engine(path)
+    event.listen(engine, "connect", _fast_pragmas)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        _insert_chunked(conn, models.Task.__table__, _task_rows(cfg, rng, now))
+        _insert_chunked(conn, models.Subtask.__table__, _subtask_rows(cfg, rng, now))
+        _insert_chunked(
+            conn, models.TaskDependency.__table__, _dependency_rows(cfg, rng)
+        )
+
+    db = sessionmaker(bind=engine)()
+    try:
+        crud.rebuild_daily_stats(db)
+        crud.rebuild_tags(db)
+    finally:
+        db.close()
+    engine.dispose()
@@ -0,0 +1,184 @@
+"""Per-call overhead of the crud hot-path statements, legacy vs current.
+
+Usage (from the repository root):
+
+    python -m benchmarks.statement_bench
+    python -m benchmarks.statement_bench --calls 5000 --repeat 7
+
+Each case pairs the legacy `db.query(...)` form, rebuilt on every call, with
+the current `app.crud` code path (statements built once at import, bound
+parameters only). Both run the same SQL on the same seeded database, so the
+difference is the Python-side cost of building, caching and compiling the
+statement. Reported figures are medians in microseconds per call.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models
+from .crud_bench import cached_database, config_for
+from .seed import make_engine
+
+# ----- Cases -----
+# A case is (name, legacy, current): both are `fn(db, n)` where `n` is a
+# valid task id (1..size) and must return the same value.
+
+
+def _legacy_bump_daily_stats(db, day, task, created=0, completed=0):
+    quadrant = task.quadrant or crud._compute_quadrant_val(task.urgent, task.important)
+    for tag in crud._rollup_tags(task.tag):
+        stmt = sqlite_insert(models.DailyStat).values(
+            day=day,
+            quadrant=quadrant,
+            tag=tag,
+            created=created,
+            completed=completed,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "quadrant", "tag"],
+            set_={
+                "created": models.DailyStat.created + stmt.excluded.created,
+                "completed": models.DailyStat.completed + stmt.excluded.completed,
+            },
+        )
+        db.execute(stmt)
+
+
+class _Row:
+    """Stand-in task for the rollup upsert (no ORM load in the timed call)."""
+
+    quadrant, urgent, important, tag = 2, False, True, "bench"
+
+
+def _cases():
+    T, S = models.Task, models.Subtask
+    day = date(2026, 1, 1)
+    return [
+        (
+            "get_task",
+            lambda db, n: db.query(T).filter(T.id == n).first(),
+            crud.get_task,
+        ),
+        (
+            "task_exists",
+            lambda db, n: db.query(T).filter(T.id == n).first() is not None,
+            crud.task_exists,
+        ),
+        (
+            "get_subtask",
+            lambda db, n: db.query(S).filter(S.id == n).first(),
+            crud.get_subtask,
+        ),
+        (
+            "get_subtasks",
+            lambda db, n: db.query(S)
+            .filter(S.task_id == n)
+            .order_by(S.position.asc().nullslast())
+            .all(),
+            crud.get_subtasks,
+        ),
+        (
+            "max_subtask_position",
+            lambda db, n: db.query(func.max(S.position))
+            .filter(S.task_id == n)
+            .scalar(),
+            lambda db, n: db.scalar(crud._MAX_SUBTASK_POSITION, {"task_id": n}),
+        ),
+        (
+            "max_task_position",
+            lambda db, n: db.query(func.max(T.position)).scalar(),
+            lambda db, n: db.scalar(crud._MAX_TASK_POSITION),
+        ),
+        (
+            "get_tasks_count",
+            lambda db, n: db.query(func.count(T.id)).scalar(),
+            lambda db, n: crud.get_tasks_count(db),
+        ),
+        (
+            "get_data_version",
+            lambda db, n: db.query(func.max(models.Change.seq)).scalar() or 0,
+            lambda db, n: crud.get_data_version(db),
+        ),
+        (
+            "bump_daily_stats",
+            lambda db, n: _legacy_bump_daily_stats(db, day, _Row),
+            lambda db, n: crud._bump_daily_stats(db, day, _Row),
+        ),
+    ]
+
+
+def _per_call_us(Session, fn, calls: int, size: int) -> float:
+    db = Session()
+    try:
+        db.connection()  # connexion et BEGIN hors mesure
+        started = time.perf_counter()
+        for i in range(calls):
+            fn(db, i % size + 1)
+            db.expunge_all()  # pas de cache d'identité entre appels
+        elapsed = time.perf_counter() - started
+    finally:
+        db.rollback()
+        db.close()
+    return elapsed / calls * 1e6
+
+
+def run(Session, size: int, calls: int = 2000, repeat: int = 5) -> dict:
+    """Median per-call cost (µs) of each case, legacy and current forms.
+
+    Rounds alternate the order of the two forms to even out drift.
+    """
+    results = {}
+    for name, legacy, current in _cases():
+        samples = {"legacy": [], "current": []}
+        for r in range(repeat):
+            pair = [("legacy", legacy), ("current", current)]
+            for label, fn in pair if r % 2 == 0 else reversed(pair):
+                samples[label].append(_per_call_us(Session, fn, calls, size))
+        legacy_us = statistics.median(samples["legacy"])
+        current_us = statistics.median(samples["current"])
+        results[name] = {
+            "legacy_us": round(legacy_us, 1),
+            "current_us": round(current_us, 1),
+            "speedup": round(legacy_us / current_us, 2) if current_us else None,
+        }
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--size", type=int, default=1_000, help="seeded tasks")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    source = cached_database(config_for(args.size))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        shutil.copyfile(source, path)
+        engine = make_engine(path)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        try:
+            results = run(Session, args.size, args.calls, args.repeat)
+        finally:
+            engine.dispose()
+    print(f"{'case':<24} {'legacy':>10} {'current':>10} {'speedup':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<24} {r['legacy_us']:>8.1f}us {r['current_us']:>8.1f}us "
+            f"{r['speedup']:>7.2f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+import argparse
+
+from app.archiver import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, run_once
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move tasks completed more than N days ago to tasks_archive."
+    )
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS or 30)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    moved = run_once(older_than_days=args.days, batch_size=args.batch_size)
+    print(f"Archived {moved} task(s) completed more than {args.days} day(s) ago.")
+
+
+if __name__ == "__main__":
+    main()
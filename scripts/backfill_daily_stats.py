@@ -0,0 +1,15 @@
+from app.database import SessionLocal
+from app import crud
+
+
+def main():
+    db = SessionLocal()
+    try:
+        rows = crud.rebuild_daily_stats(db)
+        print(f"Rebuilt daily_stats: {rows} row(s).")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
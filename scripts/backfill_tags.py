@@ -0,0 +1,15 @@
+from app.database import SessionLocal
+from app import crud
+
+
+def main():
+    db = SessionLocal()
+    try:
+        links = crud.rebuild_tags(db)
+        print(f"Rebuilt task_tags: {links} link(s).")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import argparse
+
+from app.assets import STATIC_DIR, brotli, build
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fingerprint and precompress app/static into app/static/dist."
+    )
+    parser.add_argument("--static-dir", default=STATIC_DIR)
+    args = parser.parse_args()
+
+    manifest = build(args.static_dir)
+    for name, entry in sorted(manifest.items()):
+        encodings = ", ".join(entry["encodings"]) or "-"
+        print(f"{name} -> {entry['path']} ({encodings})")
+    if brotli is None:
+        print("brotli not installed: gzip variants only.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import argparse
+import os
+
+from app.profiling import make_token
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Print a token that triggers request profiling (X-Profile header)."
+    )
+    parser.add_argument("--ttl", type=int, default=3600, help="validity in seconds")
+    args = parser.parse_args()
+
+    secret = os.environ.get("PROFILE_SECRET")
+    if not secret:
+        parser.error("PROFILE_SECRET is not set")
+    print(make_token(secret, ttl=args.ttl))
+
+
+if __name__ == "__main__":
+    main()
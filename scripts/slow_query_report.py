@@ -0,0 +1,84 @@
+import argparse
+import glob
+import json
+import re
+
+from app.database import SLOW_QUERY_LOG
+
+# Plans qui méritent un index : parcours complet ou tri en B-tree temporaire
+WARN_PLANS = ("SCAN ", "USE TEMP B-TREE")
+SELECT_LIST = re.compile(r"^SELECT (.{60,}?) FROM ")
+
+
+def short_sql(sql: str, width: int) -> str:
+    """Elide long select lists, then truncate to `width` characters."""
+    sql = SELECT_LIST.sub("SELECT ... FROM ", sql, count=1)
+    return sql if len(sql) <= width else sql[:width] + "..."
+
+
+def load(path: str) -> list:
+    """Read the slow-query log and its rotated files (`.1`, `.2`, ...)."""
+    entries = []
+    for name in sorted(glob.glob(path + "*")):
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entries.append(json.loads(line))
+    return entries
+
+
+def aggregate(entries: list) -> list:
+    """Group entries by normalized SQL, sorted by total time (desc)."""
+    groups = {}
+    for e in entries:
+        g = groups.setdefault(
+            e["sql"],
+            {
+                "sql": e["sql"],
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "callers": set(),
+            },
+        )
+        g["count"] += 1
+        g["total_ms"] += e["duration_ms"]
+        g["max_ms"] = max(g["max_ms"], e["duration_ms"])
+        if e.get("caller"):
+            g["callers"].add(e["caller"])
+        if e.get("plan") is not None:
+            g["plan"] = e["plan"]  # le plus récent
+    return sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Top slow statements by total time, from the slow-query log."
+    )
+    parser.add_argument("--log", default=SLOW_QUERY_LOG)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--sql-width", type=int, default=160)
+    args = parser.parse_args()
+
+    entries = load(args.log)
+    if not entries:
+        print(f"No slow query logged in {args.log}* (is SLOW_QUERY_MS set?).")
+        return
+
+    for rank, g in enumerate(aggregate(entries)[: args.top], 1):
+        mean = g["total_ms"] / g["count"]
+        print(
+            f"#{rank} total {g['total_ms']:.1f} ms | {g['count']} run(s) | "
+            f"mean {mean:.1f} ms | max {g['max_ms']:.1f} ms"
+        )
+        print(f"   callers: {', '.join(sorted(g['callers'])) or '-'}")
+        print(f"   sql: {short_sql(g['sql'], args.sql_width)}")
+        for step in g.get("plan") or []:
+            flag = "!" if step.startswith(WARN_PLANS) else " "
+            print(f"  {flag} plan: {step}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.database import enable_foreign_keys, get_db, instrument_engine
+from app.main import app
+
+
+@pytest.fixture
+def app_client():
+    """`(client, db)` on a fresh in-memory database.
+
+    Requests made with `client` and the `db` session share the database,
+    set up like app.database (foreign keys on, no expiry on commit) with the
+    per-request query counters hooked, so Server-Timing reports queries.
+    """
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,  # une seule base en mémoire pour tous les threads
+    )
+    enable_foreign_keys(engine)
+    instrument_engine(engine)
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+    )
+
+    def override():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override
+    db = SessionLocal()
+    try:
+        yield TestClient(app), db
+    finally:
+        db.close()
+        app.dependency_overrides.clear()
+        engine.dispose()
@@ -0,0 +1,101 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app import admission
+from app.admission import BULK, INTERACTIVE, AdmissionMiddleware, Limiter, classify
+
+
+def scope(path, headers=()):
+    return {"type": "http", "method": "GET", "path": path, "headers": list(headers)}
+
+
+def test_classify_ui_and_drag_and_drop_as_interactive():
+    assert classify(scope("/list")) == INTERACTIVE
+    assert classify(scope("/list/complete/3")) == INTERACTIVE
+    assert classify(scope("/api/tasks/reorder")) == INTERACTIVE
+    assert classify(scope("/api/tasks/7/quadrant")) == INTERACTIVE
+    assert classify(scope("/api/tasks/")) == BULK
+    # en-tête de navigateur, falsifiable : pas de priorité
+    assert classify(scope("/api/tasks/", [(b"sec-fetch-site", b"same-origin")])) == BULK
+
+
+def test_ui_cookie_issued_with_pages_marks_api_calls_interactive(app_client):
+    client, _ = app_client
+    cookie = f"theme=dark; {admission.UI_COOKIE}={admission.UI_TOKEN}".encode()
+    assert classify(scope("/api/tasks/", [(b"cookie", cookie)])) == INTERACTIVE
+    forged = f"{admission.UI_COOKIE}=guess".encode()
+    assert classify(scope("/api/tasks/", [(b"cookie", forged)])) == BULK
+
+    assert "set-cookie" not in client.get("/api/tasks/").headers
+    page = client.get("/list")
+    assert page.headers["set-cookie"].startswith(
+        f"{admission.UI_COOKIE}={admission.UI_TOKEN};"
+    )
+    assert "HttpOnly" in page.headers["set-cookie"]
+    # déjà présent : pas réémis
+    assert "set-cookie" not in client.get("/list").headers
+
+
+def test_limiter_sheds_bulk_first_and_wakes_interactive_first():
+    async def scenario():
+        limiter = Limiter("write", concurrency=1, queue_size=4)
+        assert await limiter.acquire(BULK, timeout=1)  # slot taken
+        order = []
+
+        async def wait(priority, label):
+            if await limiter.acquire(priority, timeout=1):
+                order.append(label)
+                limiter.release()
+            else:
+                order.append(f"shed {label}")
+
+        tasks = [asyncio.create_task(wait(BULK, f"b{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(wait(INTERACTIVE, "i0")))
+        await asyncio.sleep(0)
+        # bulk may only fill half the queue: b2 is shed right away
+        assert order == ["shed b2"]
+        assert (limiter.queued(BULK), limiter.queued(INTERACTIVE)) == (2, 1)
+
+        limiter.release()
+        await asyncio.gather(*tasks)
+        assert order == ["shed b2", "i0", "b0", "b1"]
+        assert limiter.in_flight == 0
+        assert limiter.shed == {(BULK, "queue_full"): 1}
+
+    asyncio.run(scenario())
+
+
+def test_middleware_fails_fast_with_503_and_retry_after():
+    async def scenario():
+        gate = asyncio.Event()
+        app = FastAPI()
+        app.add_middleware(
+            AdmissionMiddleware, write_concurrency=1, write_queue=0, retry_after=2
+        )
+
+        @app.post("/api/tasks/")
+        async def create():
+            await gate.wait()
+            return {"ok": True}
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            first = asyncio.create_task(c.post("/api/tasks/"))
+            await asyncio.sleep(0.05)
+            rejected = await c.post("/api/tasks/")
+            gate.set()
+            assert (await first).status_code == 200
+
+        assert rejected.status_code == 503
+        assert rejected.headers["retry-after"] == "2"
+        metrics = admission.render_metrics()
+        assert (
+            'admission_shed_total{group="write",priority="bulk",reason="queue_full"} 1'
+            in metrics
+        )
+        assert 'admission_queue_depth{group="write",priority="bulk"} 0' in metrics
+
+    asyncio.run(scenario())
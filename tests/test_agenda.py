@@ -0,0 +1,134 @@
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, crud, schemas, agenda
+from app.main import app
+from app.routers.agenda import MAX_RANGE_DAYS
+
+
+def create_session():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return SessionLocal()
+
+
+def test_occurrence_matches_chained_next_due_date():
+    origins = [
+        date(2026, 1, 31),
+        date(2024, 2, 29),
+        date(2026, 8, 31),
+        date(2026, 3, 30),
+        date(2026, 10, 19),
+    ]
+    for pattern in ("daily", "weekly", "monthly", "yearly"):
+        for origin in origins:
+            due = origin
+            for k in range(1, 61):
+                due = crud._next_due_date(pattern, due)
+                assert agenda.occurrence(pattern, origin, k) == due, (
+                    pattern,
+                    origin,
+                    k,
+                )
+
+
+def test_expand_skips_to_window_start():
+    origin = date(2020, 1, 31)
+    got = list(agenda.expand("monthly", origin, date(2026, 3, 1), date(2026, 5, 31)))
+    # 31/01/2020 -> 29/02/2020 -> 29 ensuite, puis 28 après février 2021
+    assert got == [
+        (74, date(2026, 3, 28)),
+        (75, date(2026, 4, 28)),
+        (76, date(2026, 5, 28)),
+    ]
+    weekly = list(
+        agenda.expand(
+            "weekly",
+            date(2026, 10, 19),
+            date(2026, 10, 19),
+            date(2026, 12, 31),
+            until=date(2026, 11, 9),
+        )
+    )
+    # l'occurrence 0 est la tâche réelle ; arrêt à la date de fin de série
+    assert [d for _, d in weekly] == [
+        date(2026, 10, 26),
+        date(2026, 11, 2),
+        date(2026, 11, 9),
+    ]
+    assert list(agenda.expand(None, origin, origin, origin)) == []
+
+
+def test_agenda_real_and_virtual_items_and_cache():
+    db = create_session()
+    start, end = date(2026, 11, 1), date(2026, 11, 30)
+    db.add_all(
+        [
+            models.Task(title="in range", due_date=date(2026, 11, 5), status="done"),
+            models.Task(title="outside", due_date=date(2026, 12, 5)),
+            models.Task(
+                title="standup",
+                due_date=date(2026, 10, 19),
+                recurrence_pattern="weekly",
+                urgent=True,
+                important=True,
+            ),
+            models.Task(
+                title="old series",
+                due_date=date(2026, 10, 1),
+                recurrence_pattern="daily",
+                status="done",
+            ),
+            models.Task(
+                title="ended",
+                due_date=date(2026, 10, 1),
+                recurrence_pattern="daily",
+                recurrence_end_date=date(2026, 10, 31),
+            ),
+        ]
+    )
+    db.commit()
+
+    result = agenda.get_agenda(db, start, end)
+    items = [(i["day"], i["title"], i["virtual"]) for i in result["items"]]
+    assert items == [
+        (date(2026, 11, 2), "standup", True),
+        (date(2026, 11, 5), "in range", False),
+        (date(2026, 11, 9), "standup", True),
+        (date(2026, 11, 16), "standup", True),
+        (date(2026, 11, 23), "standup", True),
+        (date(2026, 11, 30), "standup", True),
+    ]
+    standup = result["items"][0]
+    assert standup["occurrence"] == 2 and standup["quadrant"] == 1
+    assert result["data_version"] == crud.get_data_version(db)
+
+    # même version : même objet ; une mutation invalide
+    assert agenda.get_agenda(db, start, end) is result
+    crud.update_task(db, 3, schemas.TaskUpdate(title="daily standup"))
+    fresh = agenda.get_agenda(db, start, end)
+    assert fresh is not result
+    assert fresh["items"][0]["title"] == "daily standup"
+
+
+def test_agenda_endpoint_validates_range():
+    client = TestClient(app)
+    ok = client.get("/api/agenda/", params={"from": "2026-11-01", "to": "2026-11-07"})
+    assert ok.status_code == 200
+    assert ok.json()["start"] == "2026-11-01"
+    reversed_range = client.get(
+        "/api/agenda/", params={"from": "2026-11-07", "to": "2026-11-01"}
+    )
+    assert reversed_range.status_code == 422
+    too_long = date(2026, 1, 1) + timedelta(days=MAX_RANGE_DAYS + 1)
+    assert (
+        client.get(
+            "/api/agenda/", params={"from": "2026-01-01", "to": too_long.isoformat()}
+        ).status_code
+        == 422
+    )
@@ -0,0 +1,104 @@
+import re
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, crud, schemas, analytics
+
+
+def create_session():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return SessionLocal()
+
+
+def add_done(db, lead_days, due_offset, urgent, important, today):
+    """Task created `lead_days` before completion, completed yesterday."""
+    completed = datetime.combine(today - timedelta(days=1), datetime.min.time())
+    db.add(
+        models.Task(
+            title="t",
+            urgent=urgent,
+            important=important,
+            status="done",
+            created_at=completed - timedelta(days=lead_days),
+            completed_at=completed + timedelta(hours=12),
+            due_date=completed.date() + timedelta(days=due_offset),
+        )
+    )
+
+
+def test_analytics_metrics_and_cache(monkeypatch):
+    monkeypatch.setattr(analytics, "_state", analytics._State())
+    db = create_session()
+    today = date.today()
+    for lead in (1, 2, 3, 4):
+        add_done(db, lead, due_offset=0, urgent=True, important=True, today=today)
+    add_done(db, 10, due_offset=-3, urgent=False, important=True, today=today)
+    db.add(models.Task(title="late", status="todo", due_date=today - timedelta(2)))
+    db.add(models.Task(title="fine", status="todo", due_date=today + timedelta(2)))
+    db.commit()
+
+    result = analytics.compute_analytics(analytics.load_history(db), today=today)
+    assert result["tasks"] == 7
+    assert result["completed"] == 5
+    assert result["lead_time_days"]["p50"] == 3.5
+    assert result["throughput"]["q1"]["completed"] == 4
+    assert result["throughput"]["q2"]["completed"] == 1
+    assert result["overdue"]["completed_late_rate"] == 0.2
+    assert result["overdue"]["open_overdue"] == 1
+    assert result["overdue"]["open_overdue_rate"] == 0.5
+    rolling = result["rolling_completed_per_day"]
+    assert len(rolling) == analytics.ROLLING_SERIES_DAYS
+    assert rolling[-1]["avg"] == round(5 / 7, 2)
+
+    first = analytics.get_analytics(db)
+    assert analytics.get_analytics(db) is first  # same data version: cached
+    crud.create_task(db, schemas.TaskCreate(title="new", urgent=False, important=False))
+    assert analytics.get_analytics(db)["tasks"] == 8
+    db.close()
+
+
+def test_analytics_patched_from_change_log(app_client, monkeypatch):
+    monkeypatch.setattr(analytics, "_state", analytics._State())
+    client, db = app_client
+    tasks = [
+        crud.create_task(
+            db, schemas.TaskCreate(title=f"t{i}", urgent=i % 2, important=True)
+        )
+        for i in range(6)
+    ]
+    first = client.get("/api/stats/analytics")
+    assert first.status_code == 200 and first.json()["completed"] == 0
+    # max(seq), historique : la requête passe par la session instrumentée
+    timing = first.headers["server-timing"]
+    assert re.search(r'desc="2 queries"', timing), timing
+
+    computed = []
+    original = analytics.compute_analytics
+    monkeypatch.setattr(
+        analytics,
+        "compute_analytics",
+        lambda *a, **k: computed.append(1) or original(*a, **k),
+    )
+    # réordonner ou renommer ne touche aucune colonne utile : pas de calcul
+    crud.set_positions_bulk(db, [{"id": t.id, "position": 9 - t.id} for t in tasks])
+    crud.update_task(db, tasks[0].id, schemas.TaskUpdate(title="renamed"))
+    again = client.get("/api/stats/analytics")
+    assert computed == []
+    assert again.json()["data_version"] > first.json()["data_version"]
+    # max(seq), horizon du journal, tâches changées, leurs lignes
+    assert re.search(r'desc="4 queries"', again.headers["server-timing"])
+
+    crud.update_task(db, tasks[1].id, schemas.TaskUpdate(status="done"))
+    crud.delete_task(db, tasks[2].id)
+    crud.create_task(db, schemas.TaskCreate(title="new", urgent=True, important=False))
+    patched = analytics.get_analytics(db)
+    assert computed == [1]
+    full = original(analytics.load_history(db), today=date.today())
+    assert {k: v for k, v in patched.items() if k != "data_version"} == full
+    assert patched["tasks"] == 6 and patched["completed"] == 1
@@ -1,3 +1,5 @@
+import re
+
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -64,3 +66,22 @@ def test_patch_position_and_quadrant_and_bulk_reorder():
     assert pos_map[a["id"]] == 3
     assert pos_map[b["id"]] == 1
     assert pos_map[c["id"]] == 2
+
+
+def test_bulk_reorder_is_one_update(app_client):
+    client, _ = app_client
+    ids = [create_task_helper(f"reorder-{i}")["id"] for i in range(5)]
+    items = [{"id": tid, "position": 10 - i} for i, tid in enumerate(ids)]
+    items.append({"id": 999, "position": 0})  # inconnue : ignorée
+    r = client.post("/api/tasks/reorder", json={"items": items})
+    assert r.status_code == 200
+    assert [(t["id"], t["position"]) for t in r.json()] == [
+        (tid, 10 - i) for i, tid in enumerate(ids)
+    ]
+    # UPDATE ... RETURNING, INSERT changes
+    timing = r.headers["server-timing"]
+    assert re.search(r'desc="2 queries"', timing), timing
+
+    feed = client.get("/api/changes/", params={"since": 0}).json()
+    reordered = [c for c in feed["changes"] if c["task"]["position"] > 5]
+    assert sorted(c["id"] for c in reordered) == ids
@@ -0,0 +1,170 @@
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import models, crud, schemas
+
+
+def create_session():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return SessionLocal()
+
+
+def complete_days_ago(db, task, days):
+    done_at = datetime.now(timezone.utc) - timedelta(days=days)
+    crud.update_task(db, task.id, schemas.TaskUpdate(status="done"))
+    task = crud.get_task(db, task.id)
+    task.completed_at = done_at
+    db.commit()
+
+
+def test_archive_moves_old_done_tasks_and_keeps_chain_ends():
+    db = create_session()
+    old = crud.create_task(
+        db, schemas.TaskCreate(title="old", urgent=True, important=True)
+    )
+    crud.create_subtask(db, old.id, schemas.SubtaskCreate(title="step"))
+    recent = crud.create_task(
+        db, schemas.TaskCreate(title="recent", urgent=False, important=False)
+    )
+    daily = crud.create_task(
+        db,
+        schemas.TaskCreate(
+            title="daily",
+            urgent=False,
+            important=True,
+            due_date=date.today() - timedelta(days=40),
+            recurrence_pattern="daily",
+        ),
+    )
+    complete_days_ago(db, old, 40)
+    complete_days_ago(db, recent, 1)
+    complete_days_ago(db, daily, 40)  # spawns the next occurrence
+
+    # Deleting the successor makes `daily` the end of an open chain
+    successor = crud.get_tasks(db, status="todo")[0]
+    crud.delete_task(db, successor.id)
+
+    moved = crud.archive_completed_tasks(db, older_than_days=30, batch_size=1)
+    assert moved == 1
+
+    hot_ids = {t.id for t in crud.get_tasks(db)}
+    assert hot_ids == {recent.id, daily.id}
+    assert db.query(models.SubtaskArchive).count() == 1
+
+    rows = crud.get_tasks(db, include_archived=True, sort="created_desc")
+    assert [(r.id, r.archived) for r in rows][-1] == (old.id, True)
+
+    assert crud.get_general_stats(db)["total"] == 2
+    assert crud.get_general_stats(db, include_archived=True) == {
+        "total": 3,
+        "done": 3,
+    }
+    assert crud.get_eisenhower_stats(db, include_archived=True)["q1"] == 1
+
+    # The archived task left the hot set: clients see a tombstone
+    feed = crud.get_changes(db, since=0)
+    assert {c["id"] for c in feed["changes"] if c["op"] == "delete"} >= {old.id}
+    db.close()
+
+
+def test_archived_ids_are_never_reused():
+    db = create_session()
+    first = crud.create_task(
+        db, schemas.TaskCreate(title="first", urgent=False, important=False)
+    )
+    last = crud.create_task(
+        db, schemas.TaskCreate(title="last", urgent=False, important=False)
+    )
+    complete_days_ago(db, last, 40)
+    assert crud.archive_completed_tasks(db, older_than_days=30) == 1
+
+    # sans AUTOINCREMENT, SQLite redonnerait l'id de la tâche archivée
+    again = crud.create_task(
+        db, schemas.TaskCreate(title="again", urgent=False, important=False)
+    )
+    assert again.id > last.id > first.id
+    complete_days_ago(db, again, 40)
+    assert crud.archive_completed_tasks(db, older_than_days=30) == 1
+    archived = db.query(models.TaskArchive.id).order_by(models.TaskArchive.id)
+    assert [r.id for r in archived] == [last.id, again.id]
+    db.close()
+
+
+def test_chain_ends_resolved_in_one_query_per_batch():
+    db = create_session()
+    statements = []
+    event.listen(
+        db.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, sql, *args: statements.append(sql),
+    )
+    due = date.today() - timedelta(days=40)
+    series = [
+        crud.create_task(
+            db,
+            schemas.TaskCreate(
+                title=f"série {pattern}",
+                urgent=False,
+                important=True,
+                due_date=due,
+                recurrence_pattern=pattern,
+            ),
+        )
+        for pattern in ("daily", "weekly", "monthly")
+    ]
+    for task in series:
+        complete_days_ago(db, task, 40)
+    successors = {t.recurrence_pattern: t for t in crud.get_tasks(db, status="todo")}
+    # renommer l'occurrence suivante ne la détache pas de la série
+    crud.update_task(
+        db, successors["daily"].id, schemas.TaskUpdate(title="série renommée")
+    )
+    crud.delete_task(db, successors["monthly"].id)  # fin de série ouverte
+
+    statements.clear()
+    assert crud.archive_completed_tasks(db, older_than_days=30) == 2
+    hot = {t.id for t in crud.get_tasks(db, status="done")}
+    assert hot == {series[2].id}
+    assert sum("UNION ALL" in sql for sql in statements) == 1
+    db.close()
+
+
+def test_tag_filter_on_archives_ignores_case():
+    db = create_session()
+    task = crud.create_task(
+        db, schemas.TaskCreate(title="legacy", urgent=True, important=True)
+    )
+    complete_days_ago(db, task, 40)
+    # Tag saisi avant la normalisation des tags (pas de ligne task_tags)
+    db.query(models.Task).filter_by(id=task.id).update({"tag": "Work, Home"})
+    db.add(
+        models.TaskArchive(
+            id=1000,
+            title="archived earlier",
+            urgent=False,
+            important=False,
+            status="done",
+            tag="Errands",
+            quadrant=4,
+            completed_at=datetime.now(timezone.utc) - timedelta(days=60),
+            archived_at=datetime.now(timezone.utc),
+        )
+    )
+    db.commit()
+
+    assert crud.archive_completed_tasks(db, older_than_days=30) == 1
+    assert db.get(models.TaskArchive, task.id).tag == "work, home"
+
+    def titles(tags):
+        rows = crud.get_tasks(db, include_archived=True, tags=tags)
+        return sorted(r.title for r in rows)
+
+    assert titles(["WORK"]) == ["legacy"]
+    assert titles(["home", "work"]) == ["legacy"]
+    assert titles(["errands"]) == ["archived earlier"]
+    db.close()
@@ -0,0 +1,76 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import assets
+
+CSS = b"body { color: #222; }\n" * 200
+
+
+def test_build_fingerprints_and_serves_precompressed_assets(tmp_path):
+    (tmp_path / "app.css").write_bytes(CSS)
+    manifest = assets.build(str(tmp_path))
+    entry = manifest["app.css"]
+    assert entry["path"].startswith("dist/app.") and entry["path"].endswith(".css")
+    assert "gzip" in entry["encodings"]
+    # deterministic: same content, same name
+    assert assets.build(str(tmp_path))["app.css"] == entry
+
+    app = FastAPI()
+    app.mount("/static", assets.AssetStaticFiles(directory=str(tmp_path)))
+    client = TestClient(app)
+
+    response = client.get(
+        f"/static/{entry['path']}", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == assets.IMMUTABLE
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/css")
+    assert response.content == CSS  # décompressé par le client
+    raw = (tmp_path / (entry["path"] + ".gz")).read_bytes()
+    assert gzip.decompress(raw) == CSS
+
+    plain = client.get(
+        f"/static/{entry['path']}", headers={"Accept-Encoding": "identity"}
+    )
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["cache-control"] == assets.IMMUTABLE
+
+    refused = client.get(
+        f"/static/{entry['path']}", headers={"Accept-Encoding": "gzip;q=0, identity"}
+    )
+    assert "content-encoding" not in refused.headers
+
+    original = client.get("/static/app.css")
+    assert original.headers["cache-control"] == "no-cache"
+
+
+def test_choose_encoding_follows_q_values():
+    both = ["br", "gzip"]
+    assert assets.accepted_encodings("gzip;q=0.5, BR ; q=1.0, x;q=oops") == {
+        "gzip": 0.5,
+        "br": 1.0,
+        "x": 0.0,
+    }
+    assert assets.choose_encoding("gzip, deflate, br", both) == "br"
+    assert assets.choose_encoding("br;q=0.2, gzip;q=0.8", both) == "gzip"
+    assert assets.choose_encoding("br;q=0, gzip", both) == "gzip"
+    assert assets.choose_encoding("gzip;q=0", ["gzip"]) is None
+    assert assets.choose_encoding("*;q=0.1", ["gzip"]) == "gzip"
+    assert assets.choose_encoding("*, gzip;q=0", ["gzip"]) is None
+    # sous-chaîne seulement : pas un codage accepté
+    assert assets.choose_encoding("x-gzip-like", ["gzip"]) is None
+    assert assets.choose_encoding("", both) is None
+
+
+def test_static_url_uses_manifest_when_built(tmp_path):
+    assert assets.static_url("missing.css") == "/static/missing.css"
+    (tmp_path / "app.css").write_bytes(CSS)
+    path = assets.build(str(tmp_path))["app.css"]["path"]
+    assets.reload_manifest(str(tmp_path))
+    try:
+        assert assets.static_url("app.css") == f"/static/{path}"
+    finally:
+        assets.reload_manifest()
@@ -0,0 +1,114 @@
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from benchmarks.crud_bench import compare
+from benchmarks.http_load import load_replay, percentile, summarize
+from benchmarks.seed import (
+    SEED_FORMAT,
+    SERIES_LENGTH,
+    SeedConfig,
+    make_engine,
+    seed_database,
+)
+
+
+def dump(path):
+    engine = make_engine(str(path))
+    db = sessionmaker(bind=engine)()
+    try:
+        tasks = [
+            (t.id, t.title, t.status, t.tag, t.due_date, t.recurrence_pattern)
+            for t in db.query(models.Task).order_by(models.Task.id)
+        ]
+        subtasks = db.query(models.Subtask).count()
+        rollup = db.query(models.DailyStat).count()
+    finally:
+        db.close()
+        engine.dispose()
+    return tasks, subtasks, rollup
+
+
+def test_seed_is_deterministic_and_follows_config(tmp_path):
+    cfg = SeedConfig(tasks=200, subtasks=50, tags=5, recurrence_series=3)
+    seed_database(str(tmp_path / "a.db"), cfg)
+    seed_database(str(tmp_path / "b.db"), cfg)
+
+    tasks, subtasks, rollup = dump(tmp_path / "a.db")
+    assert (tasks, subtasks, rollup) == dump(tmp_path / "b.db")
+    assert len(tasks) == 200 and subtasks == 50 and rollup > 0
+    assert len({t[3] for t in tasks if t[3]}) <= 5
+    series = [t for t in tasks if t[5]]
+    assert len(series) == 3 * SERIES_LENGTH
+    # each chain ends with its single open occurrence
+    assert [t[2] for t in series[:SERIES_LENGTH]] == ["done"] * 3 + ["todo"]
+
+
+def test_compare_flags_only_significant_slowdowns():
+    baseline = {
+        "meta": {"seed_format": SEED_FORMAT},
+        "results": {"1k": {"a": {"median_ms": 10.0}, "b": {"median_ms": 0.2}}},
+    }
+    current = {
+        "meta": {"seed_format": SEED_FORMAT},
+        "results": {
+            "1k": {
+                "a": {"median_ms": 20.0},
+                "b": {"median_ms": 0.6},  # x3 but under the noise floor
+                "new": {"median_ms": 5.0},
+            }
+        },
+    }
+    report = compare(current, baseline, tolerance=0.25, floor_ms=1.0)
+    assert [(r["case"], r["ratio"]) for r in report["regressions"]] == [("a", 2.0)]
+    assert report["missing"] == [{"size": "1k", "case": "new"}]
+    assert report["stale"] is False
+
+    # baseline d'un ancien format de seed : signalée, pas ignorée
+    del baseline["meta"]["seed_format"]
+    assert compare(current, baseline, tolerance=0.25, floor_ms=1.0)["stale"]
+
+
+def test_replay_log_accepts_jsonl_and_access_log_lines(tmp_path):
+    log = tmp_path / "requests.log"
+    log.write_text(
+        'INFO:     127.0.0.1:5000 - "GET /api/tasks/?tag=x HTTP/1.1" 200 OK\n'
+        '{"method": "put", "path": "/api/tasks/3", "json": {"status": "done"}}\n'
+        "not a request\n",
+        encoding="utf-8",
+    )
+    assert load_replay(str(log)) == [
+        ("GET", "/api/tasks/?tag=x", None),
+        ("PUT", "/api/tasks/3", {"status": "done"}),
+    ]
+
+
+def test_summarize_reports_percentiles_and_error_rate():
+    values = list(range(1, 101))
+    assert (percentile(values, 50), percentile(values, 99)) == (50, 99)
+    samples = {"a": [(i / 1000, i % 10 != 0) for i in values]}
+    report = summarize(samples, elapsed=2.0)
+    assert report["total"]["requests"] == 100
+    assert report["total"]["rps"] == 50.0
+    assert report["operations"]["a"]["error_rate"] == 0.1
+    assert report["operations"]["a"]["p95_ms"] == 95.0
+
+
+def test_statement_bench_forms_agree(tmp_path):
+    from benchmarks import statement_bench
+
+    seed_database(str(tmp_path / "s.db"), SeedConfig(tasks=30, subtasks=20, tags=3))
+    engine = make_engine(str(tmp_path / "s.db"))
+    Session = sessionmaker(bind=engine)
+    try:
+        db = Session()
+        for name, legacy, current in statement_bench._cases():
+            for n in (1, 7, 31):  # 31 : tâche inexistante
+                assert legacy(db, n) == current(db, n), (name, n)
+        db.rollback()
+        db.close()
+
+        results = statement_bench.run(Session, size=30, calls=3, repeat=1)
+        assert set(results) == {name for name, _, _ in statement_bench._cases()}
+        assert all(r["legacy_us"] > 0 and r["current_us"] > 0 for r in results.values())
+    finally:
+        engine.dispose()
@@ -0,0 +1,68 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, crud, schemas
+
+
+def create_session():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return SessionLocal()
+
+
+def make_task(db, title):
+    return crud.create_task(
+        db, schemas.TaskCreate(title=title, urgent=False, important=False)
+    )
+
+
+def test_changes_since_returns_only_net_changes():
+    db = create_session()
+    tasks = [make_task(db, f"task {i}") for i in range(20)]
+    version = crud.get_data_version(db)
+    assert version == 20
+
+    crud.update_task(db, tasks[0].id, schemas.TaskUpdate(title="renamed"))
+    crud.update_task(db, tasks[0].id, schemas.TaskUpdate(title="renamed again"))
+    crud.delete_task(db, tasks[1].id)
+    sub = crud.create_subtask(db, tasks[2].id, schemas.SubtaskCreate(title="step"))
+
+    feed = crud.get_changes(db, since=version)
+    assert feed["reset"] is False
+    assert feed["last_seq"] == crud.get_data_version(db)
+    by_id = {(c["entity"], c["id"]): c for c in feed["changes"]}
+    assert len(by_id) == 3
+    assert by_id[("task", tasks[0].id)]["task"].title == "renamed again"
+    assert by_id[("task", tasks[1].id)]["op"] == "delete"
+    assert by_id[("subtask", sub.id)]["task_id"] == tasks[2].id
+
+    # Nothing new since the last sequence
+    assert crud.get_changes(db, since=feed["last_seq"])["changes"] == []
+    db.close()
+
+
+def test_compaction_keeps_latest_state_and_detects_reset():
+    db = create_session()
+    a = make_task(db, "a")
+    b = make_task(db, "b")
+    crud.update_task(db, a.id, schemas.TaskUpdate(title="a2"))
+    crud.delete_task(db, b.id)
+    head = crud.get_data_version(db)
+    c = make_task(db, "c")
+
+    # Nothing is compacted until a consumer has acknowledged a sequence
+    assert crud.compact_changes(db) == 0
+    crud.ack_changes(db, "mobile", head)
+    assert crud.compact_changes(db) == 3  # a (superseded), b x2 (tombstoned)
+
+    snapshot = crud.get_changes(db, since=0)
+    assert {ch["id"] for ch in snapshot["changes"]} == {a.id, c.id}
+    assert crud.get_data_version(db) == head + 1
+
+    # A client older than the horizon may have missed tombstones
+    stale = crud.get_changes(db, since=1)
+    assert stale["reset"] is True
+    db.close()
@@ -3,6 +3,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app import models, crud, schemas
+from app.database import track_queries
 
 
 def create_session():
@@ -88,3 +89,68 @@ def test_crud_lifecycle_and_stats():
     assert crud.get_tasks_count(db) == 2
 
     db.close()
+
+
+def run_counted(fn, *args, **kwargs):
+    """Call `fn` and return (result, shapes of the statements it ran)."""
+    stats = track_queries(track_shapes=True)
+    result = fn(*args, **kwargs)
+    return result, [" ".join(sql.split()) for sql in stats.shapes]
+
+
+def test_mutations_run_one_statement_and_no_reload(app_client):
+    _, db = app_client
+    task = crud.create_task(
+        db, schemas.TaskCreate(title="A", urgent=False, important=False, tag="x")
+    )
+    sub = crud.create_subtask(db, task.id, schemas.SubtaskCreate(title="s"))
+
+    for fn, args in (
+        (crud.set_task_position, (task.id, 5)),
+        (crud.set_task_quadrant, (task.id, 1)),
+    ):
+        updated, shapes = run_counted(fn, db, *args)
+        task_sql = [s for s in shapes if " tasks" in s]
+        assert len(task_sql) == 1 and task_sql[0].startswith("UPDATE tasks")
+        assert "RETURNING" in task_sql[0]
+        # réponse construite sans nouvelle requête
+        out, shapes = run_counted(schemas.TaskOut.model_validate, updated)
+        assert shapes == []
+    assert (out.position, out.quadrant, out.urgent, out.important) == (
+        5,
+        1,
+        True,
+        True,
+    )
+
+    updated, shapes = run_counted(
+        crud.update_subtask,
+        db,
+        sub.id,
+        schemas.SubtaskUpdate(status="done"),
+        task_id=task.id,
+    )
+    assert updated.status == "done"
+    assert [s for s in shapes if " subtasks" in s][0].startswith("UPDATE subtasks")
+    assert not any(s.startswith("SELECT") for s in shapes)
+    # mauvaise tâche parente : rien n'est modifié
+    other = crud.update_subtask(
+        db, sub.id, schemas.SubtaskUpdate(title="z"), task_id=task.id + 1
+    )
+    assert other is None and crud.get_subtask(db, sub.id).title == "s"
+    assert crud.delete_subtask(db, sub.id, task_id=task.id + 1) is None
+
+    # suppression : un DELETE ... RETURNING, sous-tâches en cascade (SQL)
+    crud.create_subtask(db, task.id, schemas.SubtaskCreate(title="t"))
+    ok, shapes = run_counted(crud.delete_task, db, task.id)
+    assert ok is True
+    assert not any(s.startswith("SELECT") for s in shapes)
+    assert [s for s in shapes if s.startswith("DELETE FROM tasks")][0].endswith(
+        "RETURNING tag, status"
+    )
+    assert db.query(models.Subtask).count() == 0
+    assert db.query(models.TaskTag).count() == 0
+    assert [(t.name, t.task_count) for t in crud.get_tags(db, include_empty=True)] == [
+        ("x", 0)
+    ]
+    assert crud.delete_task(db, task.id) is None
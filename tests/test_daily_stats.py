@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, crud, schemas
+
+
+def create_session():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return SessionLocal()
+
+
+def rollup(db):
+    return sorted(
+        (r.day, r.quadrant, r.tag, r.created, r.completed)
+        for r in db.query(models.DailyStat).all()
+    )
+
+
+def test_rollup_tracks_status_transitions_and_matches_backfill():
+    db = create_session()
+    a = crud.create_task(
+        db, schemas.TaskCreate(title="a", urgent=True, important=True, tag="Boulot")
+    )
+    b = crud.create_task(
+        db, schemas.TaskCreate(title="b", urgent=False, important=False)
+    )
+    crud.update_task(db, a.id, schemas.TaskUpdate(status="done"))
+    crud.update_task(db, b.id, schemas.TaskUpdate(status="done"))
+    crud.update_task(db, b.id, schemas.TaskUpdate(status="todo"))  # reopened
+
+    today = date.today()
+    points = crud.get_stats_timeseries(db, today - timedelta(days=6), today)
+    assert len(points) == 7
+    assert points[-1] == {
+        "start": today,
+        "created": 2,
+        "completed": 1,
+        "tracked_seconds": 0,
+    }
+
+    q1 = crud.get_stats_timeseries(db, today, today, quadrant=1, tag="boulot")
+    assert q1[0]["completed"] == 1
+
+    weeks = crud.get_stats_timeseries(
+        db, today - timedelta(weeks=3), today, bucket="week"
+    )
+    assert weeks[0]["start"].weekday() == 0
+    assert sum(w["created"] for w in weeks) == 2
+
+    incremental = rollup(db)
+    crud.rebuild_daily_stats(db)
+    assert rollup(db) == [r for r in incremental if r[3] or r[4]]
+    db.close()
+
+
+def test_reopen_decrements_the_row_counted_at_completion():
+    db = create_session()
+    task = crud.create_task(
+        db, schemas.TaskCreate(title="t", urgent=True, important=True, tag="x")
+    )
+    crud.update_task(db, task.id, schemas.TaskUpdate(status="done"))
+    # rouverte en changeant de quadrant et de tag dans la même mise à jour
+    crud.update_task(
+        db,
+        task.id,
+        schemas.TaskUpdate(status="todo", urgent=False, important=False, tag="y"),
+    )
+    completed = {(r[1], r[2]): r[4] for r in rollup(db)}
+    assert completed == {(1, ""): 0, (1, "x"): 0}
+    assert (
+        crud.get_stats_timeseries(db, date.today(), date.today())[0]["completed"] == 0
+    )
+    db.close()
+
+
+def test_done_task_moved_then_reopened_leaves_no_phantom_completion():
+    db = create_session()
+    task = crud.create_task(
+        db, schemas.TaskCreate(title="t", urgent=True, important=True, tag="x")
+    )
+    crud.update_task(db, task.id, schemas.TaskUpdate(status="done"))
+    # déplacée dans la matrice puis retaguée une fois terminée
+    crud.set_task_quadrant(db, task.id, 4)
+    crud.update_task(db, task.id, schemas.TaskUpdate(tag="y"))
+    completed = {(r[1], r[2]): r[4] for r in rollup(db) if r[4]}
+    assert completed == {(4, ""): 1, (4, "y"): 1}
+    crud.rebuild_daily_stats(db)  # la reconstruction compte au même endroit
+    assert {(r[1], r[2]): r[4] for r in rollup(db) if r[4]} == completed
+
+    crud.update_task(db, task.id, schemas.TaskUpdate(status="todo"))
+    assert all(r[4] == 0 for r in rollup(db))
+    assert crud.set_task_quadrant(db, 999, 1) is None
+    db.close()
+
+
+def test_task_with_several_tags_counts_in_each_tag():
+    db = create_session()
+    task = crud.create_task(
+        db,
+        schemas.TaskCreate(
+            title="t", urgent=False, important=True, tag="Boulot, perso"
+        ),
+    )
+    crud.update_task(db, task.id, schemas.TaskUpdate(status="done"))
+    crud.add_time_entry(db, task.id, schemas.TimeEntryCreate(seconds=300))
+    crud.create_task(db, schemas.TaskCreate(title="u", urgent=False, important=True))
+
+    today = date.today()
+    for tag, created in (("boulot", 1), ("perso", 1), (None, 2)):
+        point = crud.get_stats_timeseries(db, today, today, tag=tag)[0]
+        assert (point["created"], point["completed"]) == (created, 1), tag
+        assert point["tracked_seconds"] == 300
+    assert crud.get_stats_timeseries(db, today, today, tag="autre")[0] == {
+        "start": today,
+        "created": 0,
+        "completed": 0,
+        "tracked_seconds": 0,
+    }
+    assert crud.get_tracked_time(db, today, today)["q2"] == 300
+
+    incremental = rollup(db)
+    crud.rebuild_daily_stats(db)
+    assert rollup(db) == incremental
+    db.close()
@@ -0,0 +1,160 @@
+import random
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, crud, schemas
+from app.database import enable_foreign_keys
+from app.dependency_graph import DependencyGraph
+from app.main import app
+
+client = TestClient(app)
+
+
+def reaches(edges, start, goal):
+    """Brute force: is `goal` reachable from `start` along "blocks" edges?"""
+    seen, stack = {start}, [start]
+    while stack:
+        node = stack.pop()
+        if node == goal:
+            return True
+        for task_id, blocker in edges:
+            if blocker == node and task_id not in seen:
+                seen.add(task_id)
+                stack.append(task_id)
+    return False
+
+
+def test_incremental_order_matches_brute_force():
+    rng = random.Random(7)
+    graph, edges = DependencyGraph(), set()
+    nodes = range(1, 41)
+    for _ in range(400):
+        task_id, blocker = rng.choice(nodes), rng.choice(nodes)
+        if rng.random() < 0.2 and edges:
+            task_id, blocker = rng.choice(sorted(edges))
+            graph.remove_edge(task_id, blocker)
+            edges.discard((task_id, blocker))
+        else:
+            cycle = graph.add_edge(task_id, blocker, set(nodes))
+            assert (cycle is not None) == reaches(edges, task_id, blocker)
+            if cycle is None:
+                edges.add((task_id, blocker))
+            else:
+                assert cycle[0] == cycle[-1] == task_id and blocker in cycle
+        # l'ordre maintenu reste topologique
+        for t, b in edges:
+            assert graph.rank[b] < graph.rank[t]
+        assert set(graph.order()) == {n for edge in edges for n in edge}
+
+    rebuilt = DependencyGraph.build(edges, nodes)
+    assert {n: rebuilt.waiting[n] for n in rebuilt.rank} == {
+        n: graph.waiting[n] for n in graph.rank
+    }
+
+
+def test_ready_set_follows_status_and_edges():
+    graph = DependencyGraph.build([(2, 1), (3, 2), (3, 1)], open_ids={1, 2, 3})
+    assert graph.order() == [1, 2, 3]
+    assert [graph.is_blocked(n) for n in (1, 2, 3)] == [False, True, True]
+    graph.set_open(1, False)
+    assert [graph.is_blocked(n) for n in (1, 2, 3)] == [False, False, True]
+    graph.set_open(2, False)
+    assert not graph.is_blocked(3)
+    graph.set_open(1, True)
+    assert graph.is_blocked(3) and graph.waiting[3] == 1
+    graph.remove_node(1)
+    assert 1 not in graph and not graph.is_blocked(3)
+
+
+def new_task(db, title, **kwargs):
+    return crud.create_task(
+        db, schemas.TaskCreate(title=title, urgent=False, important=True, **kwargs)
+    )
+
+
+def test_crud_dependencies_sort_and_cycles(monkeypatch):
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    enable_foreign_keys(engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+    )()
+    monkeypatch.setattr(crud, "_dependencies", crud._DependencyCache())
+
+    design, build, ship, docs = (
+        new_task(db, t) for t in ("design", "build", "ship", "docs")
+    )
+    crud.add_task_dependency(db, build.id, design.id)
+    deps = crud.add_task_dependency(db, ship.id, build.id)
+    assert deps == {
+        "task_id": ship.id,
+        "blocked_by": [build.id],
+        "blocking": [],
+        "blocked": True,
+    }
+    assert crud.add_task_dependency(db, ship.id, 999) is None
+
+    # seules les mises à jour suivantes passent par le journal des changements
+    loads = []
+    original = crud._load_dependency_graph
+    monkeypatch.setattr(
+        crud, "_load_dependency_graph", lambda db: loads.append(1) or original(db)
+    )
+    for blocked, blocker in ((design.id, ship.id), (design.id, design.id)):
+        try:
+            crud.add_task_dependency(db, blocked, blocker)
+        except crud.DependencyCycleError as exc:
+            assert exc.path[0] == exc.path[-1] == blocked
+        else:
+            raise AssertionError("cycle accepted")
+    assert crud.add_task_dependency(db, ship.id, build.id)["blocked_by"] == [build.id]
+
+    ready = crud.get_tasks(db, sort="ready")
+    assert [t.title for t in ready] == ["docs", "design", "build", "ship"]
+    crud.update_task(db, design.id, schemas.TaskUpdate(status="done"))
+    assert crud.get_blocked_task_ids(db, [build.id, ship.id, docs.id]) == {ship.id}
+    ready = crud.get_tasks(db, sort="ready")
+    assert [t.title for t in ready] == ["docs", "build", "ship", "design"]
+
+    crud.delete_task(db, build.id)  # arêtes supprimées en cascade
+    assert crud.get_task_dependencies(db, ship.id)["blocked_by"] == []
+    assert crud.get_blocked_task_ids(db, [ship.id]) == set()
+    crud.add_task_dependency(db, docs.id, ship.id)
+    assert crud.remove_task_dependency(db, docs.id, ship.id)["blocked"] is False
+    assert crud.remove_task_dependency(db, docs.id, ship.id) is None
+    assert loads == []
+
+
+def test_dependency_endpoints_and_matrix_filter(app_client, monkeypatch):
+    client, _ = app_client
+    monkeypatch.setattr(crud, "_dependencies", crud._DependencyCache())
+    ids = [
+        client.post(
+            "/api/tasks/", json={"title": title, "urgent": True, "important": True}
+        ).json()["id"]
+        for title in ("Préparer devis", "Envoyer devis")
+    ]
+    prep, send = ids
+    base = f"/api/tasks/{send}/dependencies/"
+    added = client.post(base, json={"depends_on_id": prep})
+    assert added.status_code == 200 and added.json()["blocked_by"] == [prep]
+    assert client.get(f"/api/tasks/{prep}/dependencies/").json()["blocking"] == [send]
+
+    cycle = client.post(
+        f"/api/tasks/{prep}/dependencies/", json={"depends_on_id": send}
+    )
+    assert cycle.status_code == 409
+    assert cycle.json()["detail"]["cycle"] == [prep, send, prep]
+    assert client.post(base, json={"depends_on_id": 999}).status_code == 404
+
+    page = client.get("/matrix?ready=1").text
+    assert "Préparer devis" in page and "Envoyer devis" not in page
+    assert "Envoyer devis" in client.get("/matrix").text
+
+    assert client.delete(f"{base}{prep}").json()["blocked"] is False
+    assert client.delete(f"{base}{prep}").status_code == 404
+    assert "Envoyer devis" in client.get("/matrix?ready=1").text
@@ -0,0 +1,66 @@
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models, crud, schemas
+from app.events import EventBus, bus
+from app.routers.events import format_sse
+
+
+def create_session():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,  # one shared in-memory DB across threads
+    )
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return SessionLocal()
+
+
+def test_bus_fans_out_to_thousands_of_subscribers():
+    async def scenario():
+        b = EventBus(queue_size=8)
+        subs = [b.subscribe() for _ in range(5000)]
+        for i in range(5):
+            b.publish({"seq": i})
+        received = [[(await s.get()) for _ in range(5)] for s in subs]
+        assert all([e["seq"] for e in r] == list(range(5)) for r in received)
+        assert b.dropped == 0
+
+    asyncio.run(scenario())
+
+
+def test_bus_drops_slow_consumers():
+    async def scenario():
+        b = EventBus(queue_size=2)
+        fast = b.subscribe()
+        slow = b.subscribe()
+        for i in range(3):
+            b.publish({"seq": i})
+            await fast.get()
+        assert slow.dropped is True
+        assert await slow.get() is None
+        assert b.subscriber_count == 1
+
+    asyncio.run(scenario())
+
+
+def test_crud_mutations_are_published_after_commit():
+    async def scenario():
+        sub = bus.subscribe()
+        db = create_session()
+        task_in = schemas.TaskCreate(title="live", urgent=True, important=False)
+        # crud runs in a worker thread in the app, as in FastAPI sync endpoints
+        task = await asyncio.to_thread(crud.create_task, db, task_in)
+        evt = await sub.get(timeout=2)
+        assert evt["op"] == "upsert"
+        assert evt["id"] == task.id
+        assert evt["data"]["title"] == "live"
+        assert format_sse(evt).startswith(f"id: {evt['seq']}\nevent: task\n")
+        sub.close()
+        db.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+
+
+def create_session():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return SessionLocal()
+
+
+def seed(db, today):
+    rows = [
+        ("a", True, True, today - timedelta(days=2), "boulot"),
+        ("b", True, False, today, "boulot, perso"),
+        ("c", False, True, today + timedelta(days=3), None),
+        ("d", False, False, today + timedelta(days=30), "perso"),
+        ("e", True, True, None, None),
+        ("f", False, True, None, "boulot"),
+    ]
+    for title, urgent, important, due_date, tag in rows:
+        crud.create_task(
+            db,
+            schemas.TaskCreate(
+                title=title,
+                urgent=urgent,
+                important=important,
+                due_date=due_date,
+                tag=tag,
+            ),
+        )
+    for task in crud.get_tasks(db, q="e"):
+        crud.update_task(db, task.id, schemas.TaskUpdate(status="done"))
+
+
+def naive_count(db, **filters):
+    return len(crud.get_tasks(db, **filters))
+
+
+def test_facets_match_naive_counts_excluding_own_filter():
+    db = create_session()
+    today = date.today()
+    seed(db, today)
+    filters = dict(status="todo", important=True, tag="boulot")
+    facets = crud.get_task_facets(db, **filters, today=today)
+
+    assert facets["total"] == 6
+    assert facets["matching"] == naive_count(db, **filters) == 2
+    # status compté sans le filtre status
+    for value in ("todo", "done"):
+        expected = naive_count(db, **dict(filters, status=value))
+        assert facets["status"][value] == expected
+    # important compté sans le filtre important
+    assert facets["important"] == {
+        "yes": naive_count(db, **filters),
+        "no": naive_count(db, **dict(filters, important=False)),
+    }
+    for value in crud.LIST_SECTIONS:
+        expected = naive_count(db, **dict(filters, due=value))
+        assert facets["due"][value] == expected
+    for n in range(1, 5):
+        expected = naive_count(db, **dict(filters, quadrant=n))
+        assert facets["quadrant"][f"q{n}"] == expected
+
+
+def test_facets_due_buckets_and_quadrants_without_filters():
+    db = create_session()
+    today = date.today()
+    seed(db, today)
+    facets = crud.get_task_facets(db, today=today)
+    assert facets["matching"] == facets["total"] == 6
+    assert facets["due"] == {
+        "overdue": 1,
+        "today": 1,
+        "soon": 1,
+        "later": 1,
+        "none": 1,
+        "done": 1,
+    }
+    assert facets["quadrant"] == {"q1": 2, "q2": 2, "q3": 1, "q4": 1}
+    assert facets["status"] == {"todo": 5, "done": 1}
+
+    # un filtre sans correspondance : des zéros, pas de None
+    empty = crud.get_task_facets(db, q="introuvable", today=today)
+    assert empty["matching"] == 0 and empty["status"] == {"todo": 0, "done": 0}
@@ -0,0 +1,145 @@
+import re
+from datetime import date
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, crud, schemas, ics
+from app.main import app
+
+client = TestClient(app)
+
+
+def task_row(**kwargs):
+    values = dict(
+        id=7,
+        title="Revue",
+        description=None,
+        tag=None,
+        due_date=date(2026, 10, 19),
+        recurrence_pattern=None,
+        recurrence_end_date=None,
+        updated_at=None,
+    )
+    values.update(kwargs)
+    return SimpleNamespace(**values)
+
+
+def unfold(text):
+    return text.replace("\r\n ", "").split("\r\n")
+
+
+def test_render_task_rrules_and_escaping():
+    lines = unfold(
+        ics.render_task(
+            task_row(
+                title="Appel, budget; suivi " + "é" * 60,
+                tag="Finance, q4",
+                recurrence_pattern="weekly",
+                recurrence_end_date=date(2026, 12, 31),
+            )
+        )
+    )
+    assert "DTSTART;VALUE=DATE:20261019" in lines
+    assert "RRULE:FREQ=WEEKLY;UNTIL=20261231" in lines
+    assert "CATEGORIES:finance,q4" in lines
+    assert "SUMMARY:Appel\\, budget\\; suivi " + "é" * 60 in lines
+    folded = ics.render_task(task_row(title="é" * 60))
+    assert all(len(line.encode()) <= 75 for line in folded.split("\r\n"))
+
+    # 31/08 : 30/09 … 30/01 puis 28 chaque mois (comme _next_due_date)
+    lines = unfold(
+        ics.render_task(
+            task_row(due_date=date(2026, 8, 31), recurrence_pattern="monthly")
+        )
+    )
+    assert lines.count("BEGIN:VEVENT") == 2
+    assert "RDATE;VALUE=DATE:20260930,20261030,20261130,20261230,20270130" in lines
+    assert "DTSTART;VALUE=DATE:20270228" in lines
+    assert "RRULE:FREQ=MONTHLY" in lines
+
+    # fin de série avant la prochaine occurrence : un seul événement simple
+    single = ics.render_task(
+        task_row(recurrence_pattern="daily", recurrence_end_date=date(2026, 10, 19))
+    )
+    assert "RRULE" not in single
+
+
+def test_feed_is_refreshed_from_the_change_log(monkeypatch):
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    monkeypatch.setattr(ics, "_feed", ics._Feed())
+
+    for i in range(5):
+        crud.create_task(
+            db,
+            schemas.TaskCreate(
+                title=f"t{i}",
+                urgent=False,
+                important=True,
+                due_date=date(2026, 11, i + 1),
+            ),
+        )
+    crud.create_task(
+        db, schemas.TaskCreate(title="sans date", urgent=False, important=False)
+    )
+    version, events = ics.get_feed(db)
+    assert len(events) == 5
+
+    rendered = []
+    original = ics.render_task
+    monkeypatch.setattr(
+        ics, "render_task", lambda row: rendered.append(row.id) or original(row)
+    )
+    assert ics.get_feed(db)[1] is events  # même version : rien n'est relu
+    crud.update_task(db, 2, schemas.TaskUpdate(title="renamed"))
+    crud.update_task(db, 3, schemas.TaskUpdate(status="done"))
+    crud.delete_task(db, 4)
+    version, events = ics.get_feed(db)
+    assert rendered == [2]
+    assert len(events) == 3 and "SUMMARY:renamed" in events[1]
+
+
+def test_ics_endpoint_etag_costs_one_query(app_client, monkeypatch):
+    client, _ = app_client
+    monkeypatch.setattr(ics, "_feed", ics._Feed())
+    client.post(
+        "/api/tasks/",
+        json={
+            "title": "rapport",
+            "due_date": "2026-11-02",
+            "urgent": True,
+            "important": True,
+        },
+    )
+    feed = client.get("/api/agenda/feed.ics")
+    assert feed.status_code == 200
+    assert feed.headers["content-type"].startswith("text/calendar")
+    assert feed.text.startswith("BEGIN:VCALENDAR\r\n")
+    assert feed.text.endswith("END:VCALENDAR\r\n")
+    assert "SUMMARY:rapport" in feed.text
+    etag = feed.headers["etag"]
+
+    again = client.get("/api/agenda/feed.ics", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    timing = again.headers["server-timing"]
+    assert re.search(r'desc="1 queries"', timing), timing
+
+    client.post(
+        "/api/tasks/",
+        json={
+            "title": "suivi",
+            "due_date": "2026-11-03",
+            "urgent": False,
+            "important": True,
+        },
+    )
+    changed = client.get("/api/agenda/feed.ics", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert "SUMMARY:suivi" in changed.text
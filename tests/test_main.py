@@ -1,4 +1,6 @@
 from datetime import date, timedelta
+
+from app import crud, schemas
 from app.main import compute_due_status
 
 
@@ -21,3 +23,90 @@ def test_compute_due_status_soon_and_later():
     later = date.today() + timedelta(days=10)
     assert compute_due_status(soon) == "soon"
     assert compute_due_status(later) == "later"
+
+
+def test_list_mutations_return_fragments_with_hx_request(app_client):
+    client, _ = app_client
+    hx = {"HX-Request": "true"}
+    # sans en-tête : comportement historique (redirection)
+    classic = client.post(
+        "/list/add", data={"title": "Classique"}, follow_redirects=False
+    )
+    assert classic.status_code == 303
+
+    added = client.post(
+        "/list/add",
+        data={"title": "Réunion", "due_date": date.today().isoformat()},
+        headers=hx,
+    )
+    assert added.status_code == 200
+    body = added.text
+    assert "<html" not in body and "Liste des tâches" not in body
+    assert body.count('data-task-id="') == 1
+    assert 'data-section="today"' in body
+    assert (
+        '<span id="count-today" class="section-count" hx-swap-oob="true">1</span>'
+        in body
+    )
+    assert 'id="count-none" class="section-count" hx-swap-oob="true">1<' in body
+    assert 'id="count-total" class="section-count" hx-swap-oob="true">2<' in body
+    task_id = int(body.split('data-task-id="')[1].split('"')[0])
+
+    done = client.post(
+        f"/list/complete/{task_id}",
+        headers={"Accept": "text/html+fragment"},
+    )
+    assert 'data-section="done"' in done.text
+    assert f'action="/list/reopen/{task_id}"' in done.text
+    assert 'id="count-today" class="section-count" hx-swap-oob="true">0<' in done.text
+    assert 'id="count-done" class="section-count" hx-swap-oob="true">1<' in done.text
+
+    # filtres de la page passés en query string : la ligne sort du filtre
+    reopened = client.post(f"/list/reopen/{task_id}?status_f=done", headers=hx)
+    assert "data-task-id" not in reopened.text
+    assert (
+        'id="count-shown" class="section-count" hx-swap-oob="true">0<' in reopened.text
+    )
+
+    assert client.post("/list/complete/999", headers=hx).status_code == 404
+
+
+def test_matrix_move_returns_card_and_quadrant_counters(app_client):
+    client, db = app_client
+    task = crud.create_task(
+        db, schemas.TaskCreate(title="Déplacer", urgent=False, important=False)
+    )
+    response = client.post(
+        f"/matrix/move/{task.id}",
+        data={"quadrant": "1"},
+        headers={"HX-Request": "true"},
+    )
+    assert response.status_code == 200
+    assert f'<li data-task-id="{task.id}" data-quadrant="1"' in response.text
+    assert "prio-urgent" in response.text
+    assert 'id="count-q1" class="section-count" hx-swap-oob="true">1<' in response.text
+    assert 'id="count-q4" class="section-count" hx-swap-oob="true">0<' in response.text
+
+    page = client.get("/matrix")
+    assert '<span id="count-q1" class="section-count">1</span>' in page.text
+    assert client.get("/list").status_code == 200
+
+
+def test_facets_endpoint_and_list_filter_counts(app_client):
+    client, db = app_client
+    for title, urgent in (("Un", True), ("Deux", False), ("Trois", True)):
+        crud.create_task(
+            db, schemas.TaskCreate(title=title, urgent=urgent, important=True)
+        )
+    facets = client.get("/api/tasks/facets", params={"urgent": "true"}).json()
+    assert facets["total"] == 3 and facets["matching"] == 2
+    assert facets["urgent"] == {"yes": 2, "no": 1}
+    assert facets["quadrant"] == {"q1": 2, "q2": 0, "q3": 0, "q4": 0}
+    assert client.get("/api/tasks/facets", params={"due": "bad"}).status_code == 422
+
+    listed = client.get("/api/tasks/", params={"quadrant": 2}).json()
+    assert [t["title"] for t in listed] == ["Deux"]
+
+    page = client.get("/list", params={"quadrant_f": "1"})
+    assert page.status_code == 200
+    assert "À faire (2)" in page.text
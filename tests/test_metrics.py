@@ -0,0 +1,73 @@
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.metrics import Metrics, MetricsMiddleware
+from app.routers import metrics as metrics_router
+
+
+def create_client():
+    metrics = Metrics()
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+    @app.get("/api/tasks/{task_id}")
+    def get_task(task_id: int):
+        if task_id == 404:
+            raise HTTPException(status_code=404)
+        return {"id": task_id}
+
+    @app.post("/api/tasks/reorder")
+    def reorder():
+        return []
+
+    return TestClient(app), metrics
+
+
+def test_requests_are_labelled_by_route_template():
+    client, metrics = create_client()
+    for task_id in (1, 2, 404):
+        client.get(f"/api/tasks/{task_id}")
+    client.post("/api/tasks/reorder")
+    client.get("/nope")
+
+    text = metrics.render()
+    assert (
+        'http_requests_total{method="GET",route="/api/tasks/{task_id}",status="200"} 2'
+        in text
+    )
+    assert (
+        'http_requests_total{method="GET",route="/api/tasks/{task_id}",status="404"} 1'
+        in text
+    )
+    # same path, other method: resolved to the full match, not the first partial one
+    assert (
+        'http_requests_total{method="POST",route="/api/tasks/reorder",status="200"} 1'
+        in text
+    )
+    assert 'route="<unmatched>",status="404"} 1' in text
+    assert "/api/tasks/1" not in text
+
+    series = metrics.series[("GET", "/api/tasks/{task_id}")]
+    assert series.in_flight == 0
+    assert sum(series.latency_counts) == 3
+    assert series.size_sum == len(b'{"id":1}') + len(b'{"id":2}') + len(
+        b'{"detail":"Not Found"}'
+    )
+    assert (
+        "http_request_duration_seconds_count"
+        '{method="GET",route="/api/tasks/{task_id}"} 3' in text
+    )
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router.router)
+    client = TestClient(app)
+
+    client.get("/metrics")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert 'route="/metrics"' in response.text
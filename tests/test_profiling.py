@@ -0,0 +1,80 @@
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.routers import profiles as profiles_router
+
+SECRET = "s3cret"
+
+
+def busy_endpoint():
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    return {"ok": True}
+
+
+def create_client(tmp_path, monkeypatch, min_interval=60):
+    monkeypatch.setattr(profiling, "PROFILE_SECRET", SECRET)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    app = FastAPI()
+    app.add_middleware(
+        profiling.ProfilingMiddleware,
+        secret=SECRET,
+        directory=str(tmp_path),
+        interval_ms=1,
+        min_interval=min_interval,
+    )
+    app.get("/slow")(busy_endpoint)
+    app.include_router(profiles_router.router)
+    return TestClient(app)
+
+
+def test_token_signature_and_expiry():
+    token = profiling.make_token(SECRET)
+    assert profiling.verify_token(token, SECRET)
+    assert not profiling.verify_token(token, "other")
+    assert not profiling.verify_token(profiling.make_token(SECRET, ttl=-10), SECRET)
+    assert not profiling.verify_token(token, "")  # disabled
+
+
+def test_signed_request_is_profiled_and_rate_limited(tmp_path, monkeypatch):
+    client = create_client(tmp_path, monkeypatch)
+    token = profiling.make_token(SECRET)
+
+    assert "x-profile" not in client.get("/slow").headers
+    assert "x-profile" not in client.get("/slow?profile=1.bad").headers
+
+    name = client.get("/slow", headers={"X-Profile": token}).headers["x-profile"]
+    data = json.loads((tmp_path / name).read_text(encoding="utf-8"))
+    frame_names = {f["name"] for f in data["shared"]["frames"]}
+    # sync endpoint ran in the threadpool and was still sampled
+    assert "busy_endpoint" in frame_names
+    assert data["profiles"][0]["samples"]
+
+    response = client.get(f"/slow?profile={token}")
+    assert response.headers["x-profile"] == "rate-limited"
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_admin_endpoints_list_and_download(tmp_path, monkeypatch):
+    client = create_client(tmp_path, monkeypatch, min_interval=0)
+    token = profiling.make_token(SECRET)
+    name = client.get("/slow", headers={"X-Profile": token}).headers["x-profile"]
+
+    assert client.get("/api/profiles/").status_code == 403
+    listing = client.get("/api/profiles/", headers={"X-Profile": token})
+    assert "x-profile" not in listing.headers  # la consultation n'est pas profilée
+    assert [p["name"] for p in listing.json()] == [name]
+
+    response = client.get(f"/api/profiles/{name}?profile={token}")
+    assert response.status_code == 200
+    assert response.json()["exporter"] == "app.profiling"
+    assert client.get(f"/api/profiles/..%2F{name}?profile={token}").status_code == 404
+    assert [p.name for p in tmp_path.iterdir()] == [name]
+
+    monkeypatch.setattr(profiling, "PROFILE_SECRET", "")
+    assert client.get("/api/profiles/", headers={"X-Profile": token}).status_code == 404
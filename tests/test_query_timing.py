@@ -0,0 +1,77 @@
+import logging
+import re
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud, models, schemas
+from app.database import instrument_engine
+from app.metrics import QueryTimingMiddleware
+
+
+def create_client(repeat_threshold=0):
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    instrument_engine(engine)
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.add_middleware(QueryTimingMiddleware, repeat_threshold=repeat_threshold)
+
+    @app.get("/stats")
+    def stats(db: Session = Depends(get_db)):
+        crud.get_general_stats(db)
+        return crud.get_eisenhower_stats(db)
+
+    @app.get("/n-plus-one")
+    def n_plus_one(db: Session = Depends(get_db)):
+        # one lazy load per task
+        return [len(t.subtasks) for t in crud.get_tasks(db)]
+
+    db = SessionLocal()
+    for i in range(4):
+        crud.create_task(
+            db, schemas.TaskCreate(title=f"t{i}", urgent=False, important=True)
+        )
+    db.close()
+    return TestClient(app)
+
+
+def test_server_timing_reports_query_count_and_db_time():
+    client = create_client()
+    response = client.get("/stats")
+    timing = response.headers["server-timing"]
+    match = re.match(r'db;dur=([\d.]+);desc="(\d+) queries", app;dur=([\d.]+)', timing)
+    assert match, timing
+    assert int(match[2]) == 2
+    assert float(match[1]) <= float(match[3])
+
+
+def test_repeated_statement_shape_is_reported(caplog):
+    client = create_client(repeat_threshold=3)
+    with caplog.at_level(logging.WARNING, logger="app.metrics"):
+        response = client.get("/n-plus-one")
+    assert response.json() == [0, 0, 0, 0]
+    assert 'desc="5 queries"' in response.headers["server-timing"]
+    [record] = caplog.records
+    assert "ran 4 times (possible N+1)" in record.getMessage()
+    assert "FROM subtasks" in record.getMessage()
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="app.metrics"):
+        client.get("/stats")
+    assert caplog.records == []
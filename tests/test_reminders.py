@@ -0,0 +1,101 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, crud, schemas, reminders
+from app.events import bus
+
+
+def create_session():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return SessionLocal()
+
+
+def new_task(db, title, due, **kwargs):
+    return crud.create_task(
+        db,
+        schemas.TaskCreate(
+            title=title, urgent=False, important=True, due_date=due, **kwargs
+        ),
+    )
+
+
+def test_heap_follows_crud_mutations():
+    db = create_session()
+    today = date.today()
+    now = datetime.combine(today, datetime.min.time())
+    past = new_task(db, "late", today - timedelta(days=3))
+    kept = new_task(db, "report", today)
+    new_task(db, "no date", None)
+
+    scheduler = reminders.ReminderScheduler()
+    assert scheduler.load(db, now=now) == 1  # seule « report » a un rappel à venir
+    bus.add_listener(scheduler.on_event)
+    try:
+        moved = new_task(db, "review", today + timedelta(days=1))
+        crud.update_task(db, moved.id, schemas.TaskUpdate(due_date=today))
+        # même échéance : pas de nouvelle entrée, seul le titre change
+        crud.update_task(db, kept.id, schemas.TaskUpdate(title="final report"))
+        done = new_task(db, "call", today)
+        crud.update_task(db, done.id, schemas.TaskUpdate(status="done"))
+        deleted = new_task(db, "drop", today)
+        crud.delete_task(db, deleted.id)
+        crud.update_task(db, past.id, schemas.TaskUpdate(title="still late"))
+    finally:
+        bus.remove_listener(scheduler.on_event)
+    assert len(scheduler) == 2
+
+    assert scheduler.pop_due(now) == []
+    at_nine = now + timedelta(hours=reminders.REMINDER_HOUR)
+    fired = scheduler.pop_due(at_nine)
+    assert [(r["kind"], r["title"]) for r in fired] == [
+        ("due_today", "final report"),
+        ("due_today", "review"),
+    ]
+    assert scheduler.next_fire_time() == now + timedelta(days=1)
+    overdue = scheduler.pop_due(now + timedelta(days=1))
+    assert {r["task_id"] for r in overdue} == {kept.id, moved.id}
+    assert all(r["kind"] == "overdue" for r in overdue)
+    assert len(scheduler) == 0 and scheduler.next_fire_time() is None
+
+
+def test_stale_entries_are_compacted():
+    scheduler = reminders.ReminderScheduler()
+    now = datetime(2026, 10, 19, 8)
+    for i in range(200):
+        scheduler.track(1, date(2026, 10, 20) + timedelta(days=i), "moving", now=now)
+    # au plus ~64 entrées périmées + 2 valides, pas 400
+    assert len(scheduler._heap) < 200
+    fired = scheduler.pop_due(datetime(2027, 12, 31))
+    assert [r["due_date"] for r in fired] == ["2027-05-07", "2027-05-07"]
+
+
+def test_run_fires_reminders_on_the_bus(monkeypatch):
+    scheduler = reminders.ReminderScheduler()
+    received = []
+    bus.add_listener(received.append)
+
+    async def scenario():
+        runner = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0)
+        # échéance passée dont le rappel « overdue » tombe dans 50 ms
+        soon = datetime.now() + timedelta(milliseconds=50)
+        monkeypatch.setattr(reminders, "fire_times", lambda due: [(soon, "overdue")])
+        scheduler.track(42, date.today(), "urgent call")
+        await asyncio.sleep(0.3)
+        runner.cancel()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        bus.remove_listener(received.append)
+    assert [(r["entity"], r["kind"], r["task_id"]) for r in received] == [
+        ("reminder", "overdue", 42)
+    ]
+    assert scheduler.fired == 1
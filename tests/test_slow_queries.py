@@ -0,0 +1,43 @@
+import json
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, database, models, schemas
+
+
+def test_slow_statements_are_logged_with_caller_and_plan(tmp_path):
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    database.instrument_engine(engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    crud.create_task(
+        db, schemas.TaskCreate(title="a", urgent=True, important=True, tag="Boulot")
+    )
+
+    log = tmp_path / "slow.log"
+    database.configure_slow_query_log(0.000001, str(log))  # tout est "lent"
+    try:
+        tasks = crud.get_tasks(db, q="a", sort="due_asc")
+        crud.set_positions_bulk(db, [{"id": tasks[0].id, "position": 3}])
+    finally:
+        database.configure_slow_query_log(0)
+        db.close()
+
+    entries = [json.loads(line) for line in log.read_text("utf-8").splitlines()]
+    [select] = [e for e in entries if e["caller"] == "crud.get_tasks"]
+    assert select["sql"].startswith("SELECT tasks.id")
+    assert "lower(tasks.title) LIKE ?" in select["sql"]
+    assert select["params"] == ["str", "str"]
+    assert select["duration_ms"] >= 0
+    # full scan + temp sort: what the log is meant to surface
+    assert any(step.startswith("SCAN tasks") for step in select["plan"])
+    assert "USE TEMP B-TREE FOR ORDER BY" in select["plan"]
+    assert any(e["caller"] == "crud.set_positions_bulk" for e in entries)
+
+    # disabled again: nothing more is written
+    size = log.stat().st_size
+    crud.get_tasks(db)
+    assert log.stat().st_size == size
@@ -1,4 +1,7 @@
+import re
+
 from fastapi.testclient import TestClient
+
 from app.main import app
 
 client = TestClient(app)
@@ -42,3 +45,110 @@ def test_subtasks_api_flow():
     # Delete subtask
     delr = client.delete(f"/api/tasks/{task['id']}/subtasks/{sid}")
     assert delr.status_code == 200
+
+
+def test_subtask_batch_operations(app_client):
+    client, _ = app_client
+    task = client.post(
+        "/api/tasks/", json={"title": "plan", "urgent": False, "important": True}
+    ).json()
+    base = f"/api/tasks/{task['id']}/subtasks"
+    client.post(f"{base}/", json={"title": "existing"})
+
+    # 30 étapes : une requête, positions allouées en bloc après l'existante
+    items = [{"title": f"step {i}"} for i in range(30)]
+    created = client.post(f"{base}/batch", json={"items": items})
+    assert created.status_code == 200
+    # parent, max(position), INSERT subtasks, INSERT changes
+    timing = created.headers["server-timing"]
+    assert re.search(r'desc="4 queries"', timing), timing
+    body = created.json()
+    assert [s["title"] for s in body] == [f"step {i}" for i in range(30)]
+    assert [s["position"] for s in body] == list(range(2, 32))
+    missing = client.post("/api/tasks/999/subtasks/batch", json={"items": items})
+    assert missing.status_code == 404
+    assert client.post(f"{base}/batch", json={"items": []}).status_code == 422
+
+    ids = [s["id"] for s in body]
+    checked = client.post(f"{base}/status", json={"status": "done", "ids": ids[:5]})
+    assert checked.json() == {"updated": ids[:5]}
+    # déjà à jour : rien n'est réécrit
+    again = client.post(f"{base}/status", json={"status": "done", "ids": ids[:5]})
+    assert again.json() == {"updated": []}
+    bad = client.post(f"{base}/status", json={"status": "maybe"})
+    assert bad.status_code == 422
+    unknown = "/api/tasks/999/subtasks"
+    assert client.post(f"{unknown}/status", json={"status": "done"}).status_code == 404
+    assert client.delete(f"{unknown}/done").status_code == 404
+
+    deleted = client.delete(f"{base}/done")
+    assert sorted(deleted.json()["deleted"]) == ids[:5]
+    remaining = client.get(f"{base}/").json()
+    assert len(remaining) == 26 and all(s["status"] == "todo" for s in remaining)
+
+    all_done = client.post(f"{base}/status", json={"status": "done"})
+    assert len(all_done.json()["updated"]) == 26
+
+    changes = client.get("/api/changes/", params={"since": 0}).json()
+    subtask_ops = [c["op"] for c in changes["changes"] if c["entity"] == "subtask"]
+    assert subtask_ops.count("delete") == 5
+
+
+def test_task_detail_includes(app_client):
+    client, _ = app_client
+    task = client.post(
+        "/api/tasks/",
+        json={
+            "title": "weekly review",
+            "urgent": False,
+            "important": True,
+            "due_date": "2026-10-19",
+            "recurrence_pattern": "weekly",
+        },
+    ).json()
+    other = client.post(
+        "/api/tasks/", json={"title": "plain", "urgent": True, "important": False}
+    ).json()
+    base = f"/api/tasks/{task['id']}/subtasks"
+    body = client.post(
+        f"{base}/batch", json={"items": [{"title": t} for t in "abcd"]}
+    ).json()
+    client.post(f"{base}/status", json={"status": "done", "ids": [body[0]["id"]]})
+    # ordre par position, pas par id
+    items = [{"id": s["id"], "position": 4 - i} for i, s in enumerate(body)]
+    client.post(f"{base}/reorder", json={"items": items})
+
+    plain = client.get(f"/api/tasks/{task['id']}").json()
+    assert "subtasks" not in plain and "stats" not in plain
+    assert plain["description"] is None  # champs nuls de TaskOut conservés
+
+    detail = client.get(
+        f"/api/tasks/{task['id']}", params={"include": "subtasks,stats"}
+    )
+    assert detail.status_code == 200
+    # tâche + sous-tâches (selectinload), sans requête par sous-tâche
+    timing = detail.headers["server-timing"]
+    assert re.search(r'desc="2 queries"', timing), timing
+    data = detail.json()
+    assert [s["title"] for s in data["subtasks"]] == ["d", "c", "b", "a"]
+    assert data["stats"] == {
+        "subtasks_total": 4,
+        "subtasks_done": 1,
+        "progress": 0.25,
+        "next_occurrence": "2026-10-26",
+    }
+
+    many = client.get(
+        "/api/tasks/details",
+        params={"ids": f"{other['id']},999,{task['id']}", "include": "stats"},
+    )
+    assert many.status_code == 200
+    assert [t["id"] for t in many.json()] == [other["id"], task["id"]]
+    assert many.json()[0]["stats"]["progress"] == 0.0
+    assert many.json()[0]["stats"]["next_occurrence"] is None
+    assert "subtasks" not in many.json()[0]
+
+    assert client.get("/api/tasks/999", params={"include": "stats"}).status_code == 404
+    bad = client.get(f"/api/tasks/{task['id']}", params={"include": "notes"})
+    assert bad.status_code == 422
+    assert client.get("/api/tasks/details", params={"ids": "1,x"}).status_code == 422
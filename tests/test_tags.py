@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+
+
+def create_session():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return SessionLocal()
+
+
+def new_task(db, title, **kwargs):
+    return crud.create_task(
+        db, schemas.TaskCreate(title=title, urgent=False, important=False, **kwargs)
+    )
+
+
+def counters(db):
+    return {t.name: (t.task_count, t.open_count) for t in crud.get_tags(db)}
+
+
+def titles(tasks):
+    return sorted(t.title for t in tasks)
+
+
+def test_tags_are_normalized_and_counted_incrementally():
+    db = create_session()
+    a = new_task(db, "a", tag="Boulot, Perso, boulot")
+    b = new_task(db, "b", tags=["boulot", "Urgent "])
+    new_task(db, "c")
+    assert a.tag == "boulot, perso" and a.tags == ["boulot", "perso"]
+    assert counters(db) == {"boulot": (2, 2), "perso": (1, 1), "urgent": (1, 1)}
+
+    crud.update_task(db, b.id, schemas.TaskUpdate(status="done"))
+    assert counters(db)["boulot"] == (2, 1)
+    crud.update_task(db, a.id, schemas.TaskUpdate(tags=["perso", "maison"]))
+    assert counters(db) == {
+        "boulot": (1, 0),
+        "perso": (1, 1),
+        "maison": (1, 1),
+        "urgent": (1, 0),
+    }
+
+    crud.delete_task(db, a.id)
+    assert counters(db) == {"boulot": (1, 0), "urgent": (1, 0)}
+    assert [t.name for t in crud.get_tags(db, include_empty=True, prefix="m")] == [
+        "maison"
+    ]
+
+    # archivage : les liens partent avec la tâche
+    b_row = crud.get_task(db, b.id)
+    b_row.completed_at = datetime.now(timezone.utc) - timedelta(days=60)
+    db.commit()
+    assert crud.archive_completed_tasks(db, older_than_days=30) == 1
+    assert counters(db) == {}
+    assert db.query(models.TaskTag).count() == 0
+
+    # la reconstruction retrouve les mêmes compteurs
+    new_task(db, "d", tag="perso")
+    before = counters(db)
+    crud.rebuild_tags(db)
+    assert counters(db) == before
+
+
+def test_get_tasks_filters_on_several_tags():
+    db = create_session()
+    new_task(db, "a", tag="boulot, perso")
+    new_task(db, "b", tag="boulot")
+    new_task(db, "c", tag="maison")
+
+    assert titles(crud.get_tasks(db, tag="Boulot")) == ["a", "b"]
+    assert titles(crud.get_tasks(db, tags=["boulot", "perso"])) == ["a"]
+    assert titles(crud.get_tasks(db, tag="perso, maison", tag_mode="any")) == [
+        "a",
+        "c",
+    ]
+    assert crud.get_tasks(db, tags=["inconnu"]) == []
+
+    crud.update_task(db, 1, schemas.TaskUpdate(status="done"))
+    crud.get_task(db, 1).completed_at = datetime.now(timezone.utc) - timedelta(days=60)
+    db.commit()
+    crud.archive_completed_tasks(db, older_than_days=30)
+    # les archives sont filtrées sur leur colonne `tag`
+    rows = crud.get_tasks(db, tags=["boulot", "perso"], include_archived=True)
+    assert [(r.title, r.archived) for r in rows] == [("a", True)]
+
+
+def test_tag_filter_uses_the_association_index():
+    db = create_session()
+    new_task(db, "a", tag="boulot")
+    query = db.query(models.Task).filter(
+        *crud._task_filters(models.Task, tags=["boulot", "perso"])
+    )
+    sql = str(query.statement.compile(compile_kwargs={"literal_binds": True}))
+    plan = " | ".join(
+        row[3] for row in db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + sql)
+    )
+    assert "SCAN tasks" not in plan
+    assert "SEARCH tags USING COVERING INDEX sqlite_autoindex_tags_1 (name=?)" in plan
+    assert "SEARCH task_tags USING COVERING INDEX ix_task_tags_tag (tag_id=?)" in plan
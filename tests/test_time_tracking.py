@@ -0,0 +1,161 @@
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app import models, crud, schemas
+from app.database import enable_foreign_keys
+from app.main import app
+
+client = TestClient(app)
+
+
+def create_session():
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}
+    )
+    enable_foreign_keys(engine)
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+    )
+    return SessionLocal()
+
+
+def rewind_timer(db, task_id, seconds):
+    """Pretend the running timer was started `seconds` ago."""
+    started = datetime.now(timezone.utc) - timedelta(seconds=seconds)
+    db.execute(
+        update(models.Task)
+        .where(models.Task.id == task_id)
+        .values(timer_started_at=started)
+    )
+    db.commit()
+
+
+def test_timer_and_manual_entries_update_totals_and_rollup():
+    db = create_session()
+    task = crud.create_task(
+        db,
+        schemas.TaskCreate(title="rédaction", urgent=True, important=True, tag="doc"),
+    )
+    sub = crud.create_subtask(db, task.id, schemas.SubtaskCreate(title="plan"))
+
+    started = crud.start_timer(db, task.id, sub.id)
+    assert started.timer_started_at is not None and started.timer_subtask_id == sub.id
+    # déjà lancé : rien ne change
+    again = crud.start_timer(db, task.id)
+    assert again.timer_started_at == started.timer_started_at
+    assert again.timer_subtask_id == sub.id
+
+    rewind_timer(db, task.id, 90)
+    stopped = crud.stop_timer(db, task.id)
+    assert stopped.timer_started_at is None and stopped.timer_subtask_id is None
+    spent = stopped.time_spent
+    assert 90 <= spent <= 92
+    assert crud.stop_timer(db, task.id).time_spent == spent
+
+    entry = crud.add_time_entry(
+        db, task.id, schemas.TimeEntryCreate(seconds=600, day=date(2026, 10, 1))
+    )
+    assert entry.source == "manual" and entry.day == date(2026, 10, 1)
+    assert crud.get_task(db, task.id).time_spent == spent + 600
+    assert crud.get_subtask(db, sub.id).time_spent == spent
+    other = crud.create_task(
+        db, schemas.TaskCreate(title="x", urgent=False, important=False)
+    )
+    wrong = schemas.TimeEntryCreate(seconds=60, subtask_id=sub.id)
+    assert crud.add_time_entry(db, other.id, wrong) is None
+    assert crud.start_timer(db, 999) is None
+
+    entries = crud.get_time_entries(db, task.id)
+    assert [e.source for e in entries] == ["manual", "timer"]
+    assert entries[1].subtask_id == sub.id
+
+    # un arrêt immédiat ne crée pas d'entrée
+    crud.start_timer(db, task.id)
+    crud.stop_timer(db, task.id)
+    assert len(crud.get_time_entries(db, task.id)) == 2
+
+    today = datetime.now(timezone.utc).date()
+    points = crud.get_stats_timeseries(db, date(2026, 10, 1), today)
+    assert points[0]["tracked_seconds"] == 600
+    assert sum(p["tracked_seconds"] for p in points) == spent + 600
+    tracked = crud.get_tracked_time(db, date(2026, 10, 1), today)
+    assert tracked == {"q1": spent + 600, "q2": 0, "q3": 0, "q4": 0}
+
+    # la reconstruction du cumul retrouve le temps depuis time_entries
+    crud.rebuild_daily_stats(db)
+    assert crud.get_tracked_time(db, date(2026, 10, 1), today) == tracked
+
+    # supprimer une tâche supprime ses entrées ; AUTOINCREMENT garantit en
+    # plus qu'une nouvelle tâche ne reprendra pas son id
+    crud.add_time_entry(db, other.id, schemas.TimeEntryCreate(seconds=60))
+    crud.delete_task(db, other.id)  # l'id le plus haut
+    assert crud.get_time_entries(db, other.id) == []
+    assert len(crud.get_time_entries(db, task.id)) == 2
+    reborn = crud.create_task(
+        db, schemas.TaskCreate(title="y", urgent=False, important=False)
+    )
+    assert reborn.id > other.id and crud.get_time_entries(db, reborn.id) == []
+
+
+def test_timer_endpoints_stay_cheap(app_client):
+    client, db = app_client
+    task = client.post(
+        "/api/tasks/", json={"title": "focus", "urgent": False, "important": True}
+    ).json()
+    base = f"/api/tasks/{task['id']}"
+
+    start = client.post(f"{base}/timer/start")
+    assert start.status_code == 200
+    assert start.json()["timer_started_at"] is not None
+    # UPDATE ... RETURNING, INSERT changes
+    timing = start.headers["server-timing"]
+    assert re.search(r'desc="2 queries"', timing), timing
+
+    rewind_timer(db, task["id"], 30)
+    stop = client.post(f"{base}/timer/stop")
+    assert stop.status_code == 200 and stop.json()["time_spent"] >= 30
+    # état du chrono, UPDATE ... RETURNING, entrée, cumul, INSERT changes
+    timing = stop.headers["server-timing"]
+    assert re.search(r'desc="5 queries"', timing), timing
+
+    manual = client.post(f"{base}/time", json={"seconds": 120})
+    assert manual.status_code == 200 and manual.json()["seconds"] == 120
+    assert client.post(f"{base}/time", json={"seconds": 0}).status_code == 422
+    listed = client.get(f"{base}/time").json()
+    assert [e["source"] for e in listed] == ["manual", "timer"]
+    assert client.post("/api/tasks/999/timer/stop").status_code == 404
+
+    stats = client.get("/api/stats/time").json()
+    assert stats["quadrants"]["q2"] == stats["total_seconds"]
+    assert stats["total_seconds"] == stop.json()["time_spent"] + 120
+
+
+def test_timer_controls_on_pages_and_tracked_time_on_stats(app_client):
+    client, db = app_client
+    task = crud.create_task(
+        db, schemas.TaskCreate(title="écrire", urgent=False, important=True)
+    )
+    hx = {"HX-Request": "true"}
+    assert f'action="/list/timer/start/{task.id}"' in client.get("/list").text
+    assert f'action="/matrix/timer/start/{task.id}"' in client.get("/matrix").text
+
+    started = client.post(f"/list/timer/start/{task.id}", headers=hx)
+    assert started.status_code == 200
+    assert f'action="/list/timer/stop/{task.id}"' in started.text
+
+    rewind_timer(db, task.id, 3 * 3600 + 5 * 60)
+    stopped = client.post(f"/matrix/timer/stop/{task.id}", follow_redirects=False)
+    assert stopped.status_code == 303 and stopped.headers["location"] == "/matrix"
+    assert "⏱ 3 h 05" in client.get("/matrix").text
+    assert client.post("/list/timer/start/999", headers=hx).status_code == 404
+    assert client.post(f"/list/timer/pause/{task.id}").status_code == 422
+
+    page = client.get("/stats").text
+    assert "Temps suivi (30 derniers jours)" in page
+    planned = page.split('data-tracked="q2"')[1].split("</div>\n    </div>")[0]
+    assert "3 h 05" in planned and "100%" in planned